@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -97,3 +98,31 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Worker processes that reprice stress scenarios, 1 reprices them in the request process
+STRESS_SCENARIO_WORKERS = int(os.environ.get("STRESS_SCENARIO_WORKERS", 1))
+
+# Default and largest page size of the cursor paginated list endpoints
+LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", 1000))
+LIST_MAX_PAGE_SIZE = int(os.environ.get("LIST_MAX_PAGE_SIZE", 10000))
+
+# Curves (curve name and as of date) kept in the in-process curve cache, each curve
+# memoizes up to about 1 MB of discount factors (see fixed_income.curves.GRID_MEMO_MAX_POINTS)
+CURVE_CACHE_SIZE = int(os.environ.get("CURVE_CACHE_SIZE", 256))
+# Seconds a cached curve is used, bounds how long other processes (run_jobs workers,
+# other server workers) serve a curve after it was uploaded again
+CURVE_CACHE_SECONDS = float(os.environ.get("CURVE_CACHE_SECONDS", 60))
+# Seconds a cached portfolio id is used, bounds how long other processes resolve a
+# portfolio name to its old id after it was renamed or deleted
+PORTFOLIO_ID_CACHE_SECONDS = float(os.environ.get("PORTFOLIO_ID_CACHE_SECONDS", 60))
+
+# Uploaded files of queued upload jobs are stored here until a run_jobs worker has run them
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT", BASE_DIR / "media"))
+
+# Seconds without a heartbeat after which a RUNNING job is taken to have lost its
+# worker, run_jobs queues it again until it was claimed JOB_MAX_ATTEMPTS times
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", 600))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+# Seconds between heartbeats of a running job, written by a thread of the worker
+# whether or not the job reports progress, well below JOB_STALE_SECONDS
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", 30))
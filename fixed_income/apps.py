@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class FixedIncomeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "fixed_income"
+
+    def ready(self):
+        # registers the signal receivers that keep the in-process caches, data versions
+        # and derived rows current
+        from . import coupon_schedule, curve_cache, data_versions  # noqa: F401
+        from . import portfolios, shock_vectors  # noqa: F401
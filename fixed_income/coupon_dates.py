@@ -0,0 +1,127 @@
+"""
+Closed-form coupon date arithmetic on numpy datetime64 arrays.
+
+Coupon dates of a vanilla bond are its maturity minus whole multiples of 12 / freq months,
+with the day clamped to the end of shorter months. Instead of stepping through candidate dates
+bond by bond, next and previous coupon dates of whole arrays of (adate, maturity, freq)
+are computed directly with month arithmetic on ``datetime64[M]``.
+"""
+
+import numpy as np
+
+
+def _as_datetime64_array(dates, shape=None) -> np.ndarray:
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if shape is not None:
+        dates = np.broadcast_to(dates, shape)
+    return dates
+
+
+def split_month_and_day(dates: np.ndarray):
+    """
+    Split dates into months and days of month
+    :param dates: datetime64[D] array
+    :return: (datetime64[M] array of months, int array of days of month starting from 1)
+    """
+    months = dates.astype("datetime64[M]")
+    days = (dates - months.astype("datetime64[D]")).astype(np.int64) + 1
+    return months, days
+
+
+def clamp_day_in_month(months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Build dates from months and days of month, days beyond the end of month are clamped to its last day
+    :param months: datetime64[M] array
+    :param days: int array of days of month starting from 1
+    :return: datetime64[D] array
+    """
+    first_days = months.astype("datetime64[D]")
+    last_days = (months + 1).astype("datetime64[D]") - 1
+    return np.minimum(first_days + (days - 1), last_days)
+
+
+def coupon_dates_from_maturity(
+    maturities: np.ndarray, freqs: np.ndarray, periods_back: np.ndarray
+) -> np.ndarray:
+    """
+    Coupon dates lying given number of coupon periods before maturity
+    :param maturities: datetime64[D] array of maturities
+    :param freqs: array of coupon frequencies
+    :param periods_back: number of coupon periods before maturity, 0 is maturity itself
+    :return: datetime64[D] array
+    """
+    maturity_months, maturity_days = split_month_and_day(
+        _as_datetime64_array(maturities)
+    )
+    months_per_period = 12 // np.asarray(freqs, dtype=np.int64)
+    months = maturity_months - (periods_back * months_per_period).astype(
+        "timedelta64[M]"
+    )
+    return clamp_day_in_month(months, maturity_days)
+
+
+def periods_to_next_coupon(adates, maturities, freqs) -> np.ndarray:
+    """
+    Number of coupon periods between next coupon date on or after the as of date and maturity
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param freqs: array of coupon frequencies
+    :return: int array, negative when the as of date is after maturity
+    """
+    maturities = _as_datetime64_array(maturities)
+    freqs = np.asarray(freqs, dtype=np.int64)
+    adates = _as_datetime64_array(adates, maturities.shape)
+    months_per_period = 12 // freqs
+    months_to_maturity = (
+        maturities.astype("datetime64[M]") - adates.astype("datetime64[M]")
+    ).astype(np.int64)
+    # coupon in the month of adate or the first one after it
+    periods_back = np.floor_divide(months_to_maturity, months_per_period)
+    candidate = coupon_dates_from_maturity(maturities, freqs, periods_back)
+    return np.where(candidate < adates, periods_back - 1, periods_back)
+
+
+def next_and_prev_coupon_dates(adates, maturities, freqs):
+    """
+    Find next coupon date on or after and previous coupon date on or before the as of date.
+    A coupon date equal to the as of date is both the next and the previous coupon date
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param freqs: array of coupon frequencies
+    :return: (next_coupon_dates, prev_coupon_dates) as datetime64[D] arrays
+    """
+    maturities = _as_datetime64_array(maturities)
+    adates = _as_datetime64_array(adates, maturities.shape)
+    next_periods_back = periods_to_next_coupon(adates, maturities, freqs)
+    next_coupon_dates = coupon_dates_from_maturity(maturities, freqs, next_periods_back)
+    prev_periods_back = np.where(
+        next_coupon_dates == adates, next_periods_back, next_periods_back + 1
+    )
+    prev_coupon_dates = coupon_dates_from_maturity(maturities, freqs, prev_periods_back)
+    return next_coupon_dates, prev_coupon_dates
+
+
+def generate_coupon_schedules(maturities, freqs, start_date):
+    """
+    Generate coupon dates of many bonds from the last coupon on or before start_date up to maturity
+    :param maturities: array of maturities
+    :param freqs: array of coupon frequencies
+    :param start_date: first date schedules have to cover
+    :return: (coupon_dates, counts) where coupon_dates is a flat datetime64[D] array holding
+        ascending coupon dates of every bond one after another and counts is the number of dates per bond
+    """
+    maturities = _as_datetime64_array(maturities)
+    freqs = np.asarray(freqs, dtype=np.int64)
+    _, prev_coupon_dates = next_and_prev_coupon_dates(start_date, maturities, freqs)
+    first_periods_back = np.maximum(
+        periods_to_next_coupon(prev_coupon_dates, maturities, freqs), 0
+    )
+    counts = first_periods_back + 1
+    bond_idx = np.repeat(np.arange(len(maturities)), counts)
+    # periods back run from first_periods_back down to 0 within every bond
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    periods_back = first_periods_back[bond_idx] - offsets
+    coupon_dates = coupon_dates_from_maturity(
+        maturities[bond_idx], freqs[bond_idx], periods_back
+    )
+    return coupon_dates, counts
@@ -0,0 +1,202 @@
+"""
+Persisted coupon schedules of vanilla bonds.
+
+A bond's coupon schedule only changes with its terms, so it is generated when the security master
+is uploaded and stored in ``CouponSchedule`` as packed arrays of coupon dates and cashflows, one row
+per security. Securities saved one at a time, e.g. through the REST endpoint or the admin, get their
+schedule regenerated by the ``post_save`` receiver below, bulk writes send no signals and the upload
+regenerates the schedules it writes itself. Pricing looks up next and previous coupon dates of many (security, as of date) pairs
+at once with a binary search over the stored schedules instead of regenerating candidate coupon
+dates for every position, scenario and period.
+"""
+
+import datetime
+from typing import Iterable, List
+
+import numpy as np
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .coupon_dates import generate_coupon_schedules
+from .models import CouponSchedule, VanillaBondSecMaster
+
+# schedules start this many years before the date they are generated on,
+# as of dates before the first stored coupon fall back to closed-form coupon date arithmetic
+COUPON_SCHEDULE_LOOKBACK_YEARS = 5
+
+# terms of a security its coupon schedule is built from
+SCHEDULE_FIELDS = {"fixed_coupon", "frequency", "maturity"}
+
+PACKED_DATE_DTYPE = np.dtype("<i4")
+PACKED_CASHFLOW_DTYPE = np.dtype("<f8")
+
+
+def build_coupon_schedules(
+    securities: List[VanillaBondSecMaster],
+    start_date: datetime.date,
+    principal: float = 100.0,
+) -> List[CouponSchedule]:
+    """
+    Build unsaved coupon schedules of securities, coupon dates of all securities are
+    generated with one vectorized call
+    :param securities:
+    :param start_date: first date schedules have to cover
+    :param principal:
+    :return:
+    """
+    freqs = np.array([security.frequency for security in securities], dtype=np.int64)
+    coupon_dates, counts = generate_coupon_schedules(
+        np.array([security.maturity for security in securities], dtype="datetime64[D]"),
+        freqs,
+        start_date,
+    )
+    coupons = np.array([security.fixed_coupon for security in securities])
+    cashflows = np.repeat(coupons / freqs, counts)
+    ends = np.cumsum(counts)
+    cashflows[ends - 1] += principal
+
+    packed_dates = coupon_dates.astype(PACKED_DATE_DTYPE).tobytes()
+    packed_cashflows = cashflows.astype(PACKED_CASHFLOW_DTYPE).tobytes()
+    date_size, cashflow_size = (
+        PACKED_DATE_DTYPE.itemsize,
+        PACKED_CASHFLOW_DTYPE.itemsize,
+    )
+    return [
+        CouponSchedule(
+            security=security,
+            coupon_dates=packed_dates[start * date_size : end * date_size],
+            cashflows=packed_cashflows[start * cashflow_size : end * cashflow_size],
+        )
+        for security, start, end in zip(securities, ends - counts, ends)
+    ]
+
+
+def unpack_coupon_dates(packed: bytes) -> np.ndarray:
+    return np.frombuffer(packed, dtype=PACKED_DATE_DTYPE).astype("datetime64[D]")
+
+
+def unpack_cashflows(packed: bytes) -> np.ndarray:
+    return np.frombuffer(packed, dtype=PACKED_CASHFLOW_DTYPE)
+
+
+def create_coupon_schedules(
+    securities: Iterable[VanillaBondSecMaster],
+    start_date: datetime.date = None,
+    batch_size: int = 5000,
+    update_conflicts: bool = False,
+) -> int:
+    """
+    Generate and save coupon schedules of securities
+    :param securities: saved securities
+    :param start_date: first date schedules have to cover, defaults to COUPON_SCHEDULE_LOOKBACK_YEARS ago
+    :param batch_size:
+    :param update_conflicts: replace the existing schedules of securities, e.g. after their terms were updated
+    :return: number of created schedules
+    """
+    if start_date is None:
+        today = datetime.date.today()
+        start_date = today.replace(year=today.year - COUPON_SCHEDULE_LOOKBACK_YEARS)
+    schedules = build_coupon_schedules(list(securities), start_date)
+    if update_conflicts:
+        CouponSchedule.objects.bulk_create(
+            schedules,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["security"],
+            update_fields=["coupon_dates", "cashflows"],
+        )
+    else:
+        CouponSchedule.objects.bulk_create(schedules, batch_size=batch_size)
+    return len(schedules)
+
+
+class CouponScheduleIndex:
+    """
+    Coupon dates of many securities concatenated into one sorted array.
+    Every coupon date is encoded as (position of security) * _KEY_STRIDE + (days since epoch),
+    so next and previous coupon dates of any number of (security, as of date) pairs
+    are found with a single np.searchsorted call.
+    """
+
+    _KEY_STRIDE = 1 << 32
+
+    def __init__(self, security_ids: Iterable[int], schedules: Iterable[np.ndarray]):
+        """
+        :param security_ids: security ids
+        :param schedules: ascending coupon dates of every security
+        """
+        security_ids = np.asarray(list(security_ids), dtype=np.int64)
+        schedules = list(schedules)
+        order = np.argsort(security_ids, kind="stable")
+        self.security_ids = security_ids[order]
+        schedules = [schedules[idx] for idx in order]
+        counts = np.array([len(dates) for dates in schedules], dtype=np.int64)
+        self.ends = np.cumsum(counts)
+        self.starts = self.ends - counts
+        self.coupon_dates = (
+            np.concatenate(schedules).astype("datetime64[D]")
+            if schedules
+            else np.empty(0, dtype="datetime64[D]")
+        )
+        positions = np.repeat(np.arange(len(self.security_ids)), counts)
+        self.keys = self._encode(positions, self.coupon_dates)
+
+    @classmethod
+    def _encode(cls, positions: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        return positions * cls._KEY_STRIDE + dates.astype(np.int64)
+
+    @classmethod
+    def from_db(cls, security_ids: Iterable[int]) -> "CouponScheduleIndex":
+        """
+        Load stored schedules of given securities with one query
+        :param security_ids:
+        :return:
+        """
+        rows = CouponSchedule.objects.filter(
+            security_id__in=set(security_ids)
+        ).values_list("security_id", "coupon_dates")
+        schedule_security_ids, schedules = [], []
+        for security_id, packed_dates in rows:
+            schedule_security_ids.append(security_id)
+            schedules.append(unpack_coupon_dates(packed_dates))
+        return cls(schedule_security_ids, schedules)
+
+    def next_and_prev_coupon_dates(self, security_ids, adates):
+        """
+        Find next coupon date on or after and previous coupon date on or before the as of date.
+        Dates not covered by a stored schedule are returned as NaT
+        :param security_ids: array of security ids
+        :param adates: as of date or array of as of dates
+        :return: (next_coupon_dates, prev_coupon_dates) as datetime64[D] arrays
+        """
+        security_ids = np.asarray(security_ids, dtype=np.int64)
+        adates = np.broadcast_to(
+            np.asarray(adates, dtype="datetime64[D]"), security_ids.shape
+        )
+        next_coupon_dates = np.full(
+            security_ids.shape, np.datetime64("NaT"), dtype="datetime64[D]"
+        )
+        prev_coupon_dates = next_coupon_dates.copy()
+        if len(self.security_ids) == 0 or len(security_ids) == 0:
+            return next_coupon_dates, prev_coupon_dates
+
+        positions = np.searchsorted(self.security_ids, security_ids)
+        positions = np.minimum(positions, len(self.security_ids) - 1)
+        known = self.security_ids[positions] == security_ids
+
+        query_keys = self._encode(positions, adates)
+        next_idx = np.searchsorted(self.keys, query_keys, side="left")
+        prev_idx = np.searchsorted(self.keys, query_keys, side="right") - 1
+
+        has_next = known & (next_idx < self.ends[positions])
+        has_prev = known & (prev_idx >= self.starts[positions])
+        next_coupon_dates[has_next] = self.coupon_dates[next_idx[has_next]]
+        prev_coupon_dates[has_prev] = self.coupon_dates[prev_idx[has_prev]]
+        return next_coupon_dates, prev_coupon_dates
+
+
+@receiver(post_save, sender=VanillaBondSecMaster)
+def regenerate_coupon_schedule(instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SCHEDULE_FIELDS & set(update_fields):
+        return
+    create_coupon_schedules([instance], update_conflicts=True)
@@ -0,0 +1,83 @@
+"""
+Chunked reading of uploaded CSV files.
+
+Upload views read their file with ``read_csv_chunks`` instead of one ``pd.read_csv`` call, so only
+one chunk of rows is in memory at a time whatever the size of the file. Columns are parsed with
+explicit dtypes, date columns are converted to ``datetime.date`` and optional columns get their
+defaults once per chunk, so views work on ready to use frames and write every chunk in bulk.
+"""
+
+from typing import Dict, Iterator, Sequence
+
+import pandas as pd
+
+# rows read and written at a time
+CSV_CHUNK_ROWS = 50000
+
+
+class CSVValidationError(Exception):
+    """Raised for uploads that can't be read, the message is meant for the client"""
+
+
+def read_csv_chunks(
+    file_obj,
+    required_columns: Sequence[str],
+    dtypes: Dict[str, object] = None,
+    date_columns: Sequence[str] = (),
+    defaults: Dict[str, object] = None,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file from its start in chunks of rows
+    :param file_obj: uploaded file or any file-like object
+    :param required_columns: columns the file must have, checked on the header before any row is read
+    :param dtypes: dtypes of columns, e.g. str for identifiers and "float64" for prices
+    :param date_columns: columns converted to datetime.date
+    :param defaults: values of optional columns, used when the column is missing or empty
+    :param chunk_rows: number of rows per chunk
+    :return: iterator of DataFrames, CSVValidationError is raised for a chunk with malformed rows
+    """
+    dtypes = dtypes or {}
+    defaults = defaults or {}
+    file_obj.seek(0)
+    try:
+        columns = pd.read_csv(file_obj, nrows=0).columns
+    except pd.errors.EmptyDataError:
+        raise CSVValidationError("Uploaded file is empty")
+    missing = [col for col in required_columns if col not in columns]
+    if missing:
+        raise CSVValidationError(f"Missing required columns: {missing}")
+    file_obj.seek(0)
+
+    # optional columns are cast after their defaults are filled in
+    with pd.read_csv(
+        file_obj,
+        chunksize=chunk_rows,
+        dtype={
+            column: dtype
+            for column, dtype in dtypes.items()
+            if column not in date_columns and column not in defaults
+        },
+    ) as reader:
+        rows_read = 0
+        while True:
+            try:
+                chunk = next(reader, None)
+                if chunk is None:
+                    break
+                for column, value in defaults.items():
+                    if column not in chunk.columns:
+                        chunk[column] = value
+                    else:
+                        chunk[column] = chunk[column].fillna(value)
+                    if column in dtypes:
+                        chunk[column] = chunk[column].astype(dtypes[column])
+                for column in date_columns:
+                    chunk[column] = pd.to_datetime(chunk[column]).dt.date
+            except ValueError as e:
+                # e.g. text in a numeric or date column, or a row with too many fields
+                raise CSVValidationError(
+                    f"Malformed row within rows {rows_read + 1} to {rows_read + chunk_rows}: {e}"
+                ) from e
+            rows_read += len(chunk)
+            yield chunk
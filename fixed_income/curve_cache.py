@@ -0,0 +1,223 @@
+"""
+In-process cache of curve snapshots.
+
+Uploads and the curve endpoint need the curve points of (curve name, as of date) pairs. ``get_curves``
+and ``get_curve_snapshot`` serve them from a size bounded LRU cache of immutable ``CurveSnapshot``
+objects and load the ones not cached with one query, so once the curves of an upload are warm,
+pricing its positions queries no curve points. The cache is cleared whenever a curve point or curve
+description is saved or deleted, and by ``invalidate_curves`` after bulk writes, which send no
+signals. Curves changed in a transaction are cleared again when it commits, as other requests may
+have cached the committed curves in between. Each process has its own cache and only sees its own
+writes, cached curves expire after ``CURVE_CACHE_SECONDS`` so curves uploaded by another process
+(e.g. a ``run_jobs`` worker) are picked up. ``curve_cache_stats`` reports hits and misses.
+Cached curves keep their memo of discount factors, which is bounded by ``GRID_MEMO_MAX_POINTS``,
+so a full cache holds at most ``CURVE_CACHE_SIZE`` of those memos, about 1 MB each.
+"""
+
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .curves import Curve
+from .models import CurveDescription, CurvePoint
+
+CurveKey = Tuple[str, datetime.date]
+
+
+@dataclass(frozen=True)
+class CurveSnapshot:
+    """Curve points of one curve and as of date, and the curve built from them"""
+
+    curve_description_id: int
+    curve_name: str
+    curve_desc: str
+    adate: datetime.date
+    # (curve point id, year, rate) ordered by year
+    points: Tuple[Tuple[int, int, float], ...]
+    curve: Curve
+
+    def curve_points(self):
+        """Unsaved CurvePoint records of the snapshot, e.g. to serialize"""
+        curve_description = CurveDescription(
+            id=self.curve_description_id,
+            name=self.curve_name,
+            description=self.curve_desc,
+        )
+        return [
+            CurvePoint(
+                id=curve_point_id,
+                curve_description=curve_description,
+                adate=self.adate,
+                year=year,
+                rate=rate,
+            )
+            for curve_point_id, year, rate in self.points
+        ]
+
+
+class CurveCache:
+    """
+    LRU cache of CurveSnapshot by (curve name, adate), safe to share between threads.
+    Snapshots expire max_age seconds after they were loaded, snapshots loaded while the
+    cache was cleared are not kept, they may predate the change
+    """
+
+    def __init__(self, maxsize: int, max_age: float):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        # (curve_name, adate) to (CurveSnapshot, monotonic time it was loaded)
+        self._snapshots: "OrderedDict[Hashable, Tuple[CurveSnapshot, float]]" = (
+            OrderedDict()
+        )
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, curve_keys: Iterable[CurveKey]) -> Dict[CurveKey, CurveSnapshot]:
+        """
+        Snapshots of many curves, the ones not cached are loaded with one query
+        :param curve_keys: iterable of (curve_name, adate)
+        :return: dictionary of (curve_name, adate) to CurveSnapshot, keys without curve points are left out
+        """
+        curve_keys = set(curve_keys)
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in curve_keys:
+                snapshot, loaded_at = self._snapshots.get(key, (None, None))
+                if snapshot is not None and now - loaded_at < self.max_age:
+                    self._snapshots.move_to_end(key)
+                    found[key] = snapshot
+            missing = curve_keys - set(found)
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+        if not missing:
+            return found
+
+        loaded = _load_snapshots(missing)
+        found.update(loaded)
+        with self._lock:
+            if generation == self._generation:
+                self._snapshots.update(
+                    (key, (snapshot, now)) for key, snapshot in loaded.items()
+                )
+                while len(self._snapshots) > self.maxsize:
+                    self._snapshots.popitem(last=False)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._snapshots),
+                "maxsize": self.maxsize,
+            }
+
+
+def _load_snapshots(curve_keys) -> Dict[CurveKey, CurveSnapshot]:
+    """Load snapshots of many curve names and as of dates with one query"""
+    descriptions = {}
+    points = {}
+    for (
+        curve_description_id,
+        name,
+        description,
+        adate,
+        curve_point_id,
+        year,
+        rate,
+    ) in (
+        CurvePoint.objects.filter(
+            curve_description__name__in={name for name, _ in curve_keys},
+            adate__in={adate for _, adate in curve_keys},
+        )
+        .order_by("year")
+        .values_list(
+            "curve_description_id",
+            "curve_description__name",
+            "curve_description__description",
+            "adate",
+            "id",
+            "year",
+            "rate",
+        )
+    ):
+        if (name, adate) in curve_keys:
+            descriptions[name] = (curve_description_id, description)
+            points.setdefault((name, adate), []).append((curve_point_id, year, rate))
+
+    return {
+        (name, adate): CurveSnapshot(
+            curve_description_id=descriptions[name][0],
+            curve_name=name,
+            curve_desc=descriptions[name][1],
+            adate=adate,
+            points=tuple(curve_points),
+            curve=Curve(
+                [float(year) for _, year, _ in curve_points],
+                [rate for _, _, rate in curve_points],
+            ),
+        )
+        for (name, adate), curve_points in points.items()
+    }
+
+
+_curve_cache = CurveCache(settings.CURVE_CACHE_SIZE, settings.CURVE_CACHE_SECONDS)
+
+
+def get_curves(curve_keys: Iterable[CurveKey]) -> Dict[CurveKey, Curve]:
+    """
+    Curves of many curve names and as of dates
+    :param curve_keys: iterable of (curve_name, adate)
+    :return: dictionary of (curve_name, adate) to Curve, keys without curve points are left out
+    """
+    return {
+        key: snapshot.curve
+        for key, snapshot in _curve_cache.get_many(curve_keys).items()
+    }
+
+
+def get_curve_snapshot(
+    curve_name: str, adate: datetime.date
+) -> Optional[CurveSnapshot]:
+    """
+    Snapshot of one curve and as of date
+    :return: None when the curve has no points on adate
+    """
+    return _curve_cache.get_many([(curve_name, adate)]).get((curve_name, adate))
+
+
+def invalidate_curves():
+    """Clear cached curves now and once the current transaction commits"""
+    _curve_cache.clear()
+    transaction.on_commit(_curve_cache.clear)
+
+
+def curve_cache_stats() -> dict:
+    """Hits, misses, number of cached curves and the size bound of the curve cache"""
+    return _curve_cache.stats()
+
+
+@receiver(post_save, sender=CurvePoint)
+@receiver(post_delete, sender=CurvePoint)
+@receiver(post_save, sender=CurveDescription)
+@receiver(post_delete, sender=CurveDescription)
+def clear_curve_cache(**kwargs):
+    # a saved point may have moved from another curve or date, clear every curve
+    invalidate_curves()
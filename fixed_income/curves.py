@@ -0,0 +1,189 @@
+"""
+Interest rate curves used by the vectorized valuation.
+
+``fi_utils.bond_valuation`` keeps a curve as a dict of years to rates and sorts it again and
+builds difference lists for every cashflow it discounts. ``Curve`` is built once from curve points,
+holds sorted tenor and rate arrays and interpolates whole arrays of times with ``np.interp``.
+``ScenarioCurves`` holds the shocked curves of many stress scenarios as one
+(scenarios x tenors) rate matrix, so all scenarios are interpolated and discounted at once.
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Standard time grid in 1 / (365 * 12) year steps. Time to a cashflow of the vectorized valuation
+# is days / 365 plus period / freq, which always falls on this grid when freq divides 12
+TIME_GRID_POINTS_PER_YEAR = 365 * 12
+
+# Discount factors memoized per curve cover at most this many years of the time grid, i.e.
+# 30 * 4380 float64 values or about 1 MB per curve. A full curve cache then holds at most
+# CURVE_CACHE_SIZE MB of memos, cashflows further out are discounted without the memo
+GRID_MEMO_MAX_POINTS = 30 * TIME_GRID_POINTS_PER_YEAR
+
+
+class Curve:
+    """
+    Immutable interest rate curve with rates in percentages.
+    Rates are linearly interpolated between tenors and flat extrapolated beyond the first
+    and last tenor. Discount factors on the standard time grid are memoized up to
+    GRID_MEMO_MAX_POINTS, so repricing against the same curve only looks them up
+    """
+
+    def __init__(self, tenors: Iterable[float], rates: Iterable[float]):
+        tenors = np.asarray(list(tenors), dtype=np.float64)
+        rates = np.asarray(list(rates), dtype=np.float64)
+        if len(tenors) == 0 or len(tenors) != len(rates):
+            raise ValueError("Curve needs the same non-zero number of tenors and rates")
+        order = np.argsort(tenors)
+        self.tenors = tenors[order]
+        self.rates = rates[order]
+        self.tenors.flags.writeable = False
+        self.rates.flags.writeable = False
+        self._grid_discount_factors = np.empty(0, dtype=np.float64)
+
+    @classmethod
+    def from_dict(cls, curve: Dict[float, float]) -> "Curve":
+        """
+        Build curve from dictionary that maps years to interest rates
+        :param curve:
+        :return:
+        """
+        return cls(curve.keys(), curve.values())
+
+    @classmethod
+    def from_curve_points(cls, curve_points) -> "Curve":
+        """
+        Build curve from CurvePoint records of one curve and as of date
+        :param curve_points: iterable of CurvePoint
+        :return:
+        """
+        curve_points = list(curve_points)
+        return cls(
+            [float(cp.year) for cp in curve_points], [cp.rate for cp in curve_points]
+        )
+
+    def to_dict(self) -> Dict[float, float]:
+        return dict(zip(self.tenors.tolist(), self.rates.tolist()))
+
+    def __len__(self):
+        return len(self.tenors)
+
+    def __repr__(self):
+        return f"Curve({self.to_dict()})"
+
+    def rates_at(self, times: np.ndarray) -> np.ndarray:
+        """
+        Interpolated rates for an array of times
+        :param times: array of times in years
+        :return: array of rates in percentages of the same shape as times
+        """
+        return np.interp(times, self.tenors, self.rates)
+
+    def discount_factors(self, times: np.ndarray) -> np.ndarray:
+        """
+        Discount factors for an array of times
+        :param times: array of times in years
+        :return: array of discount factors of the same shape as times
+        """
+        times = np.asarray(times, dtype=np.float64)
+        return (1 + self.rates_at(times) / 100) ** -times
+
+    def discount_factors_on_grid(self, grid_times: np.ndarray) -> np.ndarray:
+        """
+        Memoized discount factors for an array of times on the standard time grid
+        :param grid_times: int array of times in 1 / TIME_GRID_POINTS_PER_YEAR year steps
+        :return: array of discount factors of the same shape as grid_times
+        """
+        grid_times = np.asarray(grid_times, dtype=np.int64)
+        needed = int(grid_times.max(initial=0)) + 1
+        memo_size = len(self._grid_discount_factors)
+        if needed > memo_size and memo_size < GRID_MEMO_MAX_POINTS:
+            # grow the memo geometrically so that longer bonds don't recompute it every time
+            size = min(max(needed, 2 * memo_size), GRID_MEMO_MAX_POINTS)
+            self._grid_discount_factors = self.discount_factors(
+                np.arange(size) / TIME_GRID_POINTS_PER_YEAR
+            )
+            self._grid_discount_factors.flags.writeable = False
+            memo_size = size
+        if needed <= memo_size:
+            return self._grid_discount_factors[grid_times]
+        discount_factors = self._grid_discount_factors[
+            np.minimum(grid_times, memo_size - 1)
+        ]
+        beyond = grid_times >= memo_size
+        discount_factors[beyond] = self.discount_factors(
+            grid_times[beyond] / TIME_GRID_POINTS_PER_YEAR
+        )
+        return discount_factors
+
+
+class ScenarioCurves:
+    """
+    Shocked curves of many scenarios on a shared tenor grid, rates in percentages.
+    Interpolation weights depend only on times and tenors, so they are computed once
+    and applied to every scenario row of the rate matrix
+    """
+
+    def __init__(self, tenors: Iterable[float], rates: np.ndarray):
+        """
+        :param tenors: ascending tenors in years
+        :param rates: rate matrix of shape (number of scenarios, number of tenors)
+        """
+        self.tenors = np.asarray(list(tenors), dtype=np.float64)
+        self.rates = np.atleast_2d(np.asarray(rates, dtype=np.float64))
+        if len(self.tenors) == 0 or self.rates.shape[1] != len(self.tenors):
+            raise ValueError("Scenario curves need one rate column per tenor")
+
+    @classmethod
+    def from_curves(cls, curves: List[Dict[float, float]]) -> "ScenarioCurves":
+        """
+        Build scenario curves from dictionaries that map years to rates, one per scenario.
+        Tenors missing in a scenario are filled by interpolating its own points,
+        which leaves its piecewise linear curve unchanged
+        :param curves:
+        :return:
+        """
+        tenors = np.array(sorted({year for curve in curves for year in curve}))
+        rates = np.empty((len(curves), len(tenors)), dtype=np.float64)
+        for idx, curve in enumerate(curves):
+            rates[idx] = Curve.from_dict(curve).rates_at(tenors)
+        return cls(tenors, rates)
+
+    def __len__(self):
+        return self.rates.shape[0]
+
+    def __getitem__(self, item) -> "ScenarioCurves":
+        return ScenarioCurves(self.tenors, self.rates[item])
+
+    def curve(self, idx: int) -> Curve:
+        return Curve(self.tenors, self.rates[idx])
+
+    def rates_at(self, times: np.ndarray) -> np.ndarray:
+        """
+        Interpolated rates of every scenario for an array of times
+        :param times: array of times in years
+        :return: array of shape (number of scenarios, *times.shape)
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if len(self.tenors) == 1:
+            flat_rates = self.rates.reshape((len(self),) + (1,) * times.ndim)
+            return np.broadcast_to(flat_rates, (len(self),) + times.shape).copy()
+        clipped = np.clip(times, self.tenors[0], self.tenors[-1])
+        right = np.clip(
+            np.searchsorted(self.tenors, clipped, side="right"), 1, len(self.tenors) - 1
+        )
+        left = right - 1
+        weight = (clipped - self.tenors[left]) / (
+            self.tenors[right] - self.tenors[left]
+        )
+        return self.rates[:, left] * (1 - weight) + self.rates[:, right] * weight
+
+    def discount_factors(self, times: np.ndarray) -> np.ndarray:
+        """
+        Discount factors of every scenario for an array of times
+        :param times: array of times in years
+        :return: array of shape (number of scenarios, *times.shape)
+        """
+        times = np.asarray(times, dtype=np.float64)
+        return (1 + self.rates_at(times) / 100) ** -times
@@ -0,0 +1,119 @@
+"""
+Version tokens of polled data sets and conditional GETs.
+
+Curves and stress scenarios change about once a day but dashboards poll their endpoints all the
+time. Every change bumps the ``DataVersion`` row of its data set in the same transaction, through the
+signal receivers below or ``bump_versions`` after bulk writes, which send no signals. Views decorated
+with ``conditional_on`` (through ``method_decorator`` for view methods) get an ``ETag`` and
+``Last-Modified`` from these rows with one query, and conditional GETs of unchanged data are answered
+with 304 Not Modified before any row is loaded or serialized.
+
+Rows deleted along with a row they reference, e.g. the scenarios and shocks of a deleted scenario
+description, are left to the receiver of that row, so deleting a large scenario set bumps the
+version once instead of once per row. Endpoints showing shocks depend on both data sets, as deleting
+a curve point deletes its shocks and only bumps the curves.
+"""
+
+import datetime
+from typing import Optional, Sequence, Tuple
+
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import (
+    CurveDescription,
+    CurvePoint,
+    CurvePointShock,
+    DataVersion,
+    StressScenario,
+    StressScenarioDescription,
+)
+
+
+def bump_versions(*names: str):
+    """
+    Mark data sets as changed
+    :param names: DataVersion names, e.g. DataVersion.CURVES
+    """
+    now = timezone.now()
+    for name in names:
+        if not DataVersion.objects.filter(name=name).update(
+            version=F("version") + 1, updated_at=now
+        ):
+            DataVersion.objects.get_or_create(
+                name=name, defaults={"version": 1, "updated_at": now}
+            )
+
+
+def data_versions(
+    names: Sequence[str],
+) -> Tuple[str, Optional[datetime.datetime]]:
+    """
+    Version token of data sets with one query
+    :param names: DataVersion names
+    :return: (ETag, time of the latest change), the time is None when none of the data sets changed yet
+    """
+    versions = dict(
+        (name, (version, updated_at))
+        for name, version, updated_at in DataVersion.objects.filter(
+            name__in=names
+        ).values_list("name", "version", "updated_at")
+    )
+    etag = "-".join(f"{name}.{versions.get(name, (0, None))[0]}" for name in names)
+    last_modified = max(
+        (updated_at for _, updated_at in versions.values()), default=None
+    )
+    return f'"{etag}"', last_modified
+
+
+def conditional_on(*names: str):
+    """
+    Decorator of views whose GET responses only change with the data sets names.
+    Adds ETag and Last-Modified headers and answers conditional GETs of unchanged data with 304
+    """
+
+    def versions(request):
+        # the ETag and Last-Modified callables share one query
+        if not hasattr(request, "_data_versions"):
+            request._data_versions = data_versions(names)
+        return request._data_versions
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: versions(request)[0],
+        last_modified_func=lambda request, *args, **kwargs: versions(request)[1],
+    )
+
+
+def deleted_directly(origin, model) -> bool:
+    """
+    Whether a post_delete signal is sent for a row deleted on its own, through its model
+    instance or a queryset of its model, and not along with a row it references
+    :param origin: origin of the deletion, a model instance or queryset
+    :param model: model of the deleted row
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver(post_save, sender=CurvePoint)
+@receiver(post_delete, sender=CurvePoint)
+@receiver(post_save, sender=CurveDescription)
+@receiver(post_delete, sender=CurveDescription)
+def bump_curves_version(sender, origin=None, **kwargs):
+    if origin is None or deleted_directly(origin, sender):
+        bump_versions(DataVersion.CURVES)
+
+
+@receiver(post_save, sender=StressScenario)
+@receiver(post_delete, sender=StressScenario)
+@receiver(post_save, sender=StressScenarioDescription)
+@receiver(post_delete, sender=StressScenarioDescription)
+@receiver(post_save, sender=CurvePointShock)
+@receiver(post_delete, sender=CurvePointShock)
+def bump_stress_scenarios_version(sender, origin=None, **kwargs):
+    if origin is None or deleted_directly(origin, sender):
+        bump_versions(DataVersion.STRESS_SCENARIOS)
@@ -0,0 +1,271 @@
+"""
+Database backed job queue for long-running uploads and stress runs.
+
+Views submit a ``Job`` holding the request data and return its id right away. The uploaded file
+is written to file storage (``MEDIA_ROOT``) in chunks rather than into the row, the worker reads it
+back as a stream and deletes it once the job finished. The ``run_jobs`` management command is the
+worker: it claims queued jobs one at a time with a conditional update, so several workers never run
+the same job, and runs them with the ``process`` method of the view the job was submitted to. The
+response the view would have returned becomes the result of the job. Long runs report progress
+through a ``JobProgress`` callback, between scenario batches or CSV chunks, which stops a run when
+its job is cancelled. A ``JobHeartbeat`` thread keeps the heartbeat of the job current while it runs,
+also through steps that report no progress for a long time (pricing a large period, bulk writes of
+its rows). A job whose heartbeat is older than
+``JOB_STALE_SECONDS`` lost its worker (the process was killed or the machine went away) and is
+queued again by ``reclaim_stale_jobs``, up to ``JOB_MAX_ATTEMPTS`` claims. Only the database and
+the file storage are shared between the API and the worker, no broker is needed.
+"""
+
+import datetime
+import logging
+import os
+import threading
+import time
+import traceback
+from typing import Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+# progress is written to the database at most this often
+PROGRESS_FLUSH_SECONDS = 1.0
+
+
+class JobCancelled(BaseException):
+    """
+    Raised by the progress callback of a job that was cancelled. Derives from BaseException,
+    so the ``except Exception`` handlers of the views don't turn a cancellation into an error
+    """
+
+
+class JobProgress:
+    """
+    Progress callback of a running job. Keeps the latest scenarios done / total and rows written,
+    writes them to the job with a new heartbeat at most every flush_interval seconds and raises
+    JobCancelled when cancellation of the job was requested
+    """
+
+    def __init__(self, job_id: int, flush_interval: float = PROGRESS_FLUSH_SECONDS):
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.done = 0
+        self.total = None
+        self.rows_written = 0
+        self._last_flush = time.monotonic()
+
+    def __call__(self, done=None, total=None, rows_written=None):
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if rows_written is not None:
+            self.rows_written = rows_written
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        Job.objects.filter(pk=self.job_id).update(
+            progress_done=self.done,
+            progress_total=self.total,
+            rows_written=self.rows_written,
+            heartbeat_at=timezone.now(),
+        )
+        self._last_flush = time.monotonic()
+        if Job.objects.filter(pk=self.job_id, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+class JobHeartbeat:
+    """
+    Daemon thread writing a new heartbeat of a running job every interval seconds until the
+    run stopped, used as a context manager around the run. Heartbeats of a job that was
+    reclaimed in between are not written, a failed write is retried at the next beat
+    """
+
+    def __init__(self, job_id: int, interval: float = None):
+        self.job_id = job_id
+        self.interval = settings.JOB_HEARTBEAT_SECONDS if interval is None else interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"job-{job_id}-heartbeat", daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job_id, status=Job.RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except DatabaseError as e:
+                    # e.g. the database is locked by a long write of the run
+                    logging.warning(f"Heartbeat of job {self.job_id} failed: {e}")
+        finally:
+            # the thread has its own connection
+            connection.close()
+
+
+def submit_job(job_type: str, parameters: dict = None, file_obj=None) -> Job:
+    """
+    Queue a job
+    :param job_type: one of Job.JOB_TYPES
+    :param parameters: request data of the run
+    :param file_obj: uploaded file of upload jobs, copied to file storage in chunks
+    :return:
+    """
+    job = Job(
+        job_type=job_type,
+        parameters=parameters or {},
+        input_filename=getattr(file_obj, "name", "") or "",
+    )
+    if file_obj is not None:
+        file_obj.seek(0)
+        job.input_file.save(
+            job.input_filename or f"{job_type}.csv", File(file_obj), save=False
+        )
+    job.save()
+    return job
+
+
+def claim_next_job() -> Optional[Job]:
+    """
+    Claim the oldest queued job for this process
+    :return: claimed job, None when no job is queued
+    """
+    queued = Job.objects.filter(status=Job.QUEUED).order_by("created_at", "id")
+    for job_id in queued.values_list("id", flat=True)[:10]:
+        # another worker may claim the same job in between, only one update succeeds
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            worker_pid=os.getpid(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job: Job, view_class) -> Job:
+    """
+    Run a claimed job with the process method of the view it was submitted to
+    and record its final status, progress and result
+    :param job: claimed job
+    :param view_class: view class with a process(data, file_obj, progress) method
+    :return: finished job
+    """
+    progress = JobProgress(job.id)
+    outcome = {}
+    try:
+        with JobHeartbeat(job.id):
+            if job.input_file:
+                with job.input_file.open("rb") as file_obj:
+                    response = view_class().process(
+                        job.parameters, file_obj, progress=progress
+                    )
+            else:
+                response = view_class().process(job.parameters, None, progress=progress)
+    except JobCancelled:
+        outcome = {"status": Job.CANCELLED}
+    except Exception:
+        outcome = {"status": Job.FAILED, "error": traceback.format_exc()}
+    else:
+        failed = response.status_code >= 400
+        outcome = {
+            "status": Job.FAILED if failed else Job.SUCCEEDED,
+            "result": response.data,
+            "error": str(response.data.get("error", "")) if failed else "",
+        }
+    Job.objects.filter(pk=job.pk).update(
+        progress_done=progress.done,
+        progress_total=progress.total,
+        rows_written=progress.rows_written,
+        finished_at=timezone.now(),
+        **outcome,
+    )
+    _delete_input_file(job)
+    job.refresh_from_db()
+    return job
+
+
+def reclaim_stale_jobs(stale_seconds: float = None, max_attempts: int = None) -> int:
+    """
+    Queue RUNNING jobs whose heartbeat is older than stale_seconds again, their worker died
+    without recording an outcome. Jobs already claimed max_attempts times, which may be what
+    kills their worker, fail instead, and jobs asked to cancel are cancelled
+    :param stale_seconds: defaults to settings.JOB_STALE_SECONDS
+    :param max_attempts: defaults to settings.JOB_MAX_ATTEMPTS
+    :return: number of jobs reclaimed
+    """
+    if stale_seconds is None:
+        stale_seconds = settings.JOB_STALE_SECONDS
+    if max_attempts is None:
+        max_attempts = settings.JOB_MAX_ATTEMPTS
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        heartbeat_at__lt=now - datetime.timedelta(seconds=stale_seconds),
+    )
+    reclaimed = 0
+    for job in stale:
+        if job.cancel_requested:
+            outcome = {"status": Job.CANCELLED, "finished_at": now}
+        elif job.attempts >= max_attempts:
+            outcome = {
+                "status": Job.FAILED,
+                "finished_at": now,
+                "error": f"Worker stopped responding, gave up after {job.attempts} attempts.",
+            }
+        else:
+            outcome = {
+                "status": Job.QUEUED,
+                "started_at": None,
+                "heartbeat_at": None,
+                "worker_pid": None,
+            }
+        # a worker that reported progress in between moved the heartbeat and keeps its job
+        if Job.objects.filter(
+            pk=job.pk, status=Job.RUNNING, heartbeat_at=job.heartbeat_at
+        ).update(**outcome):
+            reclaimed += 1
+            if outcome["status"] != Job.QUEUED:
+                _delete_input_file(job)
+    return reclaimed
+
+
+def _delete_input_file(job: Job):
+    """Delete the uploaded file of a finished job from file storage"""
+    if job.input_file:
+        job.input_file.delete(save=False)
+        Job.objects.filter(pk=job.pk).update(input_file="")
+
+
+def cancel_job(job: Job) -> bool:
+    """
+    Cancel a queued job right away, or ask the worker to stop a running one at its next progress update
+    :param job:
+    :return: False when the job had already finished
+    """
+    if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+        status=Job.CANCELLED, cancel_requested=True, finished_at=timezone.now()
+    ):
+        _delete_input_file(job)
+        return True
+    return bool(
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(cancel_requested=True)
+    )
@@ -0,0 +1,144 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from fixed_income.models import (
+    CurvePoint,
+    CurvePointShock,
+    Job,
+    Position,
+    RiskCore,
+    ScenarioPortfolioSummary,
+    ScenarioPosition,
+    SecurityIdentifier,
+    StressScenario,
+    VanillaBondSecMaster,
+)
+
+# plan fragments of full table scans, SQLite and PostgreSQL
+FULL_SCAN_MARKERS = ("SCAN fixed_income_", "Seq Scan on fixed_income_")
+
+
+def hot_queries(portfolio_name, position_date, scenario_name):
+    """
+    Querysets of the lookups the upload, generation, report and list endpoints run,
+    endpoints filter by the portfolio id resolved from its name except the list filters
+    """
+    return [
+        (
+            "uploads: securities by identifier_client",
+            VanillaBondSecMaster.objects.filter(identifier_client__in=["X", "Y"]),
+        ),
+        (
+            "uploads: security by identifier type and value",
+            SecurityIdentifier.objects.filter(
+                identifier_type="ISIN", identifier_value="X"
+            ),
+        ),
+        (
+            "uploads: curve points of curves and dates",
+            CurvePoint.objects.filter(
+                curve_description__name__in=["USD_SWAP"], adate__in=[position_date]
+            ),
+        ),
+        (
+            "upload-calc-risk-cores: RiskCores of a security, date and curve",
+            RiskCore.objects.filter(
+                security_id=1, risk_date=position_date, curve_description_id=1
+            ),
+        ),
+        (
+            "upload-stress-scenarios: existing shocks",
+            CurvePointShock.objects.filter(
+                stress_scenario__in=[1, 2], curve_point__in=[1, 2]
+            ),
+        ),
+        (
+            "generate-scenario-positions: packed shock vectors",
+            StressScenario.objects.filter(scenario_id=1),
+        ),
+        (
+            "upload-positions, generate-scenario-positions, portfolio-risk: positions",
+            Position.objects.filter(portfolio_id=1, position_date=position_date),
+        ),
+        (
+            "portfolio-stress-trend: market value per scenario",
+            StressScenario.objects.filter(scenario__name=scenario_name).annotate(
+                market_value=Coalesce(
+                    Sum(
+                        "portfolio_summaries__discounted_value",
+                        filter=Q(
+                            portfolio_summaries__portfolio_id=1,
+                            portfolio_summaries__position_date=position_date,
+                        ),
+                    ),
+                    0.0,
+                )
+            ),
+        ),
+        (
+            "portfolio-risk: scenario summaries",
+            ScenarioPortfolioSummary.objects.filter(
+                scenario__scenario__name=scenario_name,
+                portfolio_id=1,
+                position_date=position_date,
+            ),
+        ),
+        (
+            "scenario-positions list: filtered page",
+            ScenarioPosition.objects.filter(
+                portfolio__name=portfolio_name,
+                position_date=position_date,
+                scenario__scenario__name=scenario_name,
+            ).order_by("id")[:1000],
+        ),
+        (
+            "run_jobs: oldest queued job",
+            Job.objects.filter(status=Job.QUEUED).order_by("created_at", "id")[:10],
+        ),
+        (
+            "run_jobs: stale running jobs",
+            Job.objects.filter(
+                status=Job.RUNNING,
+                heartbeat_at__lt=datetime.datetime(
+                    2000, 1, 1, tzinfo=datetime.timezone.utc
+                ),
+            ),
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the hot endpoint queries and flag full table scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--portfolio", default="USIG")
+        parser.add_argument("--position-date", default="2025-04-30")
+        parser.add_argument("--scenario", default="USD_SWAP_SHIFT_02")
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error when a query scans a whole table",
+        )
+
+    def handle(self, *args, **options):
+        position_date = datetime.date.fromisoformat(options["position_date"])
+        full_scans = []
+        for name, queryset in hot_queries(
+            options["portfolio"], position_date, options["scenario"]
+        ):
+            plan = queryset.explain()
+            full_scan = any(
+                marker in line and "USING" not in line
+                for line in plan.splitlines()
+                for marker in FULL_SCAN_MARKERS
+            )
+            if full_scan:
+                full_scans.append(name)
+            self.stdout.write(f"{'FULL SCAN' if full_scan else 'ok'}: {name}")
+            self.stdout.write(f"  {plan}".replace("\n", "\n  "))
+
+        if full_scans and options["fail_on_scan"]:
+            raise CommandError(f"Full table scans in: {', '.join(full_scans)}")
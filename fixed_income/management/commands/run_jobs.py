@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from fixed_income.jobs import claim_next_job, reclaim_stale_jobs, run_job
+from fixed_income.views import JOB_VIEWS
+
+
+class Command(BaseCommand):
+    help = "Run queued upload and stress run jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are queued and exit instead of waiting for new ones",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before looking for new jobs again (default 2)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            reclaimed = reclaim_stale_jobs()
+            if reclaimed:
+                self.stdout.write(f"Reclaimed {reclaimed} jobs of unresponsive workers")
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running job {job.id} ({job.job_type})")
+            job = run_job(job, JOB_VIEWS[job.job_type])
+            self.stdout.write(f"Job {job.id} finished with status {job.status}")
@@ -0,0 +1,449 @@
+# Generated by Django 6.1.2 on 2026-10-18 00:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="CurveDescription",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("description", models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StressScenario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period_number", models.IntegerField()),
+                ("simulation_number", models.IntegerField()),
+                ("period_length", models.FloatField(help_text="Length in years")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StressScenarioDescription",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, unique=True)),
+                ("description", models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="VanillaBondSecMaster",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("identifier_client", models.CharField(max_length=100)),
+                ("asset_name", models.CharField(max_length=100)),
+                ("fixed_coupon", models.FloatField()),
+                (
+                    "frequency",
+                    models.IntegerField(
+                        default=2,
+                        help_text="Number of coupon payments per year (default is 2)",
+                    ),
+                ),
+                ("maturity", models.DateField()),
+                ("currency", models.CharField(default="USD", max_length=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CurvePoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "adate",
+                    models.DateField(help_text="As-of date for this curve snapshot"),
+                ),
+                ("year", models.IntegerField(help_text="Tenor in years (1–30)")),
+                ("rate", models.FloatField(help_text="Swap rate in percent")),
+                (
+                    "curve_description",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="points",
+                        to="fixed_income.curvedescription",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["curve_description__name", "adate", "year"],
+                "unique_together": {("curve_description", "adate", "year")},
+            },
+        ),
+        migrations.CreateModel(
+            name="RiskCore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "risk_date",
+                    models.DateField(help_text="As-of date for risk metrics"),
+                ),
+                ("price", models.FloatField()),
+                ("yield_to_maturity", models.FloatField()),
+                ("oas", models.FloatField(help_text="Option-Adjusted Spread")),
+                ("discounted_pv", models.FloatField()),
+                (
+                    "accrued_interest",
+                    models.FloatField(help_text="Accrued interest as of risk_date"),
+                ),
+                (
+                    "curve_description",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="risk_core_entries",
+                        to="fixed_income.curvedescription",
+                    ),
+                ),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="risk_core_data",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RiskScenario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("price", models.FloatField()),
+                ("yield_to_maturity", models.FloatField()),
+                ("oas", models.FloatField(help_text="Option-Adjusted Spread")),
+                ("discounted_pv", models.FloatField()),
+                (
+                    "accrued_interest",
+                    models.FloatField(help_text="Accrued interest as of risk_date"),
+                ),
+                (
+                    "scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="risk_analytics",
+                        to="fixed_income.stressscenario",
+                    ),
+                ),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scenario_risk_data",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="stressscenario",
+            name="scenario",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="scenarios",
+                to="fixed_income.stressscenariodescription",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Transaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("portfolio_name", models.CharField(max_length=100)),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("BUY", "Buy"),
+                            ("SELL", "Sell"),
+                            ("CASH_IN", "Cash In"),
+                            ("CASH_OUT", "Cash Out"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("transaction_date", models.DateField()),
+                ("transaction_price", models.FloatField()),
+                ("quantity", models.FloatField()),
+                ("amount", models.FloatField()),
+                ("lot_id", models.IntegerField()),
+                (
+                    "scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="fixed_income.stressscenario",
+                    ),
+                ),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="transactions",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SecurityIdentifier",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("identifier_type", models.CharField(max_length=50)),
+                ("identifier_value", models.CharField(max_length=100)),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="security_identifier_data",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ScenarioPosition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("portfolio_name", models.CharField(max_length=100)),
+                ("position_date", models.DateField()),
+                ("period_end_date", models.DateField()),
+                ("lot_id", models.IntegerField()),
+                ("quantity", models.FloatField()),
+                ("notional_amount", models.FloatField()),
+                ("par_value", models.FloatField()),
+                ("book_price", models.FloatField()),
+                ("book_value", models.FloatField()),
+                ("discounted_value", models.FloatField(blank=True, null=True)),
+                (
+                    "risk_scenario",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Linked RiskScenario based on scenario and security.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="fixed_income.riskscenario",
+                    ),
+                ),
+                (
+                    "scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="fixed_income.stressscenario",
+                    ),
+                ),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scenario_positions",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Position",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("portfolio_name", models.CharField(max_length=100)),
+                ("position_date", models.DateField()),
+                ("lot_id", models.IntegerField()),
+                ("quantity", models.FloatField()),
+                ("notional_amount", models.FloatField()),
+                ("par_value", models.FloatField()),
+                ("book_price", models.FloatField()),
+                ("book_value", models.FloatField()),
+                ("discounted_value", models.FloatField(blank=True, null=True)),
+                (
+                    "risk_core",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Linked RiskCore based on position_date and security",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="positions",
+                        to="fixed_income.riskcore",
+                    ),
+                ),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="positions",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AborPnL",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("portfolio_name", models.CharField(max_length=100)),
+                ("period_date", models.DateField()),
+                ("begin_period_date", models.DateField()),
+                ("end_period_date", models.DateField()),
+                ("income_pnl", models.FloatField()),
+                ("amortization_accretion_pnl", models.FloatField()),
+                ("realized_gain_loss_pnl", models.FloatField()),
+                (
+                    "scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="fixed_income.stressscenario",
+                    ),
+                ),
+                (
+                    "security",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="abor_pnls",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CurvePointShock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "shock_size",
+                    models.FloatField(help_text="Shock size in percentages"),
+                ),
+                (
+                    "curve_point",
+                    models.ForeignKey(
+                        help_text="Reference to curve point (curve_name, adate, year, rate)",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="fixed_income.curvepoint",
+                    ),
+                ),
+                (
+                    "stress_scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="curve_point_shocks",
+                        to="fixed_income.stressscenario",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("stress_scenario", "curve_point")},
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name="stressscenario",
+            unique_together={("scenario", "period_number", "simulation_number")},
+        ),
+    ]
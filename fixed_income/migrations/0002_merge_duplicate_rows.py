@@ -0,0 +1,75 @@
+# Generated by Django 6.1.2 on 2026-10-18 00:10
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+# models and fields referencing a security
+SECURITY_REFERENCES = [
+    "SecurityIdentifier",
+    "RiskCore",
+    "RiskScenario",
+    "Position",
+    "ScenarioPosition",
+    "Transaction",
+    "AborPnL",
+]
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    """
+    Merge rows that repeat the natural keys made unique by the next migration, the
+    latest row wins as it would with on_conflict=update. Securities repeating an
+    identifier_client are merged into the latest one, with every reference moved over,
+    positions repeating (portfolio_name, position_date, security, lot_id) are dropped
+    but the latest
+    """
+    VanillaBondSecMaster = apps.get_model("fixed_income", "VanillaBondSecMaster")
+    for identifier_client, latest_id in (
+        VanillaBondSecMaster.objects.values("identifier_client")
+        .annotate(securities=Count("id"), latest_id=Max("id"))
+        .filter(securities__gt=1)
+        .values_list("identifier_client", "latest_id")
+    ):
+        duplicate_ids = list(
+            VanillaBondSecMaster.objects.filter(identifier_client=identifier_client)
+            .exclude(id=latest_id)
+            .values_list("id", flat=True)
+        )
+        for model_name in SECURITY_REFERENCES:
+            apps.get_model("fixed_income", model_name).objects.filter(
+                security_id__in=duplicate_ids
+            ).update(security_id=latest_id)
+        VanillaBondSecMaster.objects.filter(id__in=duplicate_ids).delete()
+
+    # identifiers of merged securities may now repeat
+    _delete_all_but_latest(
+        apps.get_model("fixed_income", "SecurityIdentifier"),
+        ["security", "identifier_type", "identifier_value"],
+    )
+    _delete_all_but_latest(
+        apps.get_model("fixed_income", "Position"),
+        ["portfolio_name", "position_date", "security", "lot_id"],
+    )
+
+
+def _delete_all_but_latest(model, key_fields):
+    """Delete rows repeating the key_fields of a later row"""
+    for duplicate in (
+        model.objects.values(*key_fields)
+        .annotate(rows=Count("id"), latest_id=Max("id"))
+        .filter(rows__gt=1)
+    ):
+        model.objects.filter(
+            **{field: duplicate[field] for field in key_fields}
+        ).exclude(id=duplicate["latest_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+    ]
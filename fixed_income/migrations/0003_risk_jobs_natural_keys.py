@@ -0,0 +1,323 @@
+# Generated by Django 6.1.2 on 2026-10-18 00:03
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0002_merge_duplicate_rows"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "job_type",
+                    models.CharField(
+                        choices=[
+                            (
+                                "generate_scenario_positions",
+                                "Generate scenario positions",
+                            ),
+                            ("upload_vanilla_bonds", "Upload vanilla bonds"),
+                            ("upload_risk_cores", "Upload risk cores"),
+                            ("upload_positions", "Upload positions"),
+                            ("upload_curve", "Upload curve"),
+                            ("upload_stress_scenarios", "Upload stress scenarios"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUEUED", "Queued"),
+                            ("RUNNING", "Running"),
+                            ("SUCCEEDED", "Succeeded"),
+                            ("FAILED", "Failed"),
+                            ("CANCELLED", "Cancelled"),
+                        ],
+                        default="QUEUED",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "parameters",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Request data of the submitted run",
+                    ),
+                ),
+                (
+                    "input_file",
+                    models.BinaryField(
+                        blank=True,
+                        help_text="Uploaded CSV file of upload jobs",
+                        null=True,
+                    ),
+                ),
+                ("input_filename", models.CharField(blank=True, max_length=255)),
+                (
+                    "progress_done",
+                    models.IntegerField(default=0, help_text="Scenarios done"),
+                ),
+                (
+                    "progress_total",
+                    models.IntegerField(
+                        blank=True, help_text="Scenarios in the run", null=True
+                    ),
+                ),
+                ("rows_written", models.IntegerField(default=0)),
+                ("cancel_requested", models.BooleanField(default=False)),
+                (
+                    "result",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="Final summary, the response of the synchronous run",
+                        null=True,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("worker_pid", models.IntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="riskcore",
+            name="convexity",
+            field=models.FloatField(
+                blank=True,
+                help_text="Effective convexity to parallel curve shifts",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskcore",
+            name="dv01",
+            field=models.FloatField(
+                blank=True,
+                help_text="Price change per 100 par for a 1bp fall in rates",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskcore",
+            name="key_rate_durations",
+            field=models.JSONField(
+                blank=True,
+                help_text="Key rate durations by curve tenor in years",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskcore",
+            name="modified_duration",
+            field=models.FloatField(
+                blank=True,
+                help_text="Effective duration to parallel curve shifts",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskscenario",
+            name="convexity",
+            field=models.FloatField(
+                blank=True,
+                help_text="Effective convexity to parallel curve shifts",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskscenario",
+            name="dv01",
+            field=models.FloatField(
+                blank=True,
+                help_text="Price change per 100 par for a 1bp fall in rates",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskscenario",
+            name="key_rate_durations",
+            field=models.JSONField(
+                blank=True,
+                help_text="Key rate durations by curve tenor in years",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="riskscenario",
+            name="modified_duration",
+            field=models.FloatField(
+                blank=True,
+                help_text="Effective duration to parallel curve shifts",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="riskcore",
+            name="oas",
+            field=models.FloatField(
+                blank=True,
+                help_text="Z-spread over the curve in percentages, empty when the spread solver didn't converge",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="riskcore",
+            name="yield_to_maturity",
+            field=models.FloatField(
+                blank=True,
+                help_text="Empty when the yield solver didn't converge",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="riskscenario",
+            name="yield_to_maturity",
+            field=models.FloatField(
+                blank=True,
+                help_text="Empty when the yield solver didn't converge",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="vanillabondsecmaster",
+            name="identifier_client",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name="position",
+            unique_together={("portfolio_name", "position_date", "security", "lot_id")},
+        ),
+        migrations.CreateModel(
+            name="CouponSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "coupon_dates",
+                    models.BinaryField(
+                        help_text="Coupon dates in ascending order, packed int32 days since 1970-01-01"
+                    ),
+                ),
+                (
+                    "cashflows",
+                    models.BinaryField(
+                        help_text="Cashflow per 100 par on each coupon date, packed float64. Principal is included on maturity"
+                    ),
+                ),
+                (
+                    "security",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coupon_schedule",
+                        to="fixed_income.vanillabondsecmaster",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ScenarioPortfolioSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("portfolio_name", models.CharField(max_length=100)),
+                ("position_date", models.DateField()),
+                ("period_end_date", models.DateField()),
+                (
+                    "discounted_value",
+                    models.FloatField(
+                        help_text="Sum of discounted values of the scenario positions"
+                    ),
+                ),
+                ("book_value", models.FloatField()),
+                ("par_value", models.FloatField()),
+                (
+                    "accrued_interest",
+                    models.FloatField(
+                        help_text="Accrued interest of the positions as of period_end_date"
+                    ),
+                ),
+                (
+                    "positions",
+                    models.IntegerField(help_text="Number of scenario positions"),
+                ),
+                (
+                    "dv01",
+                    models.FloatField(help_text="Value change for a 1bp fall in rates"),
+                ),
+                (
+                    "modified_duration",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Value weighted effective duration",
+                        null=True,
+                    ),
+                ),
+                (
+                    "convexity",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Value weighted effective convexity",
+                        null=True,
+                    ),
+                ),
+                (
+                    "key_rate_durations",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Value weighted key rate durations by tenor",
+                        null=True,
+                    ),
+                ),
+                ("positions_without_risk", models.IntegerField(default=0)),
+                (
+                    "scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="portfolio_summaries",
+                        to="fixed_income.stressscenario",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("portfolio_name", "position_date", "scenario")},
+            },
+        ),
+    ]
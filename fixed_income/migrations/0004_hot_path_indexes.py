@@ -0,0 +1,37 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0003_risk_jobs_natural_keys"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="securityidentifier",
+            unique_together={("identifier_type", "identifier_value")},
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "created_at"], name="job_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="riskcore",
+            index=models.Index(
+                fields=["security", "risk_date", "curve_description"],
+                name="riskcore_sec_date_curve_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scenarioposition",
+            index=models.Index(
+                fields=["portfolio_name", "position_date", "scenario"],
+                name="scenpos_portfolio_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PORTFOLIO_MODELS = [
+    "Position",
+    "ScenarioPosition",
+    "ScenarioPortfolioSummary",
+    "Transaction",
+    "AborPnL",
+]
+
+
+def backfill_portfolios(apps, schema_editor):
+    """Create a portfolio per distinct portfolio name and point every row at it"""
+    Portfolio = apps.get_model("fixed_income", "Portfolio")
+    names = set()
+    for model_name in PORTFOLIO_MODELS:
+        model = apps.get_model("fixed_income", model_name)
+        names.update(model.objects.values_list("portfolio_name", flat=True).distinct())
+    Portfolio.objects.bulk_create([Portfolio(name=name) for name in sorted(names)])
+    for portfolio_id, name in Portfolio.objects.values_list("id", "name"):
+        for model_name in PORTFOLIO_MODELS:
+            model = apps.get_model("fixed_income", model_name)
+            model.objects.filter(portfolio_name=name).update(portfolio_id=portfolio_id)
+
+
+def restore_portfolio_names(apps, schema_editor):
+    for model_name in PORTFOLIO_MODELS:
+        model = apps.get_model("fixed_income", model_name)
+        for portfolio_id, name in apps.get_model(
+            "fixed_income", "Portfolio"
+        ).objects.values_list("id", "name"):
+            model.objects.filter(portfolio_id=portfolio_id).update(portfolio_name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0004_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Portfolio",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="aborpnl",
+            name="portfolio",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="abor_pnls",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AddField(
+            model_name="position",
+            name="portfolio",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="positions",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scenarioportfoliosummary",
+            name="portfolio",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="scenario_summaries",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scenarioposition",
+            name="portfolio",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="scenario_positions",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="portfolio",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.RunPython(backfill_portfolios, restore_portfolio_names),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0005_portfolio"),
+    ]
+
+    operations = [
+        # a default lets the removed columns be added back when migrating backwards,
+        # 0003 then fills them in from the portfolios
+        migrations.AlterField(
+            model_name="aborpnl",
+            name="portfolio_name",
+            field=models.CharField(default="", max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="position",
+            name="portfolio_name",
+            field=models.CharField(default="", max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="scenarioportfoliosummary",
+            name="portfolio_name",
+            field=models.CharField(default="", max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="scenarioposition",
+            name="portfolio_name",
+            field=models.CharField(default="", max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="portfolio_name",
+            field=models.CharField(default="", max_length=100),
+        ),
+        migrations.RemoveIndex(
+            model_name="scenarioposition",
+            name="scenpos_portfolio_date_idx",
+        ),
+        migrations.RemoveField(
+            model_name="aborpnl",
+            name="portfolio_name",
+        ),
+        migrations.AlterUniqueTogether(
+            name="position",
+            unique_together={("portfolio", "position_date", "security", "lot_id")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="scenarioportfoliosummary",
+            unique_together={("portfolio", "position_date", "scenario")},
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="portfolio_name",
+        ),
+        migrations.AlterField(
+            model_name="aborpnl",
+            name="portfolio",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="abor_pnls",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="position",
+            name="portfolio",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="positions",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="scenarioportfoliosummary",
+            name="portfolio",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="scenario_summaries",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="scenarioposition",
+            name="portfolio",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="scenario_positions",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="portfolio",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to="fixed_income.portfolio",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scenarioposition",
+            index=models.Index(
+                fields=["portfolio", "position_date", "scenario"],
+                name="scenpos_portfolio_id_date_idx",
+            ),
+        ),
+        migrations.RemoveField(
+            model_name="scenarioposition",
+            name="portfolio_name",
+        ),
+        migrations.RemoveField(
+            model_name="position",
+            name="portfolio_name",
+        ),
+        migrations.RemoveField(
+            model_name="scenarioportfoliosummary",
+            name="portfolio_name",
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0006_remove_portfolio_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        choices=[
+                            ("curves", "Curve descriptions and curve points"),
+                            (
+                                "stress_scenarios",
+                                "Stress scenarios and their curve point shocks",
+                            ),
+                        ],
+                        max_length=50,
+                        unique=True,
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-17 23:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0007_data_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="curvedescription",
+            name="shock_tenors",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Years of the elements of packed shock vectors, only appended to",
+            ),
+        ),
+        migrations.AddField(
+            model_name="stressscenario",
+            name="shock_adate",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="stressscenario",
+            name="shock_curve",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="fixed_income.curvedescription",
+            ),
+        ),
+        migrations.AddField(
+            model_name="stressscenario",
+            name="shock_vector",
+            field=models.BinaryField(
+                blank=True,
+                help_text="float64 shocks on the shock_tenors of shock_curve, NaN for tenors without a shock. Empty without shocks, null when not packed",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:12
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def move_input_files_to_storage(apps, schema_editor):
+    """
+    Write the uploaded files of jobs that haven't finished to file storage, the files of
+    finished jobs are not kept
+    """
+    Job = apps.get_model("fixed_income", "Job")
+    for job in Job.objects.filter(
+        status__in=["QUEUED", "RUNNING"], input_data__isnull=False
+    ).iterator():
+        job.input_file.save(
+            job.input_filename or f"job_{job.id}.csv",
+            ContentFile(bytes(job.input_data)),
+            save=False,
+        )
+        Job.objects.filter(pk=job.pk).update(input_file=job.input_file.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0008_shock_vectors"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="job",
+            old_name="input_file",
+            new_name="input_data",
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="input_file",
+            field=models.FileField(
+                blank=True,
+                help_text="Uploaded CSV file of upload jobs, deleted when the job finishes",
+                upload_to="jobs/",
+            ),
+        ),
+        migrations.RunPython(move_input_files_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="job",
+            name="input_data",
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="attempts",
+            field=models.IntegerField(
+                default=0, help_text="Times a worker claimed the job"
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Last progress update of the worker running the job",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.1.2 on 2026-10-18 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fixed_income", "0009_job_input_files_heartbeat"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="riskscenario",
+            name="oas",
+            field=models.FloatField(
+                blank=True,
+                help_text="Z-spread over the shocked scenario curve in percentages, empty when the spread solver didn't converge",
+                null=True,
+            ),
+        ),
+    ]
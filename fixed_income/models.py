@@ -1,8 +1,9 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
 class VanillaBondSecMaster(models.Model):
-    identifier_client = models.CharField(max_length=100)
+    identifier_client = models.CharField(max_length=100, unique=True)
     asset_name = models.CharField(max_length=100)
     fixed_coupon = models.FloatField()
     frequency = models.IntegerField(
@@ -15,6 +16,23 @@ class VanillaBondSecMaster(models.Model):
         return f"{self.asset_name} ({self.identifier_client})"
 
 
+class CouponSchedule(models.Model):
+    security = models.OneToOneField(
+        VanillaBondSecMaster,
+        on_delete=models.CASCADE,
+        related_name="coupon_schedule",
+    )
+    coupon_dates = models.BinaryField(
+        help_text="Coupon dates in ascending order, packed int32 days since 1970-01-01"
+    )
+    cashflows = models.BinaryField(
+        help_text="Cashflow per 100 par on each coupon date, packed float64. Principal is included on maturity"
+    )
+
+    def __str__(self):
+        return f"Coupon schedule of {self.security.identifier_client}"
+
+
 class SecurityIdentifier(models.Model):
     security = models.ForeignKey(
         VanillaBondSecMaster,
@@ -24,10 +42,18 @@ class SecurityIdentifier(models.Model):
     identifier_type = models.CharField(max_length=50)
     identifier_value = models.CharField(max_length=100)
 
+    class Meta:
+        unique_together = ("identifier_type", "identifier_value")
+
 
 class CurveDescription(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    shock_tenors = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Years of the elements of packed shock vectors, only appended to",
+    )
 
     def __str__(self):
         return self.name
@@ -64,6 +90,21 @@ class StressScenario(models.Model):
     period_number = models.IntegerField()
     simulation_number = models.IntegerField()
     period_length = models.FloatField(help_text="Length in years")
+    # shocks packed for pricing, see shock_vectors
+    shock_curve = models.ForeignKey(
+        CurveDescription,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    shock_adate = models.DateField(null=True, blank=True)
+    shock_vector = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text="float64 shocks on the shock_tenors of shock_curve, NaN for tenors "
+        "without a shock. Empty without shocks, null when not packed",
+    )
 
     class Meta:
         unique_together = ("scenario", "period_number", "simulation_number")
@@ -101,10 +142,39 @@ class RiskCore(models.Model):
     )
     risk_date = models.DateField(help_text="As-of date for risk metrics")
     price = models.FloatField()
-    yield_to_maturity = models.FloatField()
-    oas = models.FloatField(help_text="Option-Adjusted Spread")
+    yield_to_maturity = models.FloatField(
+        null=True, blank=True, help_text="Empty when the yield solver didn't converge"
+    )
+    oas = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Z-spread over the curve in percentages, empty when the spread solver didn't converge",
+    )
     discounted_pv = models.FloatField()
     accrued_interest = models.FloatField(help_text="Accrued interest as of risk_date")
+    dv01 = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Price change per 100 par for a 1bp fall in rates",
+    )
+    modified_duration = models.FloatField(
+        null=True, blank=True, help_text="Effective duration to parallel curve shifts"
+    )
+    convexity = models.FloatField(
+        null=True, blank=True, help_text="Effective convexity to parallel curve shifts"
+    )
+    key_rate_durations = models.JSONField(
+        null=True, blank=True, help_text="Key rate durations by curve tenor in years"
+    )
+
+    class Meta:
+        # a security can have several RiskCores per date and curve, one per price
+        indexes = [
+            models.Index(
+                fields=["security", "risk_date", "curve_description"],
+                name="riskcore_sec_date_curve_idx",
+            )
+        ]
 
     def __str__(self):
         return f"RiskCore [{self.risk_date}] for {self.security.identifier_client} using {self.curve_description.name}"
@@ -120,10 +190,30 @@ class RiskScenario(models.Model):
         StressScenario, on_delete=models.CASCADE, related_name="risk_analytics"
     )
     price = models.FloatField()
-    yield_to_maturity = models.FloatField()
-    oas = models.FloatField(help_text="Option-Adjusted Spread")
+    yield_to_maturity = models.FloatField(
+        null=True, blank=True, help_text="Empty when the yield solver didn't converge"
+    )
+    oas = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Z-spread over the shocked scenario curve in percentages, empty when the spread solver didn't converge",
+    )
     discounted_pv = models.FloatField()
     accrued_interest = models.FloatField(help_text="Accrued interest as of risk_date")
+    dv01 = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Price change per 100 par for a 1bp fall in rates",
+    )
+    modified_duration = models.FloatField(
+        null=True, blank=True, help_text="Effective duration to parallel curve shifts"
+    )
+    convexity = models.FloatField(
+        null=True, blank=True, help_text="Effective convexity to parallel curve shifts"
+    )
+    key_rate_durations = models.JSONField(
+        null=True, blank=True, help_text="Key rate durations by curve tenor in years"
+    )
 
     def __str__(self):
         return (
@@ -132,8 +222,21 @@ class RiskScenario(models.Model):
         )
 
 
+class Portfolio(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Position(models.Model):
-    portfolio_name = models.CharField(max_length=100)
+    portfolio = models.ForeignKey(
+        Portfolio,
+        on_delete=models.CASCADE,
+        related_name="positions",
+        # served by the index on (portfolio, position_date, ...)
+        db_index=False,
+    )
     position_date = models.DateField()
     lot_id = models.IntegerField()
     security = models.ForeignKey(
@@ -154,12 +257,21 @@ class Position(models.Model):
     book_value = models.FloatField()
     discounted_value = models.FloatField(blank=True, null=True)
 
+    class Meta:
+        unique_together = ("portfolio", "position_date", "security", "lot_id")
+
     def __str__(self):
-        return f"{self.portfolio_name} - {self.security.asset_name} [Lot {self.lot_id}]"
+        return f"{self.portfolio.name} - {self.security.asset_name} [Lot {self.lot_id}]"
 
 
 class ScenarioPosition(models.Model):
-    portfolio_name = models.CharField(max_length=100)
+    portfolio = models.ForeignKey(
+        Portfolio,
+        on_delete=models.CASCADE,
+        related_name="scenario_positions",
+        # served by the index on (portfolio, position_date, ...)
+        db_index=False,
+    )
     scenario = models.ForeignKey(StressScenario, on_delete=models.CASCADE)
     position_date = models.DateField()
     period_end_date = models.DateField()
@@ -183,8 +295,63 @@ class ScenarioPosition(models.Model):
         help_text="Linked RiskScenario based on scenario and security.",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["portfolio", "position_date", "scenario"],
+                name="scenpos_portfolio_id_date_idx",
+            )
+        ]
+
     def __str__(self):
-        return f"{self.portfolio_name} - {self.security.asset_name} [Lot {self.lot_id}]"
+        return f"{self.portfolio.name} - {self.security.asset_name} [Lot {self.lot_id}]"
+
+
+class ScenarioPortfolioSummary(models.Model):
+    """
+    Totals and risk of the scenario positions of a portfolio per stress scenario, i.e. per
+    period and simulation. Written by GenerateScenarioPositions together with the positions,
+    so trend and risk reports don't aggregate ScenarioPosition rows
+    """
+
+    portfolio = models.ForeignKey(
+        Portfolio,
+        on_delete=models.CASCADE,
+        related_name="scenario_summaries",
+        # served by the index on (portfolio, position_date, ...)
+        db_index=False,
+    )
+    position_date = models.DateField()
+    scenario = models.ForeignKey(
+        StressScenario, on_delete=models.CASCADE, related_name="portfolio_summaries"
+    )
+    period_end_date = models.DateField()
+    discounted_value = models.FloatField(
+        help_text="Sum of discounted values of the scenario positions"
+    )
+    book_value = models.FloatField()
+    par_value = models.FloatField()
+    accrued_interest = models.FloatField(
+        help_text="Accrued interest of the positions as of period_end_date"
+    )
+    positions = models.IntegerField(help_text="Number of scenario positions")
+    dv01 = models.FloatField(help_text="Value change for a 1bp fall in rates")
+    modified_duration = models.FloatField(
+        null=True, blank=True, help_text="Value weighted effective duration"
+    )
+    convexity = models.FloatField(
+        null=True, blank=True, help_text="Value weighted effective convexity"
+    )
+    key_rate_durations = models.JSONField(
+        null=True, blank=True, help_text="Value weighted key rate durations by tenor"
+    )
+    positions_without_risk = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("portfolio", "position_date", "scenario")
+
+    def __str__(self):
+        return f"{self.portfolio.name} on {self.position_date} - {self.scenario}"
 
 
 class Transaction(models.Model):
@@ -194,7 +361,9 @@ class Transaction(models.Model):
         ("CASH_IN", "Cash In"),
         ("CASH_OUT", "Cash Out"),
     ]
-    portfolio_name = models.CharField(max_length=100)
+    portfolio = models.ForeignKey(
+        Portfolio, on_delete=models.CASCADE, related_name="transactions"
+    )
     security = models.ForeignKey(
         VanillaBondSecMaster, on_delete=models.CASCADE, related_name="transactions"
     )
@@ -208,12 +377,14 @@ class Transaction(models.Model):
 
     def __str__(self):
         return (
-            f"{self.transaction_type} - {self.portfolio_name} ({self.transaction_date})"
+            f"{self.transaction_type} - {self.portfolio.name} ({self.transaction_date})"
         )
 
 
 class AborPnL(models.Model):
-    portfolio_name = models.CharField(max_length=100)
+    portfolio = models.ForeignKey(
+        Portfolio, on_delete=models.CASCADE, related_name="abor_pnls"
+    )
     security = models.ForeignKey(
         VanillaBondSecMaster, on_delete=models.CASCADE, related_name="abor_pnls"
     )
@@ -226,4 +397,103 @@ class AborPnL(models.Model):
     realized_gain_loss_pnl = models.FloatField()
 
     def __str__(self):
-        return f"{self.portfolio_name} - PnL for Scenario {self.scenario.scenario_id}, Period {self.scenario.period_number}, Sim {self.scenario.simulation_number}"
+        return f"{self.portfolio.name} - PnL for Scenario {self.scenario.scenario_id}, Period {self.scenario.period_number}, Sim {self.scenario.simulation_number}"
+
+
+class Job(models.Model):
+    GENERATE_SCENARIO_POSITIONS = "generate_scenario_positions"
+    UPLOAD_VANILLA_BONDS = "upload_vanilla_bonds"
+    UPLOAD_RISK_CORES = "upload_risk_cores"
+    UPLOAD_POSITIONS = "upload_positions"
+    UPLOAD_CURVE = "upload_curve"
+    UPLOAD_STRESS_SCENARIOS = "upload_stress_scenarios"
+    JOB_TYPES = [
+        (GENERATE_SCENARIO_POSITIONS, "Generate scenario positions"),
+        (UPLOAD_VANILLA_BONDS, "Upload vanilla bonds"),
+        (UPLOAD_RISK_CORES, "Upload risk cores"),
+        (UPLOAD_POSITIONS, "Upload positions"),
+        (UPLOAD_CURVE, "Upload curve"),
+        (UPLOAD_STRESS_SCENARIOS, "Upload stress scenarios"),
+    ]
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+        (CANCELLED, "Cancelled"),
+    ]
+    FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+    job_type = models.CharField(max_length=50, choices=JOB_TYPES)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    parameters = models.JSONField(
+        default=dict, blank=True, help_text="Request data of the submitted run"
+    )
+    input_file = models.FileField(
+        upload_to="jobs/",
+        blank=True,
+        help_text="Uploaded CSV file of upload jobs, deleted when the job finishes",
+    )
+    input_filename = models.CharField(max_length=255, blank=True)
+    progress_done = models.IntegerField(default=0, help_text="Scenarios done")
+    progress_total = models.IntegerField(
+        null=True, blank=True, help_text="Scenarios in the run"
+    )
+    rows_written = models.IntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        help_text="Final summary, the response of the synchronous run",
+    )
+    error = models.TextField(blank=True)
+    worker_pid = models.IntegerField(null=True, blank=True)
+    attempts = models.IntegerField(
+        default=0, help_text="Times a worker claimed the job"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last progress update of the worker running the job",
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        # workers poll for the oldest queued job
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="job_status_created_idx")
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.job_type} [{self.status}]"
+
+
+class DataVersion(models.Model):
+    """
+    Version of a data set that clients poll, e.g. curves or stress scenarios. It is bumped
+    in the transaction that changes the data set, so conditional GETs compare one row
+    """
+
+    CURVES = "curves"
+    STRESS_SCENARIOS = "stress_scenarios"
+    NAMES = [
+        (CURVES, "Curve descriptions and curve points"),
+        (STRESS_SCENARIOS, "Stress scenarios and their curve point shocks"),
+    ]
+
+    name = models.CharField(max_length=50, choices=NAMES, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
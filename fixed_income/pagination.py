@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class LargeTableCursorPagination(CursorPagination):
+    """
+    Cursor pagination in id order for tables that grow with portfolios and scenarios. Pages are
+    found by seeking past the last id of the previous page, so every page costs the same however
+    deep it is, unlike offset pagination. Clients may ask for up to LIST_MAX_PAGE_SIZE rows
+    per page with page_size
+    """
+
+    ordering = "id"
+    page_size = settings.LIST_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.LIST_MAX_PAGE_SIZE
@@ -0,0 +1,553 @@
+"""
+Vectorized vanilla bond valuation.
+
+The functions in ``fi_utils.bond_valuation`` price one bond at a time with python
+dicts and loops. The functions below price a whole portfolio at once: cashflows of all
+bonds are laid out in one padded matrix of shape (number of bonds, max number of cashflows)
+and PV, accrued interest and cashflow times are computed with a few numpy array operations.
+
+The valuation conventions of ``fi_utils.bond_valuation`` are kept:
+
+- time to a cashflow is days / days_per_year to the next coupon date plus period / freq
+- a coupon date equal to the as of date is treated as the next coupon date (accrued interest is zero)
+- curve rates are linearly interpolated and flat extrapolated beyond the first and last tenor
+
+Coupon dates come from the closed-form month arithmetic in ``coupon_dates`` (or from stored
+coupon schedules built with it) and the number of remaining coupons is counted in whole coupon
+periods between the next coupon date and maturity. Results match ``calc_pv_of_vanilla_bond``,
+``calc_accrued_interest`` and ``get_vanilla_bond_cf_and_time_to_cf`` to within ``MATCH_TOLERANCE``
+(absolute, in price points per 100 par) except where ``fi_utils`` itself drifts:
+
+- its 365 / freq day stepping puts coupons in the wrong month for some maturity days,
+  e.g. bonds maturing on the 1st of a month
+- its ``int(days / days_per_year * freq) + 1`` period count drops the final coupon
+  when leap days make the span short of a whole number of periods
+"""
+
+import datetime
+from typing import NamedTuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from .coupon_dates import next_and_prev_coupon_dates, periods_to_next_coupon
+from .curves import TIME_GRID_POINTS_PER_YEAR, Curve, ScenarioCurves
+
+MATCH_TOLERANCE = 1e-8
+
+# yields are in percentages, 1 + ytm / 100 has to stay positive
+YTM_LOWER_BOUND = -99.0
+YTM_UPPER_BOUND = 1000.0
+
+# calc_pv_matrix discounts the distinct cashflow times in blocks of curves holding at most this
+# many discount factors, i.e. 32 MB of float64, so memory doesn't grow with the number of curves
+PV_MATRIX_MAX_DISCOUNT_FACTORS = 2**22
+
+DateLike = Union[datetime.date, np.ndarray]
+
+
+def _to_datetime64_array(dates, size: int) -> np.ndarray:
+    """
+    Convert a date or a sequence of dates into datetime64[D] array of given size
+    :param dates: single date or sequence of dates
+    :param size: size of the resulting array, single date is broadcast to it
+    :return:
+    """
+    return np.broadcast_to(np.asarray(dates, dtype="datetime64[D]"), (size,)).copy()
+
+
+def resolve_coupon_dates(
+    adates: DateLike,
+    maturities: np.ndarray,
+    freqs: np.ndarray,
+):
+    """
+    Find next and previous coupon dates for arrays of as of dates, maturities and frequencies
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param freqs: array of coupon frequencies
+    :return: (next_coupon_dates, prev_coupon_dates) as datetime64[D] arrays
+    """
+    maturities = np.asarray(maturities, dtype="datetime64[D]")
+    adates = _to_datetime64_array(adates, len(maturities))
+    return next_and_prev_coupon_dates(adates, maturities, freqs)
+
+
+def _build_cf_matrix(
+    adates: np.ndarray,
+    maturities: np.ndarray,
+    coupons: np.ndarray,
+    freqs: np.ndarray,
+    days_per_year: int,
+    principal: float,
+    next_coupon_dates: np.ndarray,
+):
+    """
+    Build padded cashflow and time to cashflow matrices together with times to cashflows
+    on the standard time grid of ``Curve``, which are None when not all of them fall on it
+    """
+    days_to_next_cpn = (next_coupon_dates - adates).astype(np.int64)
+    no_of_periods = periods_to_next_coupon(next_coupon_dates, maturities, freqs) + 1
+    # bonds maturing before their next coupon date have no cashflows left
+    no_of_periods = np.maximum(no_of_periods, 0)
+
+    max_periods = int(no_of_periods.max(initial=0))
+    periods = np.arange(max_periods)
+    mask = periods[np.newaxis, :] < no_of_periods[:, np.newaxis]
+
+    time_to_next_cpn = days_to_next_cpn / days_per_year
+    times_to_cf = np.where(
+        mask, time_to_next_cpn[:, np.newaxis] + periods / freqs[:, np.newaxis], 0.0
+    )
+    cashflows = np.where(mask, (coupons / freqs)[:, np.newaxis], 0.0)
+    has_cashflows = no_of_periods > 0
+    cashflows[
+        np.flatnonzero(has_cashflows), no_of_periods[has_cashflows] - 1
+    ] += principal
+
+    grid_times_to_cf = None
+    if (
+        TIME_GRID_POINTS_PER_YEAR % days_per_year == 0
+        and np.all(TIME_GRID_POINTS_PER_YEAR % freqs == 0)
+        and np.all(days_to_next_cpn >= 0)
+    ):
+        grid_steps_per_day = TIME_GRID_POINTS_PER_YEAR // days_per_year
+        grid_steps_per_period = TIME_GRID_POINTS_PER_YEAR // freqs
+        grid_times_to_cf = np.where(
+            mask,
+            (days_to_next_cpn * grid_steps_per_day)[:, np.newaxis]
+            + periods * grid_steps_per_period[:, np.newaxis],
+            0,
+        )
+    return cashflows, times_to_cf, grid_times_to_cf
+
+
+def get_vanilla_bonds_cf_matrix(
+    adates: DateLike,
+    maturities: np.ndarray,
+    coupons: np.ndarray,
+    freqs: np.ndarray,
+    days_per_year: int = 365,
+    principal: float = 100.0,
+    next_coupon_dates: np.ndarray = None,
+):
+    """
+    Get padded cashflow and time to cashflow matrices of vanilla bonds.
+    Row i holds cashflows of bond i, unused cells are padded with zero cashflows at zero time,
+    so they don't contribute to PV
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param coupons: array of annual coupon rates in percentages
+    :param freqs: array of coupon frequencies
+    :param days_per_year:
+    :param principal:
+    :param next_coupon_dates: optional precomputed next coupon dates
+    :return: (cashflows, times_to_cf) arrays of shape (number of bonds, max number of cashflows)
+    """
+    maturities = np.asarray(maturities, dtype="datetime64[D]")
+    coupons = np.asarray(coupons, dtype=np.float64)
+    freqs = np.asarray(freqs, dtype=np.int64)
+    adates = _to_datetime64_array(adates, len(maturities))
+    if next_coupon_dates is None:
+        next_coupon_dates, _ = resolve_coupon_dates(adates, maturities, freqs)
+    cashflows, times_to_cf, _ = _build_cf_matrix(
+        adates,
+        maturities,
+        coupons,
+        freqs,
+        days_per_year,
+        principal,
+        next_coupon_dates,
+    )
+    return cashflows, times_to_cf
+
+
+def calc_accrued_interest_of_vanilla_bonds(
+    adates: DateLike,
+    maturities: np.ndarray,
+    coupons: np.ndarray,
+    freqs: np.ndarray,
+    days_per_year: int = 365,
+    prev_coupon_dates: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Calculate accrued interest of vanilla bonds
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param coupons: array of annual coupon rates in percentages
+    :param freqs: array of coupon frequencies
+    :param days_per_year:
+    :param prev_coupon_dates: optional precomputed previous coupon dates
+    :return: array of accrued interests
+    """
+    maturities = np.asarray(maturities, dtype="datetime64[D]")
+    coupons = np.asarray(coupons, dtype=np.float64)
+    adates = _to_datetime64_array(adates, len(maturities))
+    if prev_coupon_dates is None:
+        _, prev_coupon_dates = resolve_coupon_dates(adates, maturities, freqs)
+    days_since_prev_cpn = (adates - prev_coupon_dates).astype(np.int64)
+    return coupons * (days_since_prev_cpn / days_per_year)
+
+
+def calc_discount_factors(
+    curve: Curve, times_to_cf: np.ndarray, grid_times_to_cf: np.ndarray = None
+):
+    """
+    Calculate discount factors for an array of times to cashflows
+    :param curve: interest rate curve
+    :param times_to_cf: array of times to cashflows in years
+    :param grid_times_to_cf: optional same times on the standard time grid of the curve,
+        when given memoized discount factors of the curve are looked up
+    :return: array of discount factors of the same shape as times_to_cf
+    """
+    if grid_times_to_cf is not None:
+        return curve.discount_factors_on_grid(grid_times_to_cf)
+    return curve.discount_factors(times_to_cf)
+
+
+def calc_pv_of_vanilla_bonds(
+    adates: DateLike,
+    maturities: np.ndarray,
+    coupons: np.ndarray,
+    curve: Curve,
+    freqs: np.ndarray,
+    days_per_year: int = 365,
+) -> np.ndarray:
+    """
+    Calculate PVs of vanilla bonds
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param coupons: array of annual coupon rates in percentages
+    :param curve: interest rate curve
+    :param freqs: array of coupon frequencies
+    :param days_per_year:
+    :return: array of PVs
+    """
+    return price_vanilla_bonds(
+        adates, maturities, coupons, curve, freqs, days_per_year
+    )["pv"]
+
+
+def get_vanilla_bonds_cashflows(
+    adates: DateLike,
+    maturities: np.ndarray,
+    coupons: np.ndarray,
+    freqs: np.ndarray,
+    days_per_year: int = 365,
+    principal: float = 100.0,
+    next_coupon_dates: np.ndarray = None,
+    prev_coupon_dates: np.ndarray = None,
+):
+    """
+    Get everything about a portfolio of vanilla bonds that doesn't depend on the curve.
+    Coupon dates are resolved once and shared between cashflow and accrued interest calculations.
+    Precomputed coupon dates, e.g. looked up from stored coupon schedules, are used as is,
+    only missing (NaT) ones are resolved
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param coupons: array of annual coupon rates in percentages
+    :param freqs: array of coupon frequencies
+    :param days_per_year:
+    :param principal:
+    :param next_coupon_dates: optional precomputed next coupon dates
+    :param prev_coupon_dates: optional precomputed previous coupon dates
+    :return: dictionary with accrued_interest, cashflows, times_to_cf and grid_times_to_cf arrays
+    """
+    maturities = np.asarray(maturities, dtype="datetime64[D]")
+    freqs = np.asarray(freqs, dtype=np.int64)
+    adates = _to_datetime64_array(adates, len(maturities))
+    if next_coupon_dates is None or prev_coupon_dates is None:
+        next_coupon_dates = np.full(
+            len(maturities), np.datetime64("NaT"), "datetime64[D]"
+        )
+        prev_coupon_dates = next_coupon_dates.copy()
+    else:
+        next_coupon_dates = np.array(next_coupon_dates, dtype="datetime64[D]")
+        prev_coupon_dates = np.array(prev_coupon_dates, dtype="datetime64[D]")
+    missing = np.isnat(next_coupon_dates) | np.isnat(prev_coupon_dates)
+    if missing.any():
+        next_coupon_dates[missing], prev_coupon_dates[missing] = resolve_coupon_dates(
+            adates[missing], maturities[missing], freqs[missing]
+        )
+    cashflows, times_to_cf, grid_times_to_cf = _build_cf_matrix(
+        adates,
+        maturities,
+        np.asarray(coupons, dtype=np.float64),
+        freqs,
+        days_per_year,
+        principal,
+        next_coupon_dates,
+    )
+    accrued_interest = calc_accrued_interest_of_vanilla_bonds(
+        adates,
+        maturities,
+        coupons,
+        freqs,
+        days_per_year,
+        prev_coupon_dates=prev_coupon_dates,
+    )
+    return {
+        "accrued_interest": accrued_interest,
+        "cashflows": cashflows,
+        "times_to_cf": times_to_cf,
+        "grid_times_to_cf": grid_times_to_cf,
+    }
+
+
+def price_vanilla_bonds(
+    adates: DateLike,
+    maturities: np.ndarray,
+    coupons: np.ndarray,
+    curve: Curve,
+    freqs: np.ndarray,
+    days_per_year: int = 365,
+    principal: float = 100.0,
+    next_coupon_dates: np.ndarray = None,
+    prev_coupon_dates: np.ndarray = None,
+):
+    """
+    Price a portfolio of vanilla bonds in one pass
+    :param adates: as of date or array of as of dates
+    :param maturities: array of maturities
+    :param coupons: array of annual coupon rates in percentages
+    :param curve: interest rate curve
+    :param freqs: array of coupon frequencies
+    :param days_per_year:
+    :param principal:
+    :param next_coupon_dates: optional precomputed next coupon dates
+    :param prev_coupon_dates: optional precomputed previous coupon dates
+    :return: dictionary with pv, accrued_interest, cashflows, times_to_cf and grid_times_to_cf arrays
+    """
+    valuation = get_vanilla_bonds_cashflows(
+        adates,
+        maturities,
+        coupons,
+        freqs,
+        days_per_year,
+        principal,
+        next_coupon_dates,
+        prev_coupon_dates,
+    )
+    discount_factors = calc_discount_factors(
+        curve, valuation["times_to_cf"], valuation["grid_times_to_cf"]
+    )
+    valuation["pv"] = (valuation["cashflows"] * discount_factors).sum(axis=1)
+    return valuation
+
+
+def calc_pv_matrix(
+    cashflows: np.ndarray, times_to_cf: np.ndarray, scenario_curves: ScenarioCurves
+) -> np.ndarray:
+    """
+    Calculate PVs of all bonds under all scenario curves.
+    Discount factors are evaluated once per distinct time to cashflow and scenario, giving a
+    (scenarios, distinct times) matrix. Cashflows are folded into a sparse (bonds, distinct times)
+    matrix, so the PVs of every bond in a block of scenarios are a single sparse matrix product.
+    Blocks hold at most PV_MATRIX_MAX_DISCOUNT_FACTORS discount factors
+    :param cashflows: cashflow matrix of shape (number of bonds, max number of cashflows)
+    :param times_to_cf: time to cashflow matrix of the same shape as cashflows
+    :param scenario_curves: shocked curves, one per scenario
+    :return: PV matrix of shape (number of scenarios, number of bonds)
+    """
+    unique_times, inverse = np.unique(times_to_cf, return_inverse=True)
+    bond_idx = np.repeat(np.arange(cashflows.shape[0]), cashflows.shape[1])
+    cashflows_by_time = sparse.csr_matrix(
+        (cashflows.ravel(), (bond_idx, inverse.ravel())),
+        shape=(cashflows.shape[0], len(unique_times)),
+    )
+    curves_per_block = max(
+        1, PV_MATRIX_MAX_DISCOUNT_FACTORS // max(len(unique_times), 1)
+    )
+    pv_matrix = np.empty((len(scenario_curves), cashflows.shape[0]))
+    for start in range(0, len(scenario_curves), curves_per_block):
+        stop = start + curves_per_block
+        discount_factors = scenario_curves[start:stop].discount_factors(unique_times)
+        pv_matrix[start:stop] = (cashflows_by_time @ discount_factors.T).T
+    return pv_matrix
+
+
+class RateSolverResult(NamedTuple):
+    rate: np.ndarray
+    iterations: np.ndarray
+    converged: np.ndarray
+
+    @property
+    def failed_indices(self) -> np.ndarray:
+        return np.flatnonzero(~self.converged)
+
+
+def calc_pv_and_derivative_from_rate(
+    rate: np.ndarray,
+    cashflows: np.ndarray,
+    times_to_cf: np.ndarray,
+    base_rates=0.0,
+):
+    """
+    Calculate PVs of bonds discounted at base rates plus a flat rate per bond
+    and their analytic derivatives with respect to that flat rate.
+    With zero base rates the flat rate is the yield to maturity, with curve rates as base rates it is the Z-spread
+    :param rate: array of flat rates in percentages, one per bond
+    :param cashflows: cashflow matrix of shape (number of bonds, max number of cashflows)
+    :param times_to_cf: time to cashflow matrix of the same shape as cashflows
+    :param base_rates: scalar or matrix of the same shape as cashflows, in percentages
+    :return: (pv, dpv_drate) arrays
+    """
+    base = 1 + (base_rates + rate[:, np.newaxis]) / 100
+    discounted_cashflows = cashflows * base**-times_to_cf
+    pv = discounted_cashflows.sum(axis=1)
+    dpv_drate = -(discounted_cashflows * times_to_cf / base).sum(axis=1) / 100
+    return pv, dpv_drate
+
+
+def _solve_flat_rate(
+    dirty_prices: np.ndarray,
+    cashflows: np.ndarray,
+    times_to_cf: np.ndarray,
+    base_rates: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    initial_guess: float,
+    price_tolerance: float,
+    max_iterations: int,
+) -> RateSolverResult:
+    """
+    Solve flat rates over base rates that reprice many bonds at once with safeguarded Newton iterations.
+    Every bond keeps a [low, high] bracket around its root. A Newton step that leaves the bracket
+    falls back to bisection, so PV is never evaluated outside of the initial bracket.
+    Bonds whose dirty price can't be bracketed or that don't converge within max_iterations
+    are reported as not converged
+    """
+    dirty_prices = np.asarray(dirty_prices, dtype=np.float64)
+    no_of_bonds = len(dirty_prices)
+    rate = np.clip(np.full(no_of_bonds, float(initial_guess)), low, high)
+    iterations = np.zeros(no_of_bonds, dtype=np.int64)
+    converged = np.zeros(no_of_bonds, dtype=bool)
+    per_bond_base_rates = np.ndim(base_rates) > 0
+
+    def pv_and_derivative(idx, rates):
+        return calc_pv_and_derivative_from_rate(
+            rates,
+            cashflows[idx],
+            times_to_cf[idx],
+            base_rates[idx] if per_bond_base_rates else base_rates,
+        )
+
+    # PV is decreasing in the rate, so the dirty price is bracketed when PV(high) <= price <= PV(low)
+    all_bonds = np.arange(no_of_bonds)
+    with np.errstate(over="ignore"):
+        pv_low, _ = pv_and_derivative(all_bonds, low)
+    pv_high, _ = pv_and_derivative(all_bonds, high)
+    active = (
+        np.isfinite(dirty_prices)
+        & (dirty_prices > 0)
+        & (pv_high <= dirty_prices)
+        & (dirty_prices <= pv_low)
+    )
+
+    for _ in range(max_iterations):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+        iterations[idx] += 1
+        pv, dpv_drate = pv_and_derivative(idx, rate[idx])
+        diff = pv - dirty_prices[idx]
+
+        done = np.abs(diff) <= price_tolerance
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+        above_price = diff > 0
+        low[idx] = np.where(above_price, rate[idx], low[idx])
+        high[idx] = np.where(above_price, high[idx], rate[idx])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton_rate = rate[idx] - diff / dpv_drate
+        inside_bracket = (
+            np.isfinite(newton_rate)
+            & (newton_rate > low[idx])
+            & (newton_rate < high[idx])
+        )
+        next_rate = np.where(inside_bracket, newton_rate, (low[idx] + high[idx]) / 2)
+        rate[idx] = np.where(done, rate[idx], next_rate)
+
+    rate[~converged] = np.nan
+    return RateSolverResult(rate=rate, iterations=iterations, converged=converged)
+
+
+def calc_ytm_of_vanilla_bonds(
+    dirty_prices: np.ndarray,
+    cashflows: np.ndarray,
+    times_to_cf: np.ndarray,
+    initial_guess: float = 1.0,
+    price_tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> RateSolverResult:
+    """
+    Solve yields to maturity of many bonds at once with safeguarded Newton iterations
+    using the analytic derivative of PV with respect to yield.
+    Yields are bracketed within [YTM_LOWER_BOUND, YTM_UPPER_BOUND], so PV is never
+    evaluated at yields where 1 + ytm / 100 <= 0.
+
+    Unlike ``fi_utils.bond_valuation.calculate_pv_from_ytm`` coupons are always coupon / freq,
+    for semiannual bonds both give identical PVs.
+    :param dirty_prices: array of dirty prices per 100 par
+    :param cashflows: cashflow matrix of shape (number of bonds, max number of cashflows)
+    :param times_to_cf: time to cashflow matrix of the same shape as cashflows
+    :param initial_guess: starting yield in percentages
+    :param price_tolerance: convergence tolerance on PV minus dirty price
+    :param max_iterations:
+    :return: RateSolverResult with yields in percentages (nan when not converged), iterations and converged mask
+    """
+    no_of_bonds = len(dirty_prices)
+    return _solve_flat_rate(
+        dirty_prices,
+        cashflows,
+        times_to_cf,
+        0.0,
+        np.full(no_of_bonds, YTM_LOWER_BOUND),
+        np.full(no_of_bonds, YTM_UPPER_BOUND),
+        initial_guess,
+        price_tolerance,
+        max_iterations,
+    )
+
+
+def calc_z_spread_of_vanilla_bonds(
+    dirty_prices: np.ndarray,
+    cashflows: np.ndarray,
+    times_to_cf: np.ndarray,
+    curve: Curve,
+    initial_guess: float = 0.0,
+    price_tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> RateSolverResult:
+    """
+    Solve Z-spreads of many bonds at once, the constant spread over the curve that discounts
+    cashflows back to the dirty price. All bonds share one convergence loop, curve rates
+    at the cashflow times are interpolated only once
+    :param dirty_prices: array of dirty prices per 100 par
+    :param cashflows: cashflow matrix of shape (number of bonds, max number of cashflows)
+    :param times_to_cf: time to cashflow matrix of the same shape as cashflows
+    :param curve: interest rate curve
+    :param initial_guess: starting spread in percentages
+    :param price_tolerance: convergence tolerance on PV minus dirty price
+    :param max_iterations:
+    :return: RateSolverResult with spreads in percentages (nan when not converged), iterations and converged mask
+    """
+    curve_rates = curve.rates_at(times_to_cf)
+    # spreads below this bound would take some discount rate of a bond to -100% or lower
+    lowest_curve_rate = np.where(cashflows != 0, curve_rates, np.inf).min(
+        axis=1, initial=0.0
+    )
+    no_of_bonds = len(dirty_prices)
+    return _solve_flat_rate(
+        dirty_prices,
+        cashflows,
+        times_to_cf,
+        curve_rates,
+        YTM_LOWER_BOUND - lowest_curve_rate,
+        np.full(no_of_bonds, YTM_UPPER_BOUND),
+        initial_guess,
+        price_tolerance,
+        max_iterations,
+    )
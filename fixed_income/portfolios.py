@@ -0,0 +1,77 @@
+"""
+Portfolio names to ids.
+
+Positions, scenario positions, summaries, transactions and PnLs reference their ``Portfolio`` by an
+integer foreign key, while uploads, generation runs and reports name portfolios. ``portfolio_ids``
+resolves names through a process wide map, so a name costs one query the first time it's seen and
+none after. Ids are only kept once the transaction that read or created them commits, and the map is
+cleared whenever a portfolio is saved or deleted, e.g. renamed. Each process only sees its own saves,
+ids expire after ``PORTFOLIO_ID_CACHE_SECONDS`` so portfolios renamed or deleted by another process
+(e.g. a ``run_jobs`` worker) are looked up again.
+"""
+
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Portfolio
+
+# portfolio name to (id, monotonic time it was looked up)
+_portfolio_ids: Dict[str, Tuple[int, float]] = {}
+
+
+def portfolio_ids(names: Iterable[str], create: bool = False) -> Dict[str, int]:
+    """
+    Ids of portfolios by name
+    :param names: portfolio names
+    :param create: create the portfolios that don't exist yet
+    :return: dict of name to id, without the names of missing portfolios when create is False
+    """
+    names = set(names)
+    now = time.monotonic()
+    found = {}
+    for name in names:
+        cached_id, looked_up_at = _portfolio_ids.get(name, (None, None))
+        if (
+            cached_id is not None
+            and now - looked_up_at < settings.PORTFOLIO_ID_CACHE_SECONDS
+        ):
+            found[name] = cached_id
+    missing = names - set(found)
+    if missing:
+        if create:
+            Portfolio.objects.bulk_create(
+                [Portfolio(name=name) for name in sorted(missing)],
+                ignore_conflicts=True,
+            )
+        looked_up = dict(
+            Portfolio.objects.filter(name__in=missing).values_list("name", "id")
+        )
+        found.update(looked_up)
+        # runs right away outside of a transaction, never for one that's rolled back
+        transaction.on_commit(
+            lambda: _portfolio_ids.update(
+                (name, (looked_up_id, now)) for name, looked_up_id in looked_up.items()
+            )
+        )
+    return found
+
+
+def portfolio_id(name: str, create: bool = False) -> Optional[int]:
+    """
+    Id of a portfolio by name
+    :param name: portfolio name
+    :param create: create the portfolio when it doesn't exist yet
+    :return: None when the portfolio doesn't exist and create is False
+    """
+    return portfolio_ids([name], create=create).get(name)
+
+
+@receiver(post_save, sender=Portfolio)
+@receiver(post_delete, sender=Portfolio)
+def clear_portfolio_ids(**kwargs):
+    _portfolio_ids.clear()
@@ -0,0 +1,174 @@
+"""
+Interest rate risk of vanilla bond portfolios from bumped curves.
+
+Every curve is bumped into a small stack of curves: the curve itself, a parallel shift up and down
+and an up and down shift of each tenor on its own. Rates are linearly interpolated between tenors,
+so bumping one tenor is the usual triangular key rate shift and key rate durations add up to the
+effective duration. All bumped curves of all scenarios are one ``ScenarioCurves`` rate tensor,
+repricing the cashflow matrix against it is a single ``calc_pv_matrix`` product and every measure
+below is a central difference of the repriced PVs.
+
+Durations and convexity are effective measures with respect to shifts of the curve rates
+(annually compounded zero rates), DV01 is in price points per 100 par for a 1bp fall in rates.
+"""
+
+from typing import Union
+
+import numpy as np
+
+from .curves import Curve, ScenarioCurves
+from .portfolio_valuation import calc_pv_matrix
+
+# bump size in percentages, i.e. one basis point
+CURVE_BUMP_SIZE = 0.01
+
+
+def curve_bumps(no_of_tenors: int, bump_size: float = CURVE_BUMP_SIZE) -> np.ndarray:
+    """
+    Rate bumps applied to a curve: none, parallel up, parallel down, then up and down per tenor
+    :param no_of_tenors:
+    :param bump_size: bump size in percentages
+    :return: bump matrix of shape (3 + 2 * no_of_tenors, no_of_tenors)
+    """
+    key_rate_bumps = np.eye(no_of_tenors)
+    return bump_size * np.vstack(
+        [
+            np.zeros((1, no_of_tenors)),
+            np.ones((1, no_of_tenors)),
+            -np.ones((1, no_of_tenors)),
+            key_rate_bumps,
+            -key_rate_bumps,
+        ]
+    )
+
+
+def bump_scenario_curves(
+    scenario_curves: ScenarioCurves, bump_size: float = CURVE_BUMP_SIZE
+) -> ScenarioCurves:
+    """
+    Stack bumped copies of every scenario curve into one set of scenario curves
+    :param scenario_curves: curves to bump
+    :param bump_size: bump size in percentages
+    :return: scenario curves with 3 + 2 * number of tenors rows per input curve, grouped by input curve
+    """
+    bumps = curve_bumps(len(scenario_curves.tenors), bump_size)
+    rates = scenario_curves.rates[:, np.newaxis, :] + bumps[np.newaxis, :, :]
+    return ScenarioCurves(
+        scenario_curves.tenors, rates.reshape(-1, len(scenario_curves.tenors))
+    )
+
+
+def calc_risk_measures(
+    cashflows: np.ndarray,
+    times_to_cf: np.ndarray,
+    curves: Union[Curve, ScenarioCurves],
+    bump_size: float = CURVE_BUMP_SIZE,
+):
+    """
+    Calculate PV, DV01, duration, convexity and key rate durations of all bonds under all curves
+    from one repricing of the cashflow matrix against the bumped curves
+    :param cashflows: cashflow matrix of shape (number of bonds, max number of cashflows)
+    :param times_to_cf: time to cashflow matrix of the same shape as cashflows
+    :param curves: curve or scenario curves
+    :param bump_size: bump size in percentages
+    :return: dictionary with tenors, pv, dv01, modified_duration and convexity arrays of shape
+        (number of curves, number of bonds) and key_rate_durations array of shape
+        (number of curves, number of bonds, number of tenors)
+    """
+    if isinstance(curves, Curve):
+        curves = ScenarioCurves(curves.tenors, curves.rates[np.newaxis, :])
+    no_of_tenors = len(curves.tenors)
+    pvs = calc_pv_matrix(
+        cashflows, times_to_cf, bump_scenario_curves(curves, bump_size)
+    ).reshape(len(curves), 3 + 2 * no_of_tenors, cashflows.shape[0])
+
+    pv = pvs[:, 0]
+    pv_up, pv_down = pvs[:, 1], pvs[:, 2]
+    key_rate_pv_up = pvs[:, 3 : 3 + no_of_tenors]
+    key_rate_pv_down = pvs[:, 3 + no_of_tenors :]
+
+    rate_change = bump_size / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        modified_duration = (pv_down - pv_up) / (2 * rate_change * pv)
+        convexity = (pv_up + pv_down - 2 * pv) / (rate_change**2 * pv)
+        key_rate_durations = (key_rate_pv_down - key_rate_pv_up) / (
+            2 * rate_change * pv[:, np.newaxis, :]
+        )
+    return {
+        "tenors": curves.tenors,
+        "pv": pv,
+        "dv01": (pv_down - pv_up) / 2 * (0.01 / bump_size),
+        "modified_duration": modified_duration,
+        "convexity": convexity,
+        "key_rate_durations": np.moveaxis(key_rate_durations, 1, 2),
+    }
+
+
+def key_rate_durations_by_tenor(tenors: np.ndarray, durations: np.ndarray):
+    """
+    Key rate durations of one bond as a dictionary that maps tenors to durations,
+    None when they are not finite, e.g. for bonds without cashflows left
+    :param tenors: array of tenors in years
+    :param durations: array of key rate durations, one per tenor
+    :return:
+    """
+    if not np.all(np.isfinite(durations)):
+        return None
+    return {f"{tenor:g}": float(duration) for tenor, duration in zip(tenors, durations)}
+
+
+def aggregate_portfolio_risk(positions):
+    """
+    Aggregate position risk to portfolio level. DV01 adds up over positions, durations and
+    convexity are averages weighted by discounted value, so the portfolio duration is the
+    portfolio DV01 relative to its value. Positions without risk measures are left out
+    :param positions: iterable of (quantity, discounted_value, dv01, modified_duration,
+        convexity, key_rate_durations) tuples, dv01 per 100 par
+    :return: dictionary with market_value, dv01, modified_duration, convexity,
+        key_rate_durations and positions_without_risk
+    """
+    market_value = 0.0
+    dv01 = 0.0
+    weighted_duration = 0.0
+    weighted_convexity = 0.0
+    weighted_key_rate_durations = {}
+    risk_market_value = 0.0
+    positions_without_risk = 0
+    for (
+        quantity,
+        discounted_value,
+        position_dv01,
+        duration,
+        convexity,
+        key_rate_durations,
+    ) in positions:
+        market_value += discounted_value or 0.0
+        if None in (discounted_value, position_dv01, duration, convexity):
+            positions_without_risk += 1
+            continue
+        dv01 += quantity * position_dv01 / 100
+        risk_market_value += discounted_value
+        weighted_duration += discounted_value * duration
+        weighted_convexity += discounted_value * convexity
+        for tenor, key_rate_duration in (key_rate_durations or {}).items():
+            weighted_key_rate_durations[tenor] = (
+                weighted_key_rate_durations.get(tenor, 0.0)
+                + discounted_value * key_rate_duration
+            )
+
+    def weighted_average(value):
+        return value / risk_market_value if risk_market_value else None
+
+    return {
+        "market_value": market_value,
+        "dv01": dv01,
+        "modified_duration": weighted_average(weighted_duration),
+        "convexity": weighted_average(weighted_convexity),
+        "key_rate_durations": {
+            tenor: weighted_average(value)
+            for tenor, value in sorted(
+                weighted_key_rate_durations.items(), key=lambda item: float(item[0])
+            )
+        },
+        "positions_without_risk": positions_without_risk,
+    }
@@ -0,0 +1,306 @@
+"""
+Parallel repricing of stress scenarios.
+
+Repricing every position under every shocked curve (and its bumped copies for risk measures)
+is the expensive part of a stress run. ``iter_scenario_risk_measures`` splits the scenarios of
+every period into chunks of at most ``MAX_SCENARIOS_PER_CHUNK``, reprices the chunks in this
+process or on a ``ProcessPoolExecutor`` and hands back the results one period at a time, so
+callers write a period's rows before later periods are priced.
+
+Scenario rates live in shared memory blocks created once by the parent, workers attach to them
+when they start. Cashflow matrices and result arrays live in blocks of their period: the parent
+creates them when it submits the period and releases them once it copied the merged results out,
+so a task is only the names of the period's blocks and a scenario range, and workers write their
+results straight into the shared result arrays instead of pickling them back. Workers never
+touch the database.
+"""
+
+import itertools
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from .curves import ScenarioCurves
+from .risk_measures import calc_risk_measures
+
+# risk measures with one value per scenario and bond, key rate durations have one more axis
+SCENARIO_RISK_MEASURES = ("pv", "dv01", "modified_duration", "convexity")
+
+# tasks per worker and period, two periods are in flight at a time, so every worker has
+# a few tasks queued to even out chunks that take longer, e.g. periods with more live bonds
+TASKS_PER_WORKER = 2
+
+# scenarios repriced at once, in a worker task or in this process, so the bumped curve PVs of a
+# chunk stay within 50 * (3 + 2 * tenors) rows however many simulations a period has
+MAX_SCENARIOS_PER_CHUNK = 50
+
+
+class SharedArrays:
+    """
+    Named numpy arrays backed by shared memory blocks. The parent creates them, workers attach
+    to them with the spec of the parent, and only the parent unlinks them
+    """
+
+    def __init__(self, blocks: Dict[str, shared_memory.SharedMemory], spec: Dict):
+        self._blocks = blocks
+        self.spec = spec
+        self._arrays = {
+            name: np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)
+            for name, (_, shape, dtype) in spec.items()
+        }
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray]) -> "SharedArrays":
+        """
+        Copy arrays into new shared memory blocks
+        :param arrays: dictionary of names to arrays
+        :return:
+        """
+        blocks = {}
+        spec = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                # shared memory blocks can't be empty
+                blocks[name] = shared_memory.SharedMemory(
+                    create=True, size=max(array.nbytes, 1)
+                )
+                spec[name] = (blocks[name].name, array.shape, array.dtype.str)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=blocks[name].buf)[
+                    ...
+                ] = array
+        except Exception:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+            raise
+        return cls(blocks, spec)
+
+    @classmethod
+    def attach(cls, spec: Dict) -> "SharedArrays":
+        """
+        Attach to shared memory blocks created by another process
+        :param spec: spec of the SharedArrays created by the other process
+        :return:
+        """
+        blocks = {
+            name: shared_memory.SharedMemory(name=block_name)
+            for name, (block_name, _, _) in spec.items()
+        }
+        return cls(blocks, spec)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def close(self):
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+
+    def unlink(self):
+        for block in self._blocks.values():
+            block.unlink()
+
+
+_worker_scenario_arrays = None
+
+
+def _attach_worker(scenario_spec: Dict):
+    global _worker_scenario_arrays
+    _worker_scenario_arrays = SharedArrays.attach(scenario_spec)
+
+
+def _price_scenario_chunk(period_spec: Dict, start: int, stop: int) -> int:
+    """
+    Reprice scenarios start to stop of a period and write the results into its shared arrays
+    :param period_spec: spec of the SharedArrays of the period, attached for this task only
+    :return: number of scenarios repriced
+    """
+    scenario_arrays = _worker_scenario_arrays
+    arrays = SharedArrays.attach(period_spec)
+    try:
+        scenario_indices = arrays["scenario_indices"][start:stop]
+        risk = calc_risk_measures(
+            arrays["cashflows"],
+            arrays["times_to_cf"],
+            ScenarioCurves(
+                scenario_arrays["tenors"],
+                scenario_arrays["scenario_rates"][scenario_indices],
+            ),
+        )
+        for measure in SCENARIO_RISK_MEASURES + ("key_rate_durations",):
+            arrays[measure][start:stop] = risk[measure]
+    finally:
+        arrays.close()
+    return stop - start
+
+
+def _scenario_chunks(no_of_scenarios: int, tasks: int) -> List[Tuple[int, int]]:
+    """
+    Split the scenarios of a period into (start, stop) chunks, at least tasks of them
+    when there are enough scenarios and none longer than MAX_SCENARIOS_PER_CHUNK
+    """
+    chunk_size = min(
+        MAX_SCENARIOS_PER_CHUNK, max(1, math.ceil(no_of_scenarios / tasks))
+    )
+    return [
+        (start, min(start + chunk_size, no_of_scenarios))
+        for start in range(0, no_of_scenarios, chunk_size)
+    ]
+
+
+def _zeroed_risk_arrays(no_of_scenarios, no_of_bonds, no_of_tenors):
+    """Result arrays of the risk measures of a period"""
+    arrays = {
+        measure: np.zeros((no_of_scenarios, no_of_bonds))
+        for measure in SCENARIO_RISK_MEASURES
+    }
+    arrays["key_rate_durations"] = np.zeros(
+        (no_of_scenarios, no_of_bonds, no_of_tenors)
+    )
+    return arrays
+
+
+def _price_period(cashflows, times_to_cf, scenario_curves) -> Dict[str, np.ndarray]:
+    """Reprice the scenarios of a period in this process, one chunk of scenarios at a time"""
+    risk = {
+        "tenors": scenario_curves.tenors,
+        **_zeroed_risk_arrays(
+            len(scenario_curves), cashflows.shape[0], len(scenario_curves.tenors)
+        ),
+    }
+    for start, stop in _scenario_chunks(len(scenario_curves), 1):
+        chunk_risk = calc_risk_measures(
+            cashflows, times_to_cf, scenario_curves[start:stop]
+        )
+        for measure in SCENARIO_RISK_MEASURES + ("key_rate_durations",):
+            risk[measure][start:stop] = chunk_risk[measure]
+    return risk
+
+
+def _submit_period(
+    executor, cashflows, times_to_cf, scenario_indices, no_of_tenors, workers
+):
+    """
+    Copy the cashflows and scenario indices of a period and zeroed result arrays into shared
+    memory and submit the tasks repricing its scenarios
+    :return: (SharedArrays of the period, futures of its tasks)
+    """
+    no_of_scenarios = len(scenario_indices)
+    arrays = {
+        "cashflows": cashflows,
+        "times_to_cf": times_to_cf,
+        "scenario_indices": np.asarray(scenario_indices, dtype=np.int64),
+        **_zeroed_risk_arrays(no_of_scenarios, cashflows.shape[0], no_of_tenors),
+    }
+    period_arrays = SharedArrays.create(arrays)
+    try:
+        futures = [
+            executor.submit(_price_scenario_chunk, period_arrays.spec, start, stop)
+            for start, stop in _scenario_chunks(
+                no_of_scenarios, workers * TASKS_PER_WORKER
+            )
+        ]
+    except BaseException:
+        _release(period_arrays)
+        raise
+    return period_arrays, futures
+
+
+def _collect_period(period_arrays, futures, tenors) -> Dict[str, np.ndarray]:
+    """Wait for the tasks of a period, copy its results out and release its shared memory"""
+    try:
+        for future in futures:
+            future.result()
+        risk = {"tenors": tenors}
+        for measure in SCENARIO_RISK_MEASURES + ("key_rate_durations",):
+            risk[measure] = period_arrays[measure].copy()
+        return risk
+    finally:
+        # tasks still running after a failure keep their own mapping of the blocks
+        for future in futures:
+            future.cancel()
+        _release(period_arrays)
+
+
+def _release(shared_arrays: SharedArrays):
+    shared_arrays.close()
+    shared_arrays.unlink()
+
+
+def iter_scenario_risk_measures(
+    periods: Iterable[Tuple[Any, np.ndarray, np.ndarray, Sequence[int]]],
+    scenario_curves: ScenarioCurves,
+    workers: int = 1,
+) -> Iterator[Tuple[Any, Dict[str, np.ndarray]]]:
+    """
+    Calculate risk measures of the bonds of every period under its scenario curves, in a pool of
+    worker processes when workers > 1. Periods are priced one at a time in order: the pool
+    reprices the next period while the caller handles the results of the current one, so at most
+    two periods are held in shared memory, and each period's blocks are released as soon as its
+    results have been copied out. Close the iterator (e.g. with contextlib.closing) to shut the
+    pool down when the caller stops early
+    :param periods: iterable of (context, cashflows, times_to_cf, scenario_indices) per period,
+        scenario indices are rows of scenario_curves and context is passed through
+    :param scenario_curves: shocked curves of all scenarios, None when no scenario is shocked,
+        in which case there is nothing to price
+    :param workers: number of worker processes, 1 prices all periods in this process
+    :return: iterator of (context, calc_risk_measures result) per period
+    """
+    # no shared memory or pool when there is nothing to price
+    if scenario_curves is None:
+        return
+    periods = iter(periods)
+    first_period = next(periods, None)
+    if first_period is None:
+        return
+    periods = itertools.chain([first_period], periods)
+
+    if workers <= 1:
+        for context, cashflows, times_to_cf, scenario_indices in periods:
+            yield context, _price_period(
+                cashflows, times_to_cf, scenario_curves[scenario_indices]
+            )
+        return
+
+    tenors = scenario_curves.tenors
+    scenario_arrays = SharedArrays.create(
+        {"tenors": tenors, "scenario_rates": scenario_curves.rates}
+    )
+    pending = None
+    try:
+        # spawned workers don't inherit the database connections and threads of the parent
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_worker,
+            initargs=(scenario_arrays.spec,),
+        ) as executor:
+            for context, cashflows, times_to_cf, scenario_indices in periods:
+                # the next period is submitted before the previous one is handed back
+                previous, pending = pending, (
+                    context,
+                    *_submit_period(
+                        executor,
+                        cashflows,
+                        times_to_cf,
+                        scenario_indices,
+                        len(tenors),
+                        workers,
+                    ),
+                )
+                if previous is not None:
+                    yield previous[0], _collect_period(*previous[1:], tenors)
+            if pending is not None:
+                previous, pending = pending, None
+                yield previous[0], _collect_period(*previous[1:], tenors)
+    finally:
+        if pending is not None:
+            for future in pending[2]:
+                future.cancel()
+            _release(pending[1])
+        _release(scenario_arrays)
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import (
     VanillaBondSecMaster,
@@ -13,9 +14,57 @@ from .models import (
     StressScenarioDescription,
     RiskCore,
     RiskScenario,
+    ScenarioPortfolioSummary,
+    Portfolio,
+    Job,
 )
 
 
+class PortfolioNameField(serializers.SlugRelatedField):
+    """
+    Portfolio by name. Validation only reads, a portfolio that doesn't exist yet is left
+    unsaved and created by PortfolioNameMixin when the row is saved
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field="name", queryset=Portfolio.objects.all(), **kwargs)
+
+    def to_internal_value(self, data):
+        name = serializers.CharField(max_length=100).run_validation(data)
+        return Portfolio.objects.filter(name=name).first() or Portfolio(name=name)
+
+
+class PortfolioNameMixin:
+    """
+    Saves rows of serializers with a PortfolioNameField in a transaction that also creates
+    their portfolio when it doesn't exist yet, so a failed save leaves no portfolio behind
+    """
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(self._save_portfolio(validated_data))
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, self._save_portfolio(validated_data))
+
+    @staticmethod
+    def _save_portfolio(validated_data):
+        portfolio = validated_data.get("portfolio")
+        if portfolio is not None and portfolio.pk is None:
+            # another request may have created it since validation
+            validated_data["portfolio"] = Portfolio.objects.get_or_create(
+                name=portfolio.name
+            )[0]
+        return validated_data
+
+
+class PortfolioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Portfolio
+        fields = ["id", "name"]
+
+
 class VanillaBondSecMasterSerializer(serializers.ModelSerializer):
     class Meta:
         model = VanillaBondSecMaster
@@ -118,26 +167,28 @@ class StressScenarioSerializer(serializers.ModelSerializer):
         ]
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(PortfolioNameMixin, serializers.ModelSerializer):
     scenario = StressScenarioSerializer(read_only=True)
     scenario_id = serializers.PrimaryKeyRelatedField(
         queryset=StressScenario.objects.all(), source="scenario", write_only=True
     )
+    portfolio_name = PortfolioNameField(source="portfolio")
 
     class Meta:
         model = Transaction
-        fields = "__all__"
+        exclude = ["portfolio"]
 
 
-class AborPnLSerializer(serializers.ModelSerializer):
+class AborPnLSerializer(PortfolioNameMixin, serializers.ModelSerializer):
     scenario = StressScenarioSerializer(read_only=True)
     scenario_id = serializers.PrimaryKeyRelatedField(
         queryset=StressScenario.objects.all(), source="scenario", write_only=True
     )
+    portfolio_name = PortfolioNameField(source="portfolio")
 
     class Meta:
         model = AborPnL
-        fields = "__all__"
+        exclude = ["portfolio"]
 
 
 class RiskCoreSerializer(serializers.ModelSerializer):
@@ -160,6 +211,10 @@ class RiskCoreSerializer(serializers.ModelSerializer):
             "yield_to_maturity",
             "oas",
             "discounted_pv",
+            "dv01",
+            "modified_duration",
+            "convexity",
+            "key_rate_durations",
             "curve_description",
             "curve_name",
         ]
@@ -185,10 +240,14 @@ class RiskScenarioSerializer(serializers.ModelSerializer):
             "yield_to_maturity",
             "oas",
             "discounted_pv",
+            "dv01",
+            "modified_duration",
+            "convexity",
+            "key_rate_durations",
         ]
 
 
-class PositionSerializer(serializers.ModelSerializer):
+class PositionSerializer(PortfolioNameMixin, serializers.ModelSerializer):
     security = VanillaBondSecMasterSerializer(read_only=True)
     security_id = serializers.PrimaryKeyRelatedField(
         queryset=VanillaBondSecMaster.objects.all(), source="security", write_only=True
@@ -202,6 +261,7 @@ class PositionSerializer(serializers.ModelSerializer):
         required=False,
         allow_null=True,
     )
+    portfolio_name = PortfolioNameField(source="portfolio")
 
     class Meta:
         model = Position
@@ -223,7 +283,7 @@ class PositionSerializer(serializers.ModelSerializer):
         ]
 
 
-class ScenarioPositionSerializer(serializers.ModelSerializer):
+class ScenarioPositionSerializer(PortfolioNameMixin, serializers.ModelSerializer):
     scenario = StressScenarioSerializer(read_only=True)
     scenario_id = serializers.PrimaryKeyRelatedField(
         queryset=StressScenario.objects.all(), source="scenario", write_only=True
@@ -242,6 +302,7 @@ class ScenarioPositionSerializer(serializers.ModelSerializer):
         required=False,
         allow_null=True,
     )
+    portfolio_name = PortfolioNameField(source="portfolio")
 
     class Meta:
         model = ScenarioPosition
@@ -264,3 +325,23 @@ class ScenarioPositionSerializer(serializers.ModelSerializer):
             "book_value",
             "discounted_value",
         ]
+
+
+class ScenarioPortfolioSummarySerializer(serializers.ModelSerializer):
+    period_number = serializers.IntegerField(
+        source="scenario.period_number", read_only=True
+    )
+    simulation_number = serializers.IntegerField(
+        source="scenario.simulation_number", read_only=True
+    )
+    portfolio_name = serializers.CharField(source="portfolio.name", read_only=True)
+
+    class Meta:
+        model = ScenarioPortfolioSummary
+        exclude = ["portfolio"]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        exclude = ["input_file"]
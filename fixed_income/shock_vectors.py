@@ -0,0 +1,206 @@
+"""
+Packed shock vectors of stress scenarios.
+
+``CurvePointShock`` rows stay the editable and REST visible form of shocks, one row per scenario and
+curve point. For pricing, the shocks of a scenario are also packed into one float64 array on the
+scenario, ``StressScenario.shock_vector``, with one element per year of the shock tenor grid of its
+curve, ``CurveDescription.shock_tenors``, and NaN for years it doesn't shock. Loading the curves of a
+scenario set then reads one row per scenario instead of joining every shock to its curve point, base
+rates come from the curve cache.
+
+Tenor grids are only appended to, so vectors packed earlier stay valid and are padded with NaN.
+Uploads pack the scenarios they wrote. Saving or deleting a single shock, or saving or deleting a
+curve point, clears the vectors of the scenarios it affects, ``scenario_shocked_rates`` packs them
+again on the next load. Scenarios shocking points of more than one curve or as of date can't be
+packed, their shocks are read from their rows.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+import numpy as np
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .curve_cache import get_curves
+from .data_versions import deleted_directly
+from .models import CurveDescription, CurvePoint, CurvePointShock, StressScenario
+
+# scenarios read and updated at a time
+PACK_BATCH_SCENARIOS = 1000
+
+
+def pack_shock_vectors(scenario_ids: Iterable[int]):
+    """
+    Pack the shocks of stress scenarios into their shock vectors, extending the
+    shock tenor grids of their curves with years not in them yet
+    :param scenario_ids: ids of StressScenario
+    """
+    scenario_ids = sorted(set(scenario_ids))
+    shocks = defaultdict(dict)
+    curve_keys = defaultdict(set)
+    for start in range(0, len(scenario_ids), PACK_BATCH_SCENARIOS):
+        for (
+            scenario_id,
+            curve_id,
+            adate,
+            year,
+            shock_size,
+        ) in CurvePointShock.objects.filter(
+            stress_scenario_id__in=scenario_ids[start : start + PACK_BATCH_SCENARIOS]
+        ).values_list(
+            "stress_scenario_id",
+            "curve_point__curve_description_id",
+            "curve_point__adate",
+            "curve_point__year",
+            "shock_size",
+        ):
+            shocks[scenario_id][year] = shock_size
+            curve_keys[scenario_id].add((curve_id, adate))
+    packable = {
+        scenario_id: next(iter(keys))
+        for scenario_id, keys in curve_keys.items()
+        if len(keys) == 1
+    }
+
+    with transaction.atomic():
+        curves = CurveDescription.objects.select_for_update().in_bulk(
+            {curve_id for curve_id, _ in packable.values()}
+        )
+        grown = []
+        for curve in curves.values():
+            years = {
+                year
+                for scenario_id, (curve_id, _) in packable.items()
+                if curve_id == curve.id
+                for year in shocks[scenario_id]
+            }
+            new_years = sorted(years - set(curve.shock_tenors))
+            if new_years:
+                curve.shock_tenors = curve.shock_tenors + new_years
+                grown.append(curve)
+        CurveDescription.objects.bulk_update(grown, ["shock_tenors"])
+        positions = {
+            curve.id: {year: idx for idx, year in enumerate(curve.shock_tenors)}
+            for curve in curves.values()
+        }
+
+        for start in range(0, len(scenario_ids), PACK_BATCH_SCENARIOS):
+            scenarios = StressScenario.objects.in_bulk(
+                scenario_ids[start : start + PACK_BATCH_SCENARIOS]
+            )
+            for scenario_id, scenario in scenarios.items():
+                scenario.shock_curve_id, scenario.shock_adate = packable.get(
+                    scenario_id, (None, None)
+                )
+                scenario.shock_vector = None
+                if scenario_id in packable:
+                    vector = np.full(len(positions[scenario.shock_curve_id]), np.nan)
+                    for year, shock_size in shocks[scenario_id].items():
+                        vector[positions[scenario.shock_curve_id][year]] = shock_size
+                    scenario.shock_vector = vector.tobytes()
+                elif scenario_id not in shocks:
+                    scenario.shock_vector = b""
+            # upsert of whole rows, bulk_update builds a slow CASE per row and field
+            StressScenario.objects.bulk_create(
+                scenarios.values(),
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=["shock_curve", "shock_adate", "shock_vector"],
+            )
+
+
+def clear_shock_vectors(scenario_ids: Iterable[int]):
+    """Mark the shock vectors of stress scenarios as not packed"""
+    StressScenario.objects.filter(id__in=list(scenario_ids)).update(shock_vector=None)
+
+
+def scenario_shocked_rates(
+    scenarios: List[StressScenario],
+) -> Dict[int, Dict[float, float]]:
+    """
+    Shocked rates of stress scenarios, rate of a year is the base curve rate plus the shock size.
+    Scenarios not packed yet are packed first
+    :param scenarios: StressScenario records
+    :return: dictionary of scenario id to dictionary of years to shocked rates, scenarios without shocks are left out
+    """
+    not_packed = [
+        scenario.id for scenario in scenarios if scenario.shock_vector is None
+    ]
+    if not_packed:
+        pack_shock_vectors(not_packed)
+        packed = StressScenario.objects.in_bulk(not_packed)
+        scenarios = [packed.get(scenario.id, scenario) for scenario in scenarios]
+
+    packed = [scenario for scenario in scenarios if scenario.shock_vector]
+    # a few curves shared by all scenarios, read once instead of joined to every scenario
+    curves = CurveDescription.objects.in_bulk(
+        {scenario.shock_curve_id for scenario in packed}
+    )
+    curve_keys = {
+        (scenario.shock_curve_id, scenario.shock_adate) for scenario in packed
+    }
+    base_curves = get_curves(
+        (curves[curve_id].name, adate) for curve_id, adate in curve_keys
+    )
+    # (shock tenor grid, base rate of each grid year or NaN) by (curve id, adate)
+    grids = {}
+    for curve_id, adate in curve_keys:
+        grid = np.array(curves[curve_id].shock_tenors, dtype=np.float64)
+        base_rates = np.full(len(grid), np.nan)
+        base_curve = base_curves.get((curves[curve_id].name, adate))
+        if base_curve is not None:
+            rates = dict(zip(base_curve.tenors.tolist(), base_curve.rates.tolist()))
+            base_rates = np.array([rates.get(year, np.nan) for year in grid.tolist()])
+        grids[curve_id, adate] = (grid, base_rates)
+
+    shocked_rates = {}
+    for scenario in packed:
+        grid, base_rates = grids[scenario.shock_curve_id, scenario.shock_adate]
+        vector = np.frombuffer(bytes(scenario.shock_vector), dtype=np.float64)
+        # NaN where the scenario has no shock or the base curve no point
+        shocked = base_rates[: len(vector)] + vector
+        shocked_years = ~np.isnan(shocked)
+        if shocked_years.any():
+            shocked_rates[scenario.id] = dict(
+                zip(
+                    grid[: len(vector)][shocked_years].tolist(),
+                    shocked[shocked_years].tolist(),
+                )
+            )
+
+    # scenarios on more than one curve or as of date
+    unpackable = [
+        scenario.id for scenario in scenarios if scenario.shock_vector is None
+    ]
+    for start in range(0, len(unpackable), PACK_BATCH_SCENARIOS):
+        for scenario_id, year, rate, shock_size in CurvePointShock.objects.filter(
+            stress_scenario_id__in=unpackable[start : start + PACK_BATCH_SCENARIOS]
+        ).values_list(
+            "stress_scenario_id", "curve_point__year", "curve_point__rate", "shock_size"
+        ):
+            shocked_rates.setdefault(scenario_id, {})[float(year)] = rate + shock_size
+    return shocked_rates
+
+
+@receiver(post_save, sender=CurvePointShock)
+def clear_shock_vector_of_shock(instance, **kwargs):
+    clear_shock_vectors([instance.stress_scenario_id])
+
+
+@receiver(post_delete, sender=CurvePointShock)
+def clear_shock_vector_of_deleted_shock(instance, origin=None, **kwargs):
+    # shocks deleted along with their curve point are cleared by its pre_delete receiver,
+    # the ones deleted along with their scenario have no vector left to clear
+    if deleted_directly(origin, CurvePointShock):
+        clear_shock_vectors([instance.stress_scenario_id])
+
+
+@receiver(post_save, sender=CurvePoint)
+@receiver(pre_delete, sender=CurvePoint)
+def clear_shock_vectors_of_curve_point(instance, **kwargs):
+    # a saved point may have moved to another year, a deleted one takes its shocks along
+    StressScenario.objects.filter(curve_point_shocks__curve_point=instance).update(
+        shock_vector=None
+    )
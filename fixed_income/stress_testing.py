@@ -0,0 +1,36 @@
+"""
+Loading and pricing of stress scenario grids.
+
+The packed shock vectors of all stress scenarios of a description are loaded, one row per
+scenario, into a (scenarios x tenors) rate matrix, so every scenario of a period is priced in
+one pass over the shared cashflow matrix of the positions.
+"""
+
+from typing import List, Tuple
+
+from .curves import ScenarioCurves
+from .models import StressScenario, StressScenarioDescription
+from .shock_vectors import scenario_shocked_rates
+
+
+def load_scenario_curves(
+    scenario_description: StressScenarioDescription,
+) -> Tuple[List[StressScenario], ScenarioCurves]:
+    """
+    Load shocked curves of all stress scenarios of a description from their packed shock
+    vectors, reading one row per scenario and the few curves they shock.
+    Shocked rate of a tenor is the curve point rate plus the shock size,
+    scenarios without any shocks are left out
+    :param scenario_description:
+    :return: (scenarios, scenario_curves) where row i of scenario_curves belongs to scenarios[i]
+    """
+    scenarios = list(
+        StressScenario.objects.filter(scenario=scenario_description).order_by("id")
+    )
+    shocked_rates = scenario_shocked_rates(scenarios)
+    scenarios = [scenario for scenario in scenarios if scenario.id in shocked_rates]
+    if not scenarios:
+        return [], None
+    return scenarios, ScenarioCurves.from_curves(
+        [shocked_rates[scenario.id] for scenario in scenarios]
+    )
@@ -1,3 +1,2536 @@
-from django.test import TestCase
+import contextlib
+import datetime
+import inspect
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from fi_utils.bond_valuation import (
+    calc_accrued_interest,
+    calc_pv_of_vanilla_bond,
+    calculate_pv_from_ytm,
+)
+from rest_framework.response import Response
+
+from . import portfolios
+from .coupon_dates import generate_coupon_schedules, next_and_prev_coupon_dates
+from .coupon_schedule import CouponScheduleIndex, unpack_cashflows, unpack_coupon_dates
+from .curve_cache import curve_cache_stats, get_curves
+from .csv_ingestion import CSV_CHUNK_ROWS, CSVValidationError, read_csv_chunks
+from .curves import (
+    GRID_MEMO_MAX_POINTS,
+    TIME_GRID_POINTS_PER_YEAR,
+    Curve,
+    ScenarioCurves,
+)
+from .jobs import (
+    JobCancelled,
+    JobHeartbeat,
+    JobProgress,
+    cancel_job,
+    claim_next_job,
+    reclaim_stale_jobs,
+    run_job,
+)
+from .models import (
+    AborPnL,
+    CouponSchedule,
+    CurveDescription,
+    CurvePoint,
+    CurvePointShock,
+    DataVersion,
+    Job,
+    Portfolio,
+    Position,
+    RiskCore,
+    RiskScenario,
+    ScenarioPortfolioSummary,
+    ScenarioPosition,
+    StressScenario,
+    StressScenarioDescription,
+    Transaction,
+    VanillaBondSecMaster,
+)
+from .pagination import LargeTableCursorPagination
+from .portfolios import portfolio_ids
+from .portfolio_valuation import (
+    MATCH_TOLERANCE,
+    calc_pv_and_derivative_from_rate,
+    calc_pv_matrix,
+    calc_ytm_of_vanilla_bonds,
+    calc_z_spread_of_vanilla_bonds,
+    get_vanilla_bonds_cashflows,
+    price_vanilla_bonds,
+)
+from .risk_measures import aggregate_portfolio_risk, calc_risk_measures
+from .scenario_runner import iter_scenario_risk_measures
+from .serializers import CurvePointSerializer
+from .stress_testing import load_scenario_curves
+from .views import JOB_VIEWS, CurveUploadCSV, _period_end_date
+
+POSITION_DATE = datetime.date(2025, 4, 30)
+
+
+def create_rows(name, count):
+    """
+    Create a curve, a stress scenario with count periods and count securities with
+    positions, scenario positions, transactions and PnLs in every period
+    """
+    portfolio = Portfolio.objects.create(name=name)
+    curve = CurveDescription.objects.create(name=f"CURVE_{name}")
+    curve_points = [
+        CurvePoint.objects.create(
+            curve_description=curve, adate=POSITION_DATE, year=year, rate=4.0
+        )
+        for year in (1, 2, 3)
+    ]
+    description = StressScenarioDescription.objects.create(name=f"SCENARIO_{name}")
+    scenarios = []
+    for period_number in range(count):
+        scenario = StressScenario.objects.create(
+            scenario=description,
+            period_number=period_number,
+            simulation_number=0,
+            period_length=1.0,
+        )
+        for curve_point in curve_points:
+            CurvePointShock.objects.create(
+                stress_scenario=scenario, curve_point=curve_point, shock_size=0.1
+            )
+        ScenarioPortfolioSummary.objects.create(
+            portfolio=portfolio,
+            position_date=POSITION_DATE,
+            scenario=scenario,
+            period_end_date=POSITION_DATE,
+            discounted_value=100.0,
+            book_value=100.0,
+            par_value=100.0,
+            accrued_interest=1.0,
+            positions=count,
+            dv01=0.1,
+        )
+        scenarios.append(scenario)
+
+    for i in range(count):
+        security = VanillaBondSecMaster.objects.create(
+            identifier_client=f"{name}_{i}",
+            asset_name=f"Bond {name} {i}",
+            fixed_coupon=5.0,
+            maturity=datetime.date(2035, 4, 30),
+        )
+        risk_core = RiskCore.objects.create(
+            security=security,
+            curve_description=curve,
+            risk_date=POSITION_DATE,
+            price=100.0,
+            discounted_pv=100.0,
+            accrued_interest=1.0,
+        )
+        Position.objects.create(
+            portfolio=portfolio,
+            position_date=POSITION_DATE,
+            lot_id=0,
+            security=security,
+            risk_core=risk_core,
+            quantity=100.0,
+            notional_amount=100.0,
+            par_value=100.0,
+            book_price=100.0,
+            book_value=100.0,
+        )
+        for scenario in scenarios:
+            risk_scenario = RiskScenario.objects.create(
+                security=security,
+                scenario=scenario,
+                price=100.0,
+                oas=0.0,
+                discounted_pv=100.0,
+                accrued_interest=1.0,
+            )
+            ScenarioPosition.objects.create(
+                portfolio=portfolio,
+                scenario=scenario,
+                position_date=POSITION_DATE,
+                period_end_date=POSITION_DATE,
+                lot_id=0,
+                security=security,
+                quantity=100.0,
+                notional_amount=100.0,
+                par_value=100.0,
+                book_price=100.0,
+                book_value=100.0,
+                risk_scenario=risk_scenario,
+            )
+            Transaction.objects.create(
+                portfolio=portfolio,
+                security=security,
+                transaction_type="BUY",
+                transaction_date=POSITION_DATE,
+                transaction_price=100.0,
+                quantity=100.0,
+                amount=100.0,
+                lot_id=0,
+                scenario=scenario,
+            )
+            AborPnL.objects.create(
+                portfolio=portfolio,
+                security=security,
+                scenario=scenario,
+                period_date=POSITION_DATE,
+                begin_period_date=POSITION_DATE,
+                end_period_date=POSITION_DATE,
+                income_pnl=0.0,
+                amortization_accretion_pnl=0.0,
+                realized_gain_loss_pnl=0.0,
+            )
+
+
+class MigrationTests(TransactionTestCase):
+    """
+    Databases created with the baseline schema (migrate --run-syncdb) upgrade through the
+    migrations once 0001_initial is faked, repeated natural keys are merged
+    """
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("fixed_income", target)])
+        return executor.loader.project_state([("fixed_income", target)]).apps
+
+    def migrate_to_latest(self):
+        (_, latest), *_ = MigrationExecutor(connection).loader.graph.leaf_nodes(
+            "fixed_income"
+        )
+        self.migrate(latest)
+
+    def tearDown(self):
+        self.migrate_to_latest()
+
+    def test_baseline_rows_are_merged_and_migrated(self):
+        apps = self.migrate("0001_initial")
+        OldBond = apps.get_model("fixed_income", "VanillaBondSecMaster")
+        OldPosition = apps.get_model("fixed_income", "Position")
+        OldRiskCore = apps.get_model("fixed_income", "RiskCore")
+        curve = apps.get_model("fixed_income", "CurveDescription").objects.create(
+            name="CURVE_BASELINE"
+        )
+        bonds = [
+            OldBond.objects.create(
+                identifier_client="-",
+                asset_name=asset_name,
+                fixed_coupon=5.0,
+                maturity=datetime.date(2035, 4, 30),
+            )
+            for asset_name in ("Bond first", "Bond second")
+        ]
+        # the baseline upload stored every row of a file uploaded twice
+        for bond in bonds:
+            risk_core = OldRiskCore.objects.create(
+                security=bond,
+                curve_description=curve,
+                risk_date=POSITION_DATE,
+                price=100.0,
+                yield_to_maturity=5.0,
+                oas=0.0,
+                discounted_pv=100.0,
+                accrued_interest=1.0,
+            )
+            OldPosition.objects.create(
+                portfolio_name="BASELINE",
+                position_date=POSITION_DATE,
+                lot_id=0,
+                security=bond,
+                risk_core=risk_core,
+                quantity=100.0,
+                notional_amount=100.0,
+                par_value=100.0,
+                book_price=float(bond.id),
+                book_value=100.0,
+            )
+
+        self.migrate_to_latest()
+
+        bond = VanillaBondSecMaster.objects.get(identifier_client="-")
+        self.assertEqual(bond.asset_name, "Bond second")
+        self.assertEqual(RiskCore.objects.filter(security=bond).count(), 2)
+        position = Position.objects.get()
+        self.assertEqual(position.security, bond)
+        self.assertEqual(position.portfolio.name, "BASELINE")
+        self.assertEqual(position.book_price, float(bonds[1].id))
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints run a fixed number of queries, whatever the number of rows"""
+
+    # url name and number of queries: one for the rows, one per prefetch of nested curve point shocks
+    # and one for the data versions of endpoints answering conditional GETs
+    LIST_QUERIES = [
+        ("vanilla-bond-list", 1),
+        ("portfolio-list", 1),
+        ("risk-core-list", 1),
+        ("risk-scenario-list", 2),
+        ("position-list", 1),
+        ("scenario-position-list", 3),
+        ("scenario-portfolio-summary-list", 1),
+        ("transaction-list", 2),
+        ("aborpnl-list", 2),
+        ("curve-description-list", 2),
+        ("curve-point-list", 2),
+        ("curve-point-shock-list", 2),
+        ("stress-scenario-description-list", 2),
+        ("stress-scenario-list", 3),
+        ("job-list", 1),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("SMALL", 2)
+
+    def assert_list_queries(self):
+        for url_name, queries in self.LIST_QUERIES:
+            with self.subTest(url_name=url_name):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(reverse(url_name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_list_queries(self):
+        self.assert_list_queries()
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        create_rows("LARGE", 5)
+        self.assert_list_queries()
+
+
+class ListFilterTests(TestCase):
+    """Large lists are cursor paginated and filtered on their filter_fields only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("FILTER_A", 2)
+        create_rows("FILTER_B", 1)
+
+    def get(self, url_name, **params):
+        return self.client.get(reverse(url_name), params)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        ids = []
+        response = self.get("scenario-position-list", page_size=2)
+        self.assertIsNone(response.data["previous"])
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            ids.extend(row["id"] for row in response.data["results"])
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(
+            ids, sorted(ScenarioPosition.objects.values_list("id", flat=True))
+        )
+        self.assertEqual(len(ids), 5)
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([row["id"] for row in response.data["results"]], ids[-3:-1])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(LargeTableCursorPagination, "max_page_size", 2):
+            response = self.get("risk-scenario-list", page_size=4)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_filters(self):
+        for url_name, params, rows in [
+            ("position-list", {"portfolio_name": "FILTER_A"}, 2),
+            ("position-list", {"security": "FILTER_A_0"}, 1),
+            ("position-list", {"position_date": "2025-04-30"}, 3),
+            ("position-list", {"curve_name": "CURVE_FILTER_B"}, 1),
+            ("risk-core-list", {"security": "FILTER_A_1"}, 1),
+            ("risk-core-list", {"risk_date": "2025-04-30"}, 3),
+            ("risk-core-list", {"curve_name": "CURVE_FILTER_A"}, 2),
+            ("risk-scenario-list", {"scenario_name": "SCENARIO_FILTER_A"}, 4),
+            (
+                "risk-scenario-list",
+                {"scenario_name": "SCENARIO_FILTER_A", "period_number": 1},
+                2,
+            ),
+            ("risk-scenario-list", {"simulation_number": 0}, 5),
+            ("risk-scenario-list", {"security": "FILTER_B_0"}, 1),
+            ("curve-point-shock-list", {"scenario_name": "SCENARIO_FILTER_A"}, 6),
+            ("curve-point-shock-list", {"period_number": 0}, 6),
+            ("curve-point-shock-list", {"simulation_number": 0}, 9),
+            ("curve-point-shock-list", {"curve_name": "CURVE_FILTER_B"}, 3),
+            ("curve-point-shock-list", {"adate": "2025-04-30"}, 9),
+            ("scenario-position-list", {"portfolio_name": "FILTER_A"}, 4),
+            ("scenario-position-list", {"position_date": "2025-04-30"}, 5),
+            ("scenario-position-list", {"period_end_date": "2025-04-30"}, 5),
+            (
+                "scenario-position-list",
+                {"scenario_name": "SCENARIO_FILTER_B", "security": "FILTER_B_0"},
+                1,
+            ),
+            (
+                "scenario-position-list",
+                {"portfolio_name": "FILTER_A", "period_number": 0, "page_size": 1},
+                1,
+            ),
+            ("scenario-position-list", {"simulation_number": 1}, 0),
+        ]:
+            with self.subTest(url_name=url_name, params=params):
+                response = self.get(url_name, **params)
+                self.assertEqual(response.status_code, 200, response.data)
+                self.assertEqual(len(response.data["results"]), rows)
+
+    def test_unknown_and_invalid_filters_are_rejected(self):
+        for url_name, params in [
+            ("position-list", {"portfolio": "FILTER_A"}),
+            ("position-list", {"position_date": "2025-02-30"}),
+            ("risk-core-list", {"curve": "CURVE_FILTER_A"}),
+            ("risk-core-list", {"risk_date": "yesterday"}),
+            ("risk-scenario-list", {"period": 1}),
+            ("risk-scenario-list", {"period_number": "first"}),
+            ("curve-point-shock-list", {"scenario": "SCENARIO_FILTER_A"}),
+            ("curve-point-shock-list", {"simulation_number": "1.5"}),
+            ("scenario-position-list", {"portfolio_name": "FILTER_A", "date": "x"}),
+            ("scenario-position-list", {"period_end_date": "2025-13-01"}),
+        ]:
+            with self.subTest(url_name=url_name, params=params):
+                response = self.get(url_name, **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("filter", response.data["error"])
+
+
+class CurveCacheTests(TestCase):
+    """Curves are served from the curve cache until their points change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("CACHE", 1)
+        cls.curve_key = ("CURVE_CACHE", POSITION_DATE)
+
+    def test_cached_curves_make_no_queries(self):
+        get_curves([self.curve_key])
+        hits = curve_cache_stats()["hits"]
+        with self.assertNumQueries(0):
+            curves = get_curves([self.curve_key])
+        self.assertEqual(curve_cache_stats()["hits"], hits + 1)
+        self.assertEqual(list(curves[self.curve_key].rates), [4.0, 4.0, 4.0])
+
+    def test_saved_curve_point_invalidates_curves(self):
+        get_curves([self.curve_key])
+        curve_point = CurvePoint.objects.get(
+            curve_description__name="CURVE_CACHE", year=2
+        )
+        curve_point.rate = 5.0
+        curve_point.save()
+        with self.assertNumQueries(1):
+            curves = get_curves([self.curve_key])
+        self.assertEqual(list(curves[self.curve_key].rates), [4.0, 5.0, 4.0])
+
+    def test_filtered_curve_matches_curve_points(self):
+        url = reverse("filtered-curve", args=["CURVE_CACHE", POSITION_DATE.isoformat()])
+        self.client.get(url)
+        # only the data version of the ETag
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        points = CurvePoint.objects.filter(
+            curve_description__name="CURVE_CACHE"
+        ).order_by("year")
+        self.assertEqual(response.data, CurvePointSerializer(points, many=True).data)
+
+
+class ConditionalGetTests(TestCase):
+    """Curve and stress scenario endpoints answer 304 until their data changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("ETAG", 1)
+
+    def test_unchanged_data_is_not_modified(self):
+        for url in [
+            reverse("filtered-curve", args=["CURVE_ETAG", POSITION_DATE.isoformat()]),
+            reverse("stress-scenario-list"),
+            reverse("curve-point-shock-list"),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header("Last-Modified"))
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+    def test_changed_data_is_sent_again(self):
+        url = reverse("curve-point-shock-list")
+        etag = self.client.get(url)["ETag"]
+        shock = CurvePointShock.objects.first()
+        shock.shock_size = 0.2
+        shock.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        CurvePoint.objects.filter(curve_description__name="CURVE_ETAG").first().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ShockVectorTests(TestCase):
+    """Stress scenario curves load from packed shock vectors, edited shocks are packed again"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("VECTOR", 2)
+        cls.description = StressScenarioDescription.objects.get(name="SCENARIO_VECTOR")
+
+    def test_packed_vectors_price_like_shocks(self):
+        scenarios, scenario_curves = load_scenario_curves(self.description)
+        self.assertEqual(len(scenarios), 2)
+        self.assertEqual(list(scenario_curves.tenors), [1.0, 2.0, 3.0])
+        self.assertEqual(scenario_curves.rates.tolist(), [[4.1, 4.1, 4.1]] * 2)
+        self.assertEqual(
+            CurveDescription.objects.get(name="CURVE_VECTOR").shock_tenors, [1, 2, 3]
+        )
+        # scenarios and their curve description, base rates are cached
+        with self.assertNumQueries(2):
+            load_scenario_curves(self.description)
+
+    def test_saved_shock_is_packed_again(self):
+        load_scenario_curves(self.description)
+        shock = CurvePointShock.objects.get(
+            stress_scenario__period_number=1, curve_point__year=2
+        )
+        shock.shock_size = 0.3
+        shock.save()
+        self.assertIsNone(StressScenario.objects.get(period_number=1).shock_vector)
+        _, scenario_curves = load_scenario_curves(self.description)
+        self.assertEqual(scenario_curves.rates[1].tolist(), [4.1, 4.3, 4.1])
+
+    def stress_scenarios_version(self):
+        return DataVersion.objects.get(name=DataVersion.STRESS_SCENARIOS).version
+
+    def test_deleted_shock_is_packed_again(self):
+        shock = CurvePointShock.objects.get(
+            stress_scenario__period_number=1, curve_point__year=2
+        )
+        shock.shock_size = 0.3
+        shock.save()
+        _, scenario_curves = load_scenario_curves(self.description)
+        self.assertEqual(scenario_curves.rates[1].tolist(), [4.1, 4.3, 4.1])
+
+        version = self.stress_scenarios_version()
+        CurvePointShock.objects.filter(id=shock.id).delete()
+        self.assertIsNone(StressScenario.objects.get(period_number=1).shock_vector)
+        self.assertEqual(self.stress_scenarios_version(), version + 1)
+        # year 2 is interpolated between the remaining shocked points
+        _, scenario_curves = load_scenario_curves(self.description)
+        self.assertEqual(scenario_curves.rates[1].tolist(), [4.1, 4.1, 4.1])
+
+        CurvePointShock.objects.filter(
+            stress_scenario__period_number=0
+        ).first().delete()
+        self.assertIsNone(StressScenario.objects.get(period_number=0).shock_vector)
+        self.assertEqual(self.stress_scenarios_version(), version + 2)
+
+    def test_deleted_scenario_set_bumps_version_once(self):
+        load_scenario_curves(self.description)
+        version = self.stress_scenarios_version()
+        self.description.delete()
+        self.assertEqual(self.stress_scenarios_version(), version + 1)
+        self.assertFalse(
+            CurvePointShock.objects.filter(
+                curve_point__curve_description__name="CURVE_VECTOR"
+            ).exists()
+        )
+
+    def test_shocks_of_more_than_one_curve_are_not_packed(self):
+        scenario = StressScenario.objects.get(period_number=0)
+        curve_point = CurvePoint.objects.create(
+            curve_description=CurveDescription.objects.create(name="CURVE_OTHER"),
+            adate=POSITION_DATE,
+            year=4,
+            rate=5.0,
+        )
+        CurvePointShock.objects.create(
+            stress_scenario=scenario, curve_point=curve_point, shock_size=0.1
+        )
+        _, scenario_curves = load_scenario_curves(self.description)
+        self.assertIsNone(StressScenario.objects.get(id=scenario.id).shock_vector)
+        self.assertEqual(scenario_curves.rates[0].tolist(), [4.1, 4.1, 4.1, 5.1])
+
+
+class StressTrendTests(TestCase):
+    """Trend dates follow period_number and period_length, also for fractional periods"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("TREND", 2)
+        StressScenario.objects.filter(scenario__name="SCENARIO_TREND").update(
+            period_length=0.5
+        )
+        portfolio = Portfolio.objects.get(name="TREND")
+        for simulation_number, discounted_value in [(1, 200.0), (2, 300.0)]:
+            for period_number in range(2):
+                ScenarioPortfolioSummary.objects.create(
+                    portfolio=portfolio,
+                    position_date=POSITION_DATE,
+                    scenario=StressScenario.objects.create(
+                        scenario=StressScenarioDescription.objects.get(
+                            name="SCENARIO_TREND"
+                        ),
+                        period_number=period_number,
+                        simulation_number=simulation_number,
+                        period_length=0.5,
+                    ),
+                    period_end_date=POSITION_DATE,
+                    discounted_value=discounted_value,
+                    book_value=100.0,
+                    par_value=100.0,
+                    accrued_interest=1.0,
+                    positions=1,
+                    dv01=0.1,
+                )
+
+    def trend(self, **extra):
+        return self.client.post(
+            reverse("portfolio-stress-trend"),
+            {
+                "portfolio": "TREND",
+                "position_date": POSITION_DATE.isoformat(),
+                "scenario_name": "SCENARIO_TREND",
+                **extra,
+            },
+            content_type="application/json",
+        )
+
+    def test_period_end_dates(self):
+        for position_date, period_number, period_length, expected in [
+            (POSITION_DATE, 0, 1.0, datetime.date(2026, 4, 30)),
+            (POSITION_DATE, 2, 1.0, datetime.date(2028, 4, 30)),
+            (POSITION_DATE, 1, 0.25, datetime.date(2025, 10, 30)),
+            (datetime.date(2025, 8, 31), 0, 0.5, datetime.date(2026, 2, 28)),
+            (POSITION_DATE, 0, 1 / 52, datetime.date(2025, 5, 7)),
+        ]:
+            with self.subTest(period_number=period_number, period_length=period_length):
+                self.assertEqual(
+                    _period_end_date(position_date, period_number, period_length),
+                    expected,
+                )
+
+    def test_trend_of_semiannual_periods(self):
+        response = self.trend()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (row["period_number"], row["simulation_number"], row["date"])
+                for row in response.data
+            ],
+            [
+                (0, 0, "2025-10-30"),
+                (0, 1, "2025-10-30"),
+                (0, 2, "2025-10-30"),
+                (1, 0, "2026-04-30"),
+                (1, 1, "2026-04-30"),
+                (1, 2, "2026-04-30"),
+            ],
+        )
+        self.assertEqual(
+            [row["market_value"] for row in response.data],
+            [100.0, 200.0, 300.0] * 2,
+        )
+
+    def test_percentile_bands(self):
+        response = self.trend(percentiles=[0, 50, 100])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["trend"]), 6)
+        self.assertEqual(
+            response.data["percentile_bands"],
+            [
+                {
+                    "date": date,
+                    "period_number": period_number,
+                    "simulations": 3,
+                    "p0": 100.0,
+                    "p50": 200.0,
+                    "p100": 300.0,
+                }
+                for period_number, date in [(0, "2025-10-30"), (1, "2026-04-30")]
+            ],
+        )
+        self.assertEqual(self.trend(percentiles=[101]).status_code, 400)
+
+    def test_unknown_portfolio_and_scenario(self):
+        response = self.trend(portfolio="UNKNOWN")
+        self.assertEqual([row["market_value"] for row in response.data], [0.0] * 6)
+        self.assertEqual(self.trend(scenario_name="UNKNOWN").status_code, 404)
+
+    def test_generation_of_semiannual_periods(self):
+        response = self.client.post(
+            reverse("generate-scenario-positions"),
+            {
+                "portfolio_name": "TREND",
+                "position_date": POSITION_DATE.isoformat(),
+                "scenario_name": "SCENARIO_TREND",
+                "workers": 1,
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            sorted(
+                ScenarioPortfolioSummary.objects.filter(
+                    portfolio__name="TREND", scenario__simulation_number=0
+                ).values_list("scenario__period_number", "period_end_date")
+            ),
+            [(0, datetime.date(2025, 10, 30)), (1, datetime.date(2026, 4, 30))],
+        )
+
+
+class CouponScheduleTests(TestCase):
+    """Stored coupon schedules give the coupon dates around as of dates and follow edited terms"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.month_end = VanillaBondSecMaster.objects.create(
+            identifier_client="MONTH_END",
+            asset_name="Month end",
+            fixed_coupon=4.0,
+            frequency=2,
+            maturity=datetime.date(2035, 8, 31),
+        )
+        cls.first_of_month = VanillaBondSecMaster.objects.create(
+            identifier_client="FIRST",
+            asset_name="First of month",
+            fixed_coupon=6.0,
+            frequency=4,
+            maturity=datetime.date(2030, 3, 1),
+        )
+
+    def coupon_dates(self, security, adate):
+        next_dates, prev_dates = CouponScheduleIndex.from_db(
+            [security.id]
+        ).next_and_prev_coupon_dates([security.id], adate)
+        return next_dates[0].item(), prev_dates[0].item()
+
+    def test_coupon_dates_at_month_end(self):
+        for adate, expected in [
+            # February coupons fall on its last day, also in leap years
+            (
+                datetime.date(2026, 1, 15),
+                (datetime.date(2026, 2, 28), datetime.date(2025, 8, 31)),
+            ),
+            (
+                datetime.date(2028, 2, 29),
+                (datetime.date(2028, 2, 29), datetime.date(2028, 2, 29)),
+            ),
+            (
+                datetime.date(2028, 3, 1),
+                (datetime.date(2028, 8, 31), datetime.date(2028, 2, 29)),
+            ),
+            (
+                datetime.date(2035, 8, 31),
+                (datetime.date(2035, 8, 31), datetime.date(2035, 8, 31)),
+            ),
+        ]:
+            with self.subTest(adate=adate):
+                self.assertEqual(self.coupon_dates(self.month_end, adate), expected)
+
+    def test_coupon_dates_on_first_of_month(self):
+        for adate, expected in [
+            (
+                datetime.date(2026, 3, 1),
+                (datetime.date(2026, 3, 1), datetime.date(2026, 3, 1)),
+            ),
+            (
+                datetime.date(2026, 3, 2),
+                (datetime.date(2026, 6, 1), datetime.date(2026, 3, 1)),
+            ),
+            (
+                datetime.date(2026, 2, 28),
+                (datetime.date(2026, 3, 1), datetime.date(2025, 12, 1)),
+            ),
+        ]:
+            with self.subTest(adate=adate):
+                self.assertEqual(
+                    self.coupon_dates(self.first_of_month, adate), expected
+                )
+
+    def test_saved_terms_regenerate_schedule(self):
+        response = self.client.patch(
+            reverse("vanilla-bond-detail", args=[self.month_end.id]),
+            {"maturity": "2031-02-28", "fixed_coupon": 5.0},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        schedule = CouponSchedule.objects.get(security=self.month_end)
+        self.assertEqual(
+            unpack_coupon_dates(schedule.coupon_dates)[-2:].tolist(),
+            [datetime.date(2030, 8, 28), datetime.date(2031, 2, 28)],
+        )
+        self.assertEqual(unpack_cashflows(schedule.cashflows)[-1], 102.5)
+
+        # only the update, terms didn't change
+        self.first_of_month.asset_name = "Renamed"
+        with self.assertNumQueries(1):
+            self.first_of_month.save(update_fields=["asset_name"])
+
+
+class JobTests(TestCase):
+    """Uploads queued as jobs are stored in file storage and run by a worker"""
+
+    csv = b"adate,curve_name,year,rate\n2025-04-30,CURVE_JOB,1,0.04\n2025-04-30,CURVE_JOB,2,0.045\n"
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def submit(self):
+        response = self.client.post(
+            reverse("upload-curve"),
+            {"file": SimpleUploadedFile("curve.csv", self.csv), "async": "true"},
+        )
+        self.assertEqual(response.status_code, 202)
+        return Job.objects.get(pk=response.data["job_id"])
+
+    def test_submit_stores_upload_in_file_storage(self):
+        job = self.submit()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.input_filename, "curve.csv")
+        with job.input_file.open("rb") as file_obj:
+            self.assertEqual(file_obj.read(), self.csv)
+
+    def test_claim_and_run(self):
+        job = self.submit()
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next_job())
+        file_name = claimed.input_file.name
+
+        finished = run_job(claimed, JOB_VIEWS[claimed.job_type])
+        self.assertEqual(finished.status, Job.SUCCEEDED, finished.error)
+        self.assertEqual(finished.result["points"], 2)
+        self.assertEqual(finished.rows_written, 2)
+        self.assertEqual(
+            CurvePoint.objects.filter(curve_description__name="CURVE_JOB").count(), 2
+        )
+        # the upload is not kept once the job finished
+        self.assertFalse(finished.input_file)
+        self.assertFalse(finished.input_file.storage.exists(file_name))
+
+    def test_cancel_queued_job(self):
+        job = self.submit()
+        file_name = job.input_file.name
+        response = self.client.post(reverse("job-cancel", args=[job.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], Job.CANCELLED)
+        self.assertIsNone(claim_next_job())
+        self.assertFalse(job.input_file.storage.exists(file_name))
+
+        response = self.client.post(reverse("job-cancel", args=[job.id]))
+        self.assertEqual(response.status_code, 409)
+
+    def test_cancelled_upload_stops_between_chunks(self):
+        self.submit()
+        job = claim_next_job()
+        self.assertTrue(cancel_job(job))
+        with job.input_file.open("rb") as file_obj:
+            with self.assertRaises(JobCancelled):
+                CurveUploadCSV().process(
+                    {}, file_obj, progress=JobProgress(job.id, flush_interval=0)
+                )
+        # the rows written before the cancellation are rolled back
+        self.assertFalse(CurveDescription.objects.filter(name="CURVE_JOB").exists())
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = self.submit()
+        claim_next_job()
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(seconds=120)
+        )
+        # heartbeat recent enough
+        self.assertEqual(reclaim_stale_jobs(stale_seconds=300, max_attempts=2), 0)
+
+        self.assertEqual(reclaim_stale_jobs(stale_seconds=60, max_attempts=2), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIsNone(job.worker_pid)
+
+        # the second worker dies as well, the job is not queued a third time
+        claim_next_job()
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(seconds=120)
+        )
+        self.assertEqual(reclaim_stale_jobs(stale_seconds=60, max_attempts=2), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(job.input_file)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    """
+    Running jobs keep their heartbeat current while a step reports no progress, the
+    heartbeat thread writes through its own connection so the rows have to be committed
+    """
+
+    def stale_job(self, status=Job.RUNNING):
+        return Job.objects.create(
+            job_type=Job.UPLOAD_CURVE,
+            status=status,
+            heartbeat_at=timezone.now() - datetime.timedelta(seconds=120),
+        )
+
+    def wait_for_heartbeat(self, job, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            heartbeat_at = Job.objects.get(pk=job.pk).heartbeat_at
+            if heartbeat_at != job.heartbeat_at:
+                return heartbeat_at
+            time.sleep(0.01)
+        self.fail("No heartbeat was written")
+
+    @override_settings(JOB_HEARTBEAT_SECONDS=0.01)
+    def test_job_without_progress_is_not_reclaimed(self):
+        job = self.stale_job()
+        test = self
+
+        class SilentView:
+            def process(self, data, file_obj, progress):
+                # a long step that never reports progress
+                test.assertGreater(test.wait_for_heartbeat(job), job.heartbeat_at)
+                test.assertEqual(reclaim_stale_jobs(stale_seconds=60), 0)
+                return Response({"done": True})
+
+        finished = run_job(job, SilentView)
+        self.assertEqual(finished.status, Job.SUCCEEDED, finished.error)
+        self.assertFalse(
+            any(
+                thread.name == f"job-{job.id}-heartbeat"
+                for thread in threading.enumerate()
+            )
+        )
+
+    def test_reclaimed_job_gets_no_heartbeat(self):
+        job = self.stale_job(status=Job.QUEUED)
+        with JobHeartbeat(job.id, interval=0.01):
+            time.sleep(0.1)
+        self.assertEqual(Job.objects.get(pk=job.pk).heartbeat_at, job.heartbeat_at)
+
+
+class OnConflictTests(TestCase):
+    """Uploads update, skip or reject rows whose natural key exists"""
+
+    curve_csv = (
+        "adate,curve_name,year,rate\n"
+        "2025-04-30,CURVE_CONFLICT,1,0.04\n"
+        "2025-04-30,CURVE_CONFLICT,2,0.045\n"
+    )
+    bonds_csv = (
+        "identifier_client,asset_name,fixed_coupon,maturity\n"
+        "CONFLICT_1,Bond 1,4.0,2030-06-15\n"
+        "CONFLICT_2,Bond 2,5.0,2032-06-15\n"
+    )
+
+    def upload(self, url_name, csv, on_conflict=None):
+        data = {"file": SimpleUploadedFile("upload.csv", csv.encode())}
+        if on_conflict:
+            data["on_conflict"] = on_conflict
+        return self.client.post(reverse(url_name), data)
+
+    def test_curve_points(self):
+        response = self.upload("upload-curve", self.curve_csv)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["points_created"], 2)
+        self.assertEqual(response.data["points_updated"], 0)
+
+        # the second point is new, the first one exists and is repeated in the file
+        csv = (
+            "adate,curve_name,year,rate\n"
+            "2025-04-30,CURVE_CONFLICT,1,0.05\n"
+            "2025-04-30,CURVE_CONFLICT,1,0.06\n"
+            "2025-04-30,CURVE_CONFLICT,3,0.05\n"
+        )
+        for on_conflict, status_code, counts, rate in [
+            ("error", 400, None, 0.04),
+            ("skip", 201, (1, 0, 2), 0.04),
+            ("update", 201, (0, 2, 1), 0.06),
+        ]:
+            with self.subTest(on_conflict=on_conflict):
+                response = self.upload("upload-curve", csv, on_conflict)
+                self.assertEqual(response.status_code, status_code, response.data)
+                if counts:
+                    self.assertEqual(
+                        (
+                            response.data["points_created"],
+                            response.data["points_updated"],
+                            response.data["rows_skipped"],
+                        ),
+                        counts,
+                    )
+                self.assertEqual(
+                    CurvePoint.objects.get(
+                        curve_description__name="CURVE_CONFLICT", year=1
+                    ).rate,
+                    rate,
+                )
+        self.assertEqual(
+            CurvePoint.objects.filter(curve_description__name="CURVE_CONFLICT").count(),
+            3,
+        )
+
+    def test_securities(self):
+        self.upload("upload-vanilla-bonds", self.bonds_csv)
+        csv = self.bonds_csv.replace("Bond 1,4.0", "Bond 1,4.5") + (
+            "CONFLICT_3,Bond 3,6.0,2034-06-15\n"
+        )
+        for on_conflict, status_code, counts, coupon in [
+            ("error", 400, None, 4.0),
+            ("skip", 201, (1, 0, 2), 4.0),
+            ("update", 201, (0, 3, 0), 4.5),
+        ]:
+            with self.subTest(on_conflict=on_conflict):
+                response = self.upload("upload-vanilla-bonds", csv, on_conflict)
+                self.assertEqual(response.status_code, status_code, response.data)
+                if counts:
+                    self.assertEqual(
+                        (
+                            response.data["records_created"],
+                            response.data["records_updated"],
+                            response.data["rows_skipped"],
+                        ),
+                        counts,
+                    )
+                self.assertEqual(
+                    VanillaBondSecMaster.objects.get(
+                        identifier_client="CONFLICT_1"
+                    ).fixed_coupon,
+                    coupon,
+                )
+
+    def test_unknown_mode(self):
+        response = self.upload("upload-curve", self.curve_csv, "replace")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            CurveDescription.objects.filter(name="CURVE_CONFLICT").exists()
+        )
+
+
+class PositionUploadTests(TestCase):
+    """Position uploads price one RiskCore per security, date and curve for all their lots"""
+
+    # securities, portfolios, curve descriptions and coupon schedules, then a savepoint around
+    # the RiskCore insert, the conflict lookup and the position insert. Curves come from the cache
+    UPLOAD_QUERIES = 9
+
+    @classmethod
+    def setUpTestData(cls):
+        curve = CurveDescription.objects.create(name="CURVE_POS")
+        for year, rate in [(1, 4.0), (2, 4.2), (10, 4.6)]:
+            CurvePoint.objects.create(
+                curve_description=curve, adate=POSITION_DATE, year=year, rate=rate
+            )
+        for i, (fixed_coupon, maturity) in enumerate(
+            [
+                (4.0, datetime.date(2030, 6, 15)),
+                (5.0, datetime.date(2033, 6, 15)),
+                (3.5, datetime.date(2028, 1, 15)),
+            ]
+        ):
+            VanillaBondSecMaster.objects.create(
+                identifier_client=f"POS_{i}",
+                asset_name=f"Position bond {i}",
+                fixed_coupon=fixed_coupon,
+                maturity=maturity,
+            )
+
+    @staticmethod
+    def positions_csv(rows, lot_ids=True):
+        header = "portfolio_name,position_date,identifier_client,quantity,book_price,curve_name"
+        lines = [header + (",lot_id" if lot_ids else "")]
+        for portfolio_name, identifier, quantity, book_price, lot_id in rows:
+            line = f"{portfolio_name},2025-04-30,{identifier},{quantity},{book_price},CURVE_POS"
+            lines.append(line + (f",{lot_id}" if lot_ids else ""))
+        return "\n".join(lines) + "\n"
+
+    def upload(self, csv, on_conflict=None):
+        data = {"file": SimpleUploadedFile("positions.csv", csv.encode())}
+        if on_conflict:
+            data["on_conflict"] = on_conflict
+        return self.client.post(reverse("upload-positions"), data)
+
+    def test_one_risk_core_per_security_date_and_curve(self):
+        response = self.upload(
+            self.positions_csv(
+                [
+                    ("POS_BOOK", "POS_0", 100.0, 98.0, 0),
+                    ("POS_BOOK", "POS_0", 300.0, 102.0, 1),
+                    ("POS_BOOK", "POS_1", 200.0, 101.0, ""),
+                ]
+            )
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            (
+                response.data["positions_created"],
+                response.data["positions_updated"],
+                response.data["risk_cores"],
+            ),
+            (3, 0, 2),
+        )
+        positions = {
+            (position.security.identifier_client, position.lot_id): position
+            for position in Position.objects.filter(
+                portfolio__name="POS_BOOK"
+            ).select_related("security", "risk_core")
+        }
+        # an empty lot_id is lot 0
+        self.assertEqual(set(positions), {("POS_0", 0), ("POS_0", 1), ("POS_1", 0)})
+        risk_core = positions[("POS_0", 0)].risk_core
+        self.assertEqual(positions[("POS_0", 1)].risk_core_id, risk_core.id)
+        # priced at the quantity weighted book price of the lots
+        self.assertAlmostEqual(risk_core.price, 101.0)
+        self.assertEqual(risk_core.curve_description.name, "CURVE_POS")
+        self.assertEqual(risk_core.risk_date, POSITION_DATE)
+        for position in positions.values():
+            self.assertAlmostEqual(
+                position.notional_amount, position.quantity * position.book_price / 100
+            )
+            self.assertAlmostEqual(
+                position.discounted_value,
+                position.quantity * position.risk_core.discounted_pv / 100,
+            )
+        self.assertEqual(
+            RiskCore.objects.filter(security__identifier_client="POS_0").count(), 1
+        )
+
+    def test_positions_without_lot_ids_are_lot_zero(self):
+        response = self.upload(
+            self.positions_csv([("POS_LOTLESS", "POS_2", 50.0, 99.5, None)], False)
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            list(
+                Position.objects.filter(portfolio__name="POS_LOTLESS").values_list(
+                    "lot_id", flat=True
+                )
+            ),
+            [0],
+        )
+
+    def test_both_passes_read_every_chunk(self):
+        rows = [
+            ("POS_CHUNKS", "POS_0", 100.0, 98.0, 0),
+            ("POS_CHUNKS", "POS_1", 200.0, 101.0, 0),
+            ("POS_CHUNKS", "POS_0", 300.0, 102.0, 1),
+        ]
+        with mock.patch(
+            "fixed_income.views.read_csv_chunks",
+            side_effect=lambda *args, **kwargs: read_csv_chunks(
+                *args, **kwargs, chunk_rows=2
+            ),
+        ):
+            # unknown identifiers of every chunk are reported and nothing is written
+            response = self.upload(
+                self.positions_csv(rows + [("POS_CHUNKS", "UNKNOWN", 1.0, 100.0, 0)])
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("UNKNOWN", response.data["error"])
+            self.assertFalse(Portfolio.objects.filter(name="POS_CHUNKS").exists())
+
+            response = self.upload(self.positions_csv(rows))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["positions_created"], 3)
+        # lots of POS_0 in both chunks share one RiskCore
+        lots = Position.objects.filter(
+            portfolio__name="POS_CHUNKS", security__identifier_client="POS_0"
+        )
+        self.assertEqual(len({lot.risk_core_id for lot in lots}), 1)
+        self.assertAlmostEqual(lots[0].risk_core.price, 101.0)
+
+    def test_on_conflict_modes(self):
+        self.upload(
+            self.positions_csv(
+                [
+                    ("POS_CONFLICT", "POS_0", 100.0, 98.0, 0),
+                    ("POS_CONFLICT", "POS_1", 200.0, 101.0, 0),
+                ]
+            )
+        )
+        original_risk_cores = set(
+            Position.objects.filter(portfolio__name="POS_CONFLICT").values_list(
+                "risk_core_id", flat=True
+            )
+        )
+        csv = self.positions_csv(
+            [
+                ("POS_CONFLICT", "POS_0", 150.0, 98.0, 0),
+                ("POS_CONFLICT", "POS_2", 50.0, 99.0, 0),
+            ]
+        )
+        for on_conflict, status_code, counts, quantity in [
+            ("error", 400, None, 100.0),
+            ("skip", 201, (1, 0, 1), 100.0),
+            # the position skipped before is updated with the rest
+            ("update", 201, (0, 2, 0), 150.0),
+        ]:
+            with self.subTest(on_conflict=on_conflict):
+                response = self.upload(csv, on_conflict)
+                self.assertEqual(response.status_code, status_code, response.data)
+                if counts:
+                    self.assertEqual(
+                        (
+                            response.data["positions_created"],
+                            response.data["positions_updated"],
+                            response.data["rows_skipped"],
+                        ),
+                        counts,
+                    )
+                position = Position.objects.get(
+                    portfolio__name="POS_CONFLICT", security__identifier_client="POS_0"
+                )
+                self.assertEqual(position.quantity, quantity)
+        self.assertEqual(
+            Position.objects.filter(portfolio__name="POS_CONFLICT").count(), 3
+        )
+        # the updated position got a new RiskCore and its old one was deleted
+        self.assertNotIn(position.risk_core_id, original_risk_cores)
+        self.assertFalse(
+            RiskCore.objects.filter(
+                id__in=original_risk_cores
+                - set(Position.objects.values_list("risk_core_id", flat=True))
+            ).exists()
+        )
+
+    def test_queries_do_not_grow_with_rows(self):
+        # warm the curve cache and the portfolio ids
+        self.upload(self.positions_csv([("POS_QUERIES", "POS_0", 1.0, 100.0, 0)]))
+        for lots in (1, 5):
+            rows = [
+                ("POS_QUERIES", f"POS_{i % 3}", 10.0, 100.0, lots * 10 + i)
+                for i in range(3 * lots)
+            ]
+            with self.subTest(rows=len(rows)):
+                with self.assertNumQueries(self.UPLOAD_QUERIES):
+                    response = self.upload(self.positions_csv(rows))
+                self.assertEqual(response.status_code, 201, response.data)
+
+
+class RiskCoreUploadTests(TestCase):
+    """RiskCore uploads price every distinct security, price, date and curve once"""
+
+    curve = {1: 4.0, 2: 4.2, 10: 4.6}
+
+    @classmethod
+    def setUpTestData(cls):
+        curve = CurveDescription.objects.create(name="CURVE_RC")
+        for year, rate in cls.curve.items():
+            CurvePoint.objects.create(
+                curve_description=curve, adate=POSITION_DATE, year=year, rate=rate
+            )
+        cls.securities = [
+            VanillaBondSecMaster.objects.create(
+                identifier_client=f"RC_{i}",
+                asset_name=f"Risk core bond {i}",
+                fixed_coupon=fixed_coupon,
+                maturity=maturity,
+            )
+            for i, (fixed_coupon, maturity) in enumerate(
+                [
+                    (4.0, datetime.date(2030, 6, 15)),
+                    (5.0, datetime.date(2033, 6, 15)),
+                ]
+            )
+        ]
+
+    def upload(self, rows, curve_name="CURVE_RC"):
+        csv = "identifier_client,adate,price,curve_name\n" + "".join(
+            f"{identifier},2025-04-30,{price},{curve_name}\n"
+            for identifier, price in rows
+        )
+        return self.client.post(
+            reverse("upload-calc-risk-cores"),
+            {"file": SimpleUploadedFile("risk_cores.csv", csv.encode())},
+        )
+
+    def test_repeated_rows_are_priced_once(self):
+        rows = [
+            ("RC_0", 98.5),
+            ("UNKNOWN_1", 100.0),
+            ("RC_0", 98.5),
+            ("RC_0", 99.0),
+            ("RC_1", 101.0),
+            ("RC_0", 98.5),
+            ("UNKNOWN_0", 100.0),
+        ]
+        # repeats within a chunk and across chunks
+        with mock.patch(
+            "fixed_income.views.read_csv_chunks",
+            side_effect=lambda *args, **kwargs: read_csv_chunks(
+                *args, **kwargs, chunk_rows=3
+            ),
+        ):
+            response = self.upload(rows)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["records_created"], 3)
+        self.assertEqual(response.data["duplicate_rows"], 2)
+        self.assertEqual(
+            response.data["skipped_identifiers"], ["UNKNOWN_0", "UNKNOWN_1"]
+        )
+        self.assertEqual(
+            sorted(
+                RiskCore.objects.values_list("security__identifier_client", "price")
+            ),
+            [("RC_0", 98.5), ("RC_0", 99.0), ("RC_1", 101.0)],
+        )
+
+    def test_risk_fields_are_stored(self):
+        prices = np.array([98.5, 101.0])
+        response = self.upload([("RC_0", prices[0]), ("RC_1", prices[1])])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["ytm_not_converged"], [])
+        self.assertEqual(response.data["spread_not_converged"], [])
+
+        curve = Curve.from_dict(self.curve)
+        valuation = price_vanilla_bonds(
+            POSITION_DATE,
+            [security.maturity for security in self.securities],
+            [security.fixed_coupon for security in self.securities],
+            curve,
+            [security.frequency for security in self.securities],
+        )
+        dirty_prices = prices + valuation["accrued_interest"]
+        ytm = calc_ytm_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"]
+        ).rate
+        spread = calc_z_spread_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"], curve
+        ).rate
+        risk = calc_risk_measures(
+            valuation["cashflows"], valuation["times_to_cf"], curve
+        )
+        for idx, security in enumerate(self.securities):
+            risk_core = RiskCore.objects.select_related("curve_description").get(
+                security=security
+            )
+            with self.subTest(security=security.identifier_client):
+                self.assertEqual(risk_core.curve_description.name, "CURVE_RC")
+                self.assertEqual(risk_core.risk_date, POSITION_DATE)
+                self.assertAlmostEqual(risk_core.yield_to_maturity, ytm[idx])
+                self.assertAlmostEqual(risk_core.oas, spread[idx])
+                self.assertAlmostEqual(risk_core.discounted_pv, valuation["pv"][idx])
+                self.assertAlmostEqual(
+                    risk_core.accrued_interest, valuation["accrued_interest"][idx]
+                )
+                self.assertAlmostEqual(risk_core.dv01, risk["dv01"][0, idx])
+                self.assertAlmostEqual(
+                    risk_core.modified_duration, risk["modified_duration"][0, idx]
+                )
+                self.assertAlmostEqual(risk_core.convexity, risk["convexity"][0, idx])
+                self.assertEqual(list(risk_core.key_rate_durations), ["1", "2", "10"])
+                self.assertAlmostEqual(
+                    sum(risk_core.key_rate_durations.values()),
+                    risk_core.modified_duration,
+                    places=6,
+                )
+
+    def test_unknown_curve_writes_nothing(self):
+        response = self.upload([("RC_0", 98.5)], curve_name="CURVE_UNKNOWN")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("CURVE_UNKNOWN", response.data["error"])
+        self.assertFalse(RiskCore.objects.exists())
+
+
+class StressScenarioUploadTests(TestCase):
+    """Stress scenario uploads create scenarios and write their curve point shocks"""
+
+    # curve points (1), scenario descriptions (3 to create one), scenarios (2), shocks (2),
+    # packing the shock vectors (4 and a savepoint pair), the data version bump (1) and the
+    # savepoint pair of the upload
+    UPLOAD_QUERIES = 17
+
+    @classmethod
+    def setUpTestData(cls):
+        curve = CurveDescription.objects.create(name="CURVE_STRESS")
+        for year, rate in [(1, 4.0), (2, 4.2), (10, 4.6)]:
+            CurvePoint.objects.create(
+                curve_description=curve, adate=POSITION_DATE, year=year, rate=rate
+            )
+
+    @staticmethod
+    def scenarios_csv(rows, scenario_name="UPLOADED"):
+        return (
+            "scenario_name,period_number,simulation_number,curve_name,curve_adate,"
+            "curve_year,period_length,parallel_shock_size\n"
+            + "".join(
+                f"{scenario_name},{period},{simulation},CURVE_STRESS,2025-04-30,"
+                f"{year},{period_length},{shock_size}\n"
+                for period, simulation, year, period_length, shock_size in rows
+            )
+        )
+
+    def upload(self, csv, on_conflict=None):
+        data = {"file": SimpleUploadedFile("scenarios.csv", csv.encode())}
+        if on_conflict:
+            data["on_conflict"] = on_conflict
+        return self.client.post(reverse("upload-stress-scenarios"), data)
+
+    def shock_sizes(self, scenario_name="UPLOADED"):
+        """Shock sizes by (period, simulation, curve year)"""
+        return {
+            (period, simulation, year): shock_size
+            for period, simulation, year, shock_size in CurvePointShock.objects.filter(
+                stress_scenario__scenario__name=scenario_name
+            ).values_list(
+                "stress_scenario__period_number",
+                "stress_scenario__simulation_number",
+                "curve_point__year",
+                "shock_size",
+            )
+        }
+
+    def test_scenarios_and_shocks_are_created(self):
+        response = self.upload(
+            self.scenarios_csv(
+                [
+                    (0, 0, 1, 1.0, 0.1),
+                    (0, 0, 10, 1.0, 0.2),
+                    (1, 0, 1, 1.0, 0.3),
+                    # the first period length of a scenario wins
+                    (1, 0, 10, 2.0, 0.4),
+                    (0, 1, 2, 1.0, -0.1),
+                ]
+            )
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            (
+                response.data["scenarios_created"],
+                response.data["shocks_created"],
+                response.data["shocks_updated"],
+            ),
+            (3, 5, 0),
+        )
+        self.assertEqual(
+            sorted(
+                StressScenario.objects.filter(scenario__name="UPLOADED").values_list(
+                    "period_number", "simulation_number", "period_length"
+                )
+            ),
+            [(0, 0, 1.0), (0, 1, 1.0), (1, 0, 1.0)],
+        )
+        self.assertEqual(
+            self.shock_sizes(),
+            {
+                (0, 0, 1): 0.1,
+                (0, 0, 10): 0.2,
+                (1, 0, 1): 0.3,
+                (1, 0, 10): 0.4,
+                (0, 1, 2): -0.1,
+            },
+        )
+        # shocked curves are read from the packed shock vectors
+        scenarios, scenario_curves = load_scenario_curves(
+            StressScenarioDescription.objects.get(name="UPLOADED")
+        )
+        self.assertEqual(len(scenarios), 3)
+        np.testing.assert_allclose(
+            scenario_curves.rates[
+                [scenario.period_number for scenario in scenarios].index(1)
+            ],
+            # tenor 2 isn't shocked in this scenario, it's interpolated
+            [4.3, 4.3 + 0.7 / 9, 5.0],
+        )
+
+    def test_existing_shocks(self):
+        self.upload(self.scenarios_csv([(0, 0, 1, 1.0, 0.1), (0, 0, 2, 1.0, 0.2)]))
+        # the first shock exists, the second one is new
+        csv = self.scenarios_csv([(0, 0, 1, 1.0, 0.5), (0, 0, 10, 1.0, 0.6)])
+        for on_conflict, status_code, counts, shock_size in [
+            ("error", 400, None, 0.1),
+            ("skip", 201, (1, 0, 1), 0.1),
+            # the default mode, the shock skipped before is updated with the rest
+            (None, 201, (0, 2, 0), 0.5),
+        ]:
+            with self.subTest(on_conflict=on_conflict):
+                response = self.upload(csv, on_conflict)
+                self.assertEqual(response.status_code, status_code, response.data)
+                if counts:
+                    self.assertEqual(
+                        (
+                            response.data["shocks_created"],
+                            response.data["shocks_updated"],
+                            response.data["rows_skipped"],
+                        ),
+                        counts,
+                    )
+                    self.assertEqual(response.data["scenarios_created"], 0)
+                self.assertEqual(self.shock_sizes()[(0, 0, 1)], shock_size)
+        self.assertEqual(
+            self.shock_sizes(), {(0, 0, 1): 0.5, (0, 0, 2): 0.2, (0, 0, 10): 0.6}
+        )
+        _, scenario_curves = load_scenario_curves(
+            StressScenarioDescription.objects.get(name="UPLOADED")
+        )
+        np.testing.assert_allclose(scenario_curves.rates, [[4.5, 4.4, 5.2]])
+
+    def test_curve_points_are_resolved_with_one_query(self):
+        # the first upload records the shocked tenors of the curve and the data version
+        self.upload(self.scenarios_csv([(0, 0, year, 1.0, 0.1) for year in (1, 2, 10)]))
+        for simulations in (1, 20):
+            rows = [
+                (0, simulation, year, 1.0, 0.1)
+                for simulation in range(simulations)
+                for year in (1, 2, 10)
+            ]
+            csv = self.scenarios_csv(rows, scenario_name=f"QUERIES_{simulations}")
+            with self.subTest(rows=len(rows)):
+                with self.assertNumQueries(self.UPLOAD_QUERIES) as queries:
+                    response = self.upload(csv)
+                self.assertEqual(response.status_code, 201, response.data)
+                self.assertEqual(
+                    len(
+                        [
+                            query
+                            for query in queries.captured_queries
+                            if 'FROM "fixed_income_curvepoint"' in query["sql"]
+                        ]
+                    ),
+                    1,
+                )
+
+
+class CSVIngestionTests(TestCase):
+    """Uploaded files are read in chunks of typed rows"""
+
+    options = dict(
+        required_columns=["identifier_client", "position_date", "quantity"],
+        dtypes={"identifier_client": str, "quantity": "float64", "lot_id": "int64"},
+        date_columns=["position_date"],
+        defaults={"lot_id": 0},
+    )
+
+    @staticmethod
+    def csv_file(rows, header="identifier_client,position_date,quantity,lot_id"):
+        return io.BytesIO(
+            (header + "\n" + "".join(row + "\n" for row in rows)).encode()
+        )
+
+    def test_chunk_boundaries(self):
+        chunk_rows = 3
+        for no_of_rows, chunk_sizes in [
+            (1, [1]),
+            (chunk_rows - 1, [2]),
+            (chunk_rows, [3]),
+            (chunk_rows + 1, [3, 1]),
+            (2 * chunk_rows, [3, 3]),
+        ]:
+            with self.subTest(rows=no_of_rows):
+                chunks = list(
+                    read_csv_chunks(
+                        self.csv_file(
+                            f"{i:05d},2025-04-30,{i}.5," for i in range(no_of_rows)
+                        ),
+                        chunk_rows=chunk_rows,
+                        **self.options,
+                    )
+                )
+                self.assertEqual([len(chunk) for chunk in chunks], chunk_sizes)
+                self.assertEqual(
+                    [
+                        identifier
+                        for chunk in chunks
+                        for identifier in chunk["identifier_client"]
+                    ],
+                    [f"{i:05d}" for i in range(no_of_rows)],
+                )
+        self.assertEqual(
+            inspect.signature(read_csv_chunks).parameters["chunk_rows"].default,
+            CSV_CHUNK_ROWS,
+        )
+
+    def test_dtypes_and_defaults(self):
+        (chunk,) = read_csv_chunks(
+            self.csv_file(["00123,2025-04-30,100,", "456,2025-05-01,2.5,7"]),
+            **self.options,
+        )
+        # identifiers keep their leading zeros
+        self.assertEqual(list(chunk["identifier_client"]), ["00123", "456"])
+        self.assertEqual(chunk["quantity"].dtype, np.float64)
+        self.assertEqual(
+            list(chunk["position_date"]),
+            [datetime.date(2025, 4, 30), datetime.date(2025, 5, 1)],
+        )
+        # an empty optional value gets its default and the column its dtype
+        self.assertEqual(chunk["lot_id"].dtype, np.int64)
+        self.assertEqual(list(chunk["lot_id"]), [0, 7])
+
+        (chunk,) = read_csv_chunks(
+            self.csv_file(
+                ["00123,2025-04-30,100"],
+                header="identifier_client,position_date,quantity",
+            ),
+            **self.options,
+        )
+        self.assertEqual(list(chunk["lot_id"]), [0])
+
+    def test_invalid_files(self):
+        for csv_file, message in [
+            (io.BytesIO(b""), "empty"),
+            (self.csv_file([], header="identifier_client,quantity"), "position_date"),
+            (self.csv_file(["1,2025-04-30,many,0"]), "rows 1 to 3"),
+            (self.csv_file(["1,2025-04-30,1,0", "2,2025-04-30,1,0,9"]), "rows 1 to 3"),
+            (
+                self.csv_file(["1,2025-04-30,1,0"] * 3 + ["2,2025-04-31,1,0"]),
+                "rows 4 to 6",
+            ),
+        ]:
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(CSVValidationError, message):
+                    list(read_csv_chunks(csv_file, chunk_rows=3, **self.options))
+
+    def test_malformed_row_is_a_bad_request(self):
+        response = self.client.post(
+            reverse("upload-vanilla-bonds"),
+            {
+                "file": SimpleUploadedFile(
+                    "bonds.csv",
+                    b"identifier_client,asset_name,fixed_coupon,maturity\n"
+                    b"CSV_1,Bond 1,4.0,2030-06-15\n"
+                    b"CSV_2,Bond 2,four,2032-06-15\n",
+                )
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Malformed row", response.data["error"])
+        self.assertFalse(
+            VanillaBondSecMaster.objects.filter(identifier_client="CSV_1").exists()
+        )
+
+
+class ScenarioRunnerTests(SimpleTestCase):
+    """The process pool reprices every period like the serial runner, one period at a time"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scenario_curves = ScenarioCurves(
+            [1, 5, 10],
+            [
+                [4.0 + 0.1 * scenario, 4.2, 4.5 - 0.05 * scenario]
+                for scenario in range(6)
+            ],
+        )
+        maturities = [
+            datetime.date(2027, 6, 15),
+            datetime.date(2031, 3, 1),
+            datetime.date(2034, 11, 30),
+        ]
+        cls.periods = []
+        for period, scenario_indices in enumerate([[0, 2, 4], [1, 3, 5]]):
+            valuation = get_vanilla_bonds_cashflows(
+                datetime.date(2025 + period, 4, 30),
+                maturities,
+                [4.0, 5.5, 3.25],
+                [2, 2, 1],
+            )
+            cls.periods.append(
+                (
+                    period,
+                    valuation["cashflows"],
+                    valuation["times_to_cf"],
+                    scenario_indices,
+                )
+            )
+
+    def test_pool_matches_serial_runner(self):
+        serial = list(iter_scenario_risk_measures(self.periods, self.scenario_curves))
+        pooled = list(
+            iter_scenario_risk_measures(self.periods, self.scenario_curves, workers=2)
+        )
+        self.assertEqual([period for period, _ in pooled], [0, 1])
+        for (_, expected), (period, risk) in zip(serial, pooled):
+            for measure in (
+                "pv",
+                "dv01",
+                "modified_duration",
+                "convexity",
+                "key_rate_durations",
+            ):
+                with self.subTest(period=period, measure=measure):
+                    np.testing.assert_allclose(risk[measure], expected[measure])
+
+    def test_periods_are_priced_as_they_are_taken(self):
+        taken = []
+        periods = (taken.append(period[0]) or period for period in self.periods)
+        period_risks = iter_scenario_risk_measures(
+            periods, self.scenario_curves, workers=2
+        )
+        with contextlib.closing(period_risks):
+            period, _ = next(period_risks)
+            # the pool works on the next period while the first one is handled
+            self.assertEqual((period, taken), (0, [0, 1]))
+
+    def test_chunked_pricing_matches_unchunked(self):
+        expected = [
+            calc_risk_measures(
+                cashflows, times_to_cf, self.scenario_curves[scenario_indices]
+            )
+            for _, cashflows, times_to_cf, scenario_indices in self.periods
+        ]
+        # two scenarios per chunk and one bumped curve per discount factor block
+        with (
+            mock.patch("fixed_income.scenario_runner.MAX_SCENARIOS_PER_CHUNK", 2),
+            mock.patch(
+                "fixed_income.portfolio_valuation.PV_MATRIX_MAX_DISCOUNT_FACTORS", 1
+            ),
+            mock.patch(
+                "fixed_income.scenario_runner.calc_risk_measures",
+                wraps=calc_risk_measures,
+            ) as chunk_pricing,
+        ):
+            chunked = list(
+                iter_scenario_risk_measures(self.periods, self.scenario_curves)
+            )
+        self.assertEqual(
+            [len(call.args[2]) for call in chunk_pricing.call_args_list], [2, 1, 2, 1]
+        )
+        for expected_risk, (period, risk) in zip(expected, chunked):
+            for measure in (
+                "pv",
+                "dv01",
+                "modified_duration",
+                "convexity",
+                "key_rate_durations",
+            ):
+                with self.subTest(period=period, measure=measure):
+                    np.testing.assert_allclose(
+                        risk[measure], expected_risk[measure], rtol=1e-12
+                    )
+
+    def test_nothing_to_price_starts_no_pool(self):
+        with (
+            mock.patch("fixed_income.scenario_runner.ProcessPoolExecutor") as executor,
+            mock.patch("fixed_income.scenario_runner.SharedArrays.create") as create,
+        ):
+            self.assertEqual(
+                list(iter_scenario_risk_measures([], self.scenario_curves, workers=2)),
+                [],
+            )
+            self.assertEqual(
+                list(iter_scenario_risk_measures(self.periods, None, workers=2)), []
+            )
+        executor.assert_not_called()
+        create.assert_not_called()
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "needs POSIX shared memory")
+    def test_shared_memory_is_released(self):
+        blocks = set(os.listdir("/dev/shm"))
+        period_risks = iter_scenario_risk_measures(
+            self.periods, self.scenario_curves, workers=2
+        )
+        with contextlib.closing(period_risks):
+            next(period_risks)
+        self.assertEqual(set(os.listdir("/dev/shm")) - blocks, set())
+
+
+class ScenarioGenerationTests(TestCase):
+    """Scenario rows are the same however they are chunked, priced and written"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("GEN", 3)
+        ScenarioPosition.objects.filter(portfolio__name="GEN").delete()
+        RiskScenario.objects.filter(scenario__scenario__name="SCENARIO_GEN").delete()
+        for i, (fixed_coupon, maturity) in enumerate(
+            [
+                (3.0, datetime.date(2027, 1, 15)),
+                (4.5, datetime.date(2030, 6, 30)),
+                (6.0, datetime.date(2040, 1, 1)),
+            ]
+        ):
+            # saved one by one, so their coupon schedules follow the new maturities
+            security = VanillaBondSecMaster.objects.get(identifier_client=f"GEN_{i}")
+            security.fixed_coupon, security.maturity = fixed_coupon, maturity
+            security.save()
+
+    def post_generate(self, workers=1):
+        response = self.client.post(
+            reverse("generate-scenario-positions"),
+            {
+                "portfolio_name": "GEN",
+                "position_date": POSITION_DATE.isoformat(),
+                "scenario_name": "SCENARIO_GEN",
+                "workers": workers,
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def generate(self, workers=1):
+        response = self.post_generate(workers)
+        rows = sorted(
+            ScenarioPosition.objects.filter(portfolio__name="GEN").values_list(
+                "scenario_id",
+                "security_id",
+                "period_end_date",
+                "book_price",
+                "discounted_value",
+                "risk_scenario__security_id",
+                "risk_scenario__scenario_id",
+                "risk_scenario__discounted_pv",
+                "risk_scenario__accrued_interest",
+                "risk_scenario__yield_to_maturity",
+                "risk_scenario__dv01",
+                "risk_scenario__key_rate_durations",
+            )
+        )
+        summaries = sorted(
+            ScenarioPortfolioSummary.objects.filter(portfolio__name="GEN").values_list(
+                "scenario_id", "positions", "discounted_value", "dv01"
+            )
+        )
+        ScenarioPosition.objects.filter(portfolio__name="GEN").delete()
+        RiskScenario.objects.filter(scenario__scenario__name="SCENARIO_GEN").delete()
+        return response.data["rows_written"], rows, summaries
+
+    def test_rows_pair_positions_with_their_risk(self):
+        rows_written, rows, _ = self.generate()
+        # the 2026 bond matures after the first period
+        self.assertEqual(rows_written, 3 + 2 + 2)
+        self.assertEqual(len(rows), rows_written)
+        for scenario_id, security_id, *_, risk_security_id, risk_scenario_id in (
+            row[:7] for row in rows
+        ):
+            self.assertEqual(
+                (risk_security_id, risk_scenario_id), (security_id, scenario_id)
+            )
+        for row in rows:
+            # quantity is 100
+            self.assertAlmostEqual(row[4], row[7])
+
+    def test_chunking_and_pool_write_the_same_rows(self):
+        expected = self.generate()
+        with mock.patch("fixed_income.views.SCENARIO_WRITE_CHUNK_ROWS", 1):
+            self.assertEqual(self.generate(), expected)
+        self.assertEqual(self.generate(workers=2), expected)
+
+    def test_every_period_is_written_before_the_next_one(self):
+        writes = []
+
+        def progress(done=None, total=None, rows_written=None):
+            if done is not None:
+                writes.append(
+                    ScenarioPosition.objects.filter(portfolio__name="GEN").count()
+                )
+
+        JOB_VIEWS[Job.GENERATE_SCENARIO_POSITIONS]().process(
+            {
+                "portfolio_name": "GEN",
+                "position_date": POSITION_DATE.isoformat(),
+                "scenario_name": "SCENARIO_GEN",
+            },
+            progress=progress,
+        )
+        self.assertEqual(writes, [3, 5, 7, 7])
+
+    def test_summaries_total_the_scenario_positions(self):
+        self.post_generate()
+        self.assert_summaries_total_scenario_positions()
+
+    def test_rerun_replaces_rows_of_earlier_run(self):
+        first_run = self.post_generate()
+        rerun = self.post_generate()
+        self.assertEqual(rerun.data["rows_written"], first_run.data["rows_written"])
+        self.assertEqual(
+            ScenarioPosition.objects.filter(portfolio__name="GEN").count(),
+            rerun.data["rows_written"],
+        )
+        self.assertEqual(
+            RiskScenario.objects.filter(
+                scenario__scenario__name="SCENARIO_GEN"
+            ).count(),
+            rerun.data["rows_written"],
+        )
+        self.assert_summaries_total_scenario_positions()
+
+    def assert_summaries_total_scenario_positions(self):
+        summaries = ScenarioPortfolioSummary.objects.filter(portfolio__name="GEN")
+        self.assertEqual(summaries.count(), 3)
+        for summary in summaries:
+            positions = ScenarioPosition.objects.filter(
+                portfolio__name="GEN", scenario=summary.scenario
+            ).select_related("risk_scenario")
+            with self.subTest(period=summary.scenario.period_number):
+                self.assertEqual(summary.positions, len(positions))
+                self.assertEqual(summary.positions_without_risk, 0)
+                self.assertEqual(
+                    {position.period_end_date for position in positions},
+                    {summary.period_end_date},
+                )
+                for field in ("discounted_value", "book_value", "par_value"):
+                    self.assertAlmostEqual(
+                        getattr(summary, field),
+                        sum(getattr(position, field) for position in positions),
+                    )
+                self.assertAlmostEqual(
+                    summary.accrued_interest,
+                    sum(
+                        position.quantity * position.risk_scenario.accrued_interest
+                        for position in positions
+                    )
+                    / 100,
+                )
+                self.assertAlmostEqual(
+                    summary.dv01,
+                    sum(
+                        position.quantity * position.risk_scenario.dv01
+                        for position in positions
+                    )
+                    / 100,
+                )
+                self.assertGreater(summary.dv01, 0)
+                self.assertAlmostEqual(
+                    summary.modified_duration,
+                    sum(
+                        position.discounted_value
+                        * position.risk_scenario.modified_duration
+                        for position in positions
+                    )
+                    / summary.discounted_value,
+                )
+
+    def test_spreads_are_solved_over_the_shocked_curves(self):
+        Position.objects.filter(
+            portfolio__name="GEN", security__identifier_client="GEN_2"
+        ).update(book_price=0.0)
+        # a zero book price can't be repriced, neither by a yield nor by a spread
+        with self.assertLogs(level="WARNING"):
+            response = self.post_generate()
+        self.assertEqual(response.data["spread_not_converged"], 3)
+        self.assertEqual(response.data["ytm_not_converged"], 3)
+        scenarios, scenario_curves = load_scenario_curves(
+            StressScenarioDescription.objects.get(name="SCENARIO_GEN")
+        )
+        for risk_scenario in RiskScenario.objects.filter(
+            scenario__scenario__name="SCENARIO_GEN"
+        ).select_related("security", "scenario"):
+            security = risk_scenario.security
+            with self.subTest(
+                security=security.identifier_client,
+                period=risk_scenario.scenario.period_number,
+            ):
+                if security.identifier_client == "GEN_2":
+                    self.assertIsNone(risk_scenario.oas)
+                    continue
+                position = ScenarioPosition.objects.get(risk_scenario=risk_scenario)
+                valuation = get_vanilla_bonds_cashflows(
+                    position.period_end_date,
+                    [security.maturity],
+                    [security.fixed_coupon],
+                    [security.frequency],
+                )
+                curve = scenario_curves.curve(scenarios.index(risk_scenario.scenario))
+                pv, _ = calc_pv_and_derivative_from_rate(
+                    np.array([risk_scenario.oas]),
+                    valuation["cashflows"],
+                    valuation["times_to_cf"],
+                    curve.rates_at(valuation["times_to_cf"]),
+                )
+                self.assertAlmostEqual(
+                    pv[0],
+                    risk_scenario.price + risk_scenario.accrued_interest,
+                    delta=1e-8,
+                )
+
+    def test_unshocked_scenarios_write_nothing(self):
+        description = StressScenarioDescription.objects.create(name="UNSHOCKED")
+        StressScenario.objects.create(
+            scenario=description,
+            period_number=0,
+            simulation_number=0,
+            period_length=1.0,
+        )
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                response = self.client.post(
+                    reverse("generate-scenario-positions"),
+                    {
+                        "portfolio_name": "GEN",
+                        "position_date": POSITION_DATE.isoformat(),
+                        "scenario_name": "UNSHOCKED",
+                        "workers": workers,
+                    },
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 201, response.data)
+                self.assertEqual(response.data["rows_written"], 0)
+        self.assertFalse(
+            ScenarioPosition.objects.filter(scenario__scenario=description).exists()
+        )
+
+
+class PortfolioNameTests(TestCase):
+    """Portfolios named by rows are created when the row is saved, not when it is validated"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.security = VanillaBondSecMaster.objects.create(
+            identifier_client="NAMED_1",
+            asset_name="Bond 1",
+            fixed_coupon=4.0,
+            maturity=datetime.date(2030, 6, 15),
+        )
+        Portfolio.objects.create(name="EXISTING")
+
+    def post_position(self, portfolio_name, **extra):
+        return self.client.post(
+            reverse("position-list"),
+            {
+                "security_id": self.security.id,
+                "portfolio_name": portfolio_name,
+                "position_date": POSITION_DATE.isoformat(),
+                "lot_id": 0,
+                "quantity": 100.0,
+                "notional_amount": 100.0,
+                "par_value": 100.0,
+                "book_price": 100.0,
+                "book_value": 100.0,
+                **extra,
+            },
+            content_type="application/json",
+        )
+
+    def test_new_portfolio_is_created_on_save(self):
+        response = self.post_position("NEW")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["portfolio_name"], "NEW")
+        self.assertEqual(
+            Position.objects.get(id=response.data["id"]).portfolio.name, "NEW"
+        )
+
+    def test_invalid_row_creates_no_portfolio(self):
+        response = self.post_position("REJECTED", quantity="many")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Portfolio.objects.filter(name="REJECTED").exists())
+
+    def test_existing_portfolio_keeps_unique_check(self):
+        self.assertEqual(self.post_position("EXISTING").status_code, 201)
+        response = self.post_position("EXISTING")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Portfolio.objects.filter(name="EXISTING").count(), 1)
+
+
+class PortfolioIdTests(TestCase):
+    """Portfolio ids are cached per process and expire, other processes send no signals"""
+
+    def setUp(self):
+        portfolios._portfolio_ids.clear()
+        self.addCleanup(portfolios._portfolio_ids.clear)
+        self.portfolio = Portfolio.objects.create(name="CACHED")
+
+    def resolve(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return portfolio_ids([name])
+
+    def test_ids_are_cached_once_committed(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.resolve("CACHED"), {"CACHED": self.portfolio.id})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolve("CACHED"), {"CACHED": self.portfolio.id})
+
+    def test_renamed_by_another_process_is_picked_up_once_expired(self):
+        self.resolve("CACHED")
+        # another process renames the portfolio, this process gets no signal
+        Portfolio.objects.filter(id=self.portfolio.id).update(name="RENAMED")
+        self.assertEqual(self.resolve("CACHED"), {"CACHED": self.portfolio.id})
+
+        with override_settings(PORTFOLIO_ID_CACHE_SECONDS=0):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.resolve("CACHED"), {})
+            self.assertEqual(self.resolve("RENAMED"), {"RENAMED": self.portfolio.id})
+
+    def test_deleted_by_another_process_is_picked_up_once_expired(self):
+        self.resolve("CACHED")
+        Portfolio.objects.filter(id=self.portfolio.id).delete()
+        recreated = Portfolio.objects.bulk_create([Portfolio(name="CACHED")])[0]
+        with mock.patch(
+            "fixed_income.portfolios.time.monotonic",
+            return_value=time.monotonic() + settings.PORTFOLIO_ID_CACHE_SECONDS,
+        ):
+            self.assertEqual(self.resolve("CACHED"), {"CACHED": recreated.id})
+
+
+class CurveTests(SimpleTestCase):
+    """Curves interpolate linearly, extrapolate flat and memoize discount factors on the grid"""
+
+    curve = Curve([10, 1, 5], [4.5, 4.0, 4.2])
+
+    def test_interpolation(self):
+        self.assertEqual(list(self.curve.tenors), [1, 5, 10])
+        np.testing.assert_allclose(
+            self.curve.rates_at(np.array([0.25, 1, 3, 7.5, 10, 40])),
+            [4.0, 4.0, 4.1, 4.35, 4.5, 4.5],
+        )
+        np.testing.assert_allclose(
+            self.curve.discount_factors(np.array([[0.0, 3.0]])),
+            [[1.0, 1.041**-3]],
+        )
+
+    def test_grid_discount_factors_match_direct_ones(self):
+        curve = Curve(self.curve.tenors, self.curve.rates)
+        for years in (2, 12, 45):
+            with self.subTest(years=years):
+                grid_times = np.array(
+                    [
+                        [0, 1, TIME_GRID_POINTS_PER_YEAR // 2],
+                        [years * TIME_GRID_POINTS_PER_YEAR, 7, 0],
+                    ]
+                )
+                np.testing.assert_allclose(
+                    curve.discount_factors_on_grid(grid_times),
+                    curve.discount_factors(grid_times / TIME_GRID_POINTS_PER_YEAR),
+                )
+                self.assertLessEqual(
+                    len(curve._grid_discount_factors), GRID_MEMO_MAX_POINTS
+                )
+        # cashflows beyond the memo didn't grow it past its bound
+        self.assertEqual(len(curve._grid_discount_factors), GRID_MEMO_MAX_POINTS)
+
+
+class BondPricingTests(SimpleTestCase):
+    """Batch pricing matches the one bond at a time functions of fi_utils"""
+
+    curve = {0.5: 3.9, 1: 4.0, 2: 4.1, 5: 4.3, 10: 4.6, 30: 4.8}
+    adate = datetime.date(2025, 4, 15)
+    # mid-month maturities, fi_utils steps coupon dates by days and drifts at month ends
+    maturities = [
+        datetime.date(2026, 1, 20),
+        datetime.date(2027, 10, 17),
+        datetime.date(2030, 6, 12),
+        datetime.date(2034, 9, 25),
+        datetime.date(2045, 3, 14),
+        datetime.date(2060, 11, 16),
+    ]
+    coupons = [0.0, 2.5, 4.0, 5.25, 6.0, 7.5]
+    freqs = [2, 1, 4, 2, 12, 2]
+
+    def test_pv_and_accrued_interest_match_fi_utils(self):
+        valuation = price_vanilla_bonds(
+            self.adate,
+            self.maturities,
+            self.coupons,
+            Curve.from_dict(self.curve),
+            self.freqs,
+        )
+        for i, (maturity, coupon, freq) in enumerate(
+            zip(self.maturities, self.coupons, self.freqs)
+        ):
+            with self.subTest(maturity=maturity, freq=freq):
+                self.assertAlmostEqual(
+                    valuation["pv"][i],
+                    calc_pv_of_vanilla_bond(
+                        self.adate, maturity, coupon, self.curve, freq
+                    ),
+                    delta=MATCH_TOLERANCE,
+                )
+                self.assertAlmostEqual(
+                    valuation["accrued_interest"][i],
+                    calc_accrued_interest(self.adate, maturity, coupon, freq),
+                    delta=MATCH_TOLERANCE,
+                )
+
+    def test_ytm_reprices_bonds(self):
+        valuation = get_vanilla_bonds_cashflows(
+            self.adate, self.maturities, self.coupons, self.freqs
+        )
+        dirty_prices = np.array([97.0, 101.5, 99.0, 105.0, 110.0, 92.0])
+        result = calc_ytm_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"]
+        )
+        self.assertTrue(result.converged.all())
+        self.assertEqual(len(result.failed_indices), 0)
+        pv, _ = calc_pv_and_derivative_from_rate(
+            result.rate, valuation["cashflows"], valuation["times_to_cf"]
+        )
+        np.testing.assert_allclose(pv, dirty_prices, atol=1e-8)
+        for i, freq in enumerate(self.freqs):
+            if freq == 2:
+                with self.subTest(maturity=self.maturities[i]):
+                    self.assertAlmostEqual(
+                        calculate_pv_from_ytm(
+                            result.rate[i],
+                            self.coupons[i],
+                            self.adate,
+                            self.maturities[i],
+                        ),
+                        dirty_prices[i],
+                        delta=1e-8,
+                    )
+
+    def test_ytm_not_converged(self):
+        valuation = get_vanilla_bonds_cashflows(
+            self.adate, self.maturities, self.coupons, self.freqs
+        )
+        # no price, zero price and a price below PV at YTM_UPPER_BOUND can't be solved
+        dirty_prices = np.array([97.0, np.nan, 0.0, 105.0, 110.0, 0.5])
+        result = calc_ytm_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"]
+        )
+        np.testing.assert_array_equal(result.failed_indices, [1, 2, 5])
+        self.assertTrue(np.isnan(result.rate[[1, 2, 5]]).all())
+        self.assertFalse(np.isnan(result.rate[[0, 3, 4]]).any())
+        np.testing.assert_array_equal(result.iterations[[1, 2, 5]], 0)
+
+        result = calc_ytm_of_vanilla_bonds(
+            dirty_prices,
+            valuation["cashflows"],
+            valuation["times_to_cf"],
+            max_iterations=1,
+        )
+        self.assertFalse(result.converged.any())
+        self.assertTrue(np.isnan(result.rate).all())
+
+    def test_pv_matrix_matches_pricing_every_scenario(self):
+        scenario_curves = ScenarioCurves(
+            list(self.curve),
+            np.array(list(self.curve.values()))
+            + np.array([[0.0], [0.5], [-1.0], [2.0]])
+            + np.linspace(0.0, 0.3, len(self.curve)),
+        )
+        valuation = get_vanilla_bonds_cashflows(
+            self.adate, self.maturities, self.coupons, self.freqs
+        )
+        pv_matrix = calc_pv_matrix(
+            valuation["cashflows"], valuation["times_to_cf"], scenario_curves
+        )
+        self.assertEqual(pv_matrix.shape, (len(scenario_curves), len(self.maturities)))
+        for scenario in range(len(scenario_curves)):
+            with self.subTest(scenario=scenario):
+                np.testing.assert_allclose(
+                    pv_matrix[scenario],
+                    price_vanilla_bonds(
+                        self.adate,
+                        self.maturities,
+                        self.coupons,
+                        scenario_curves.curve(scenario),
+                        self.freqs,
+                    )["pv"],
+                    rtol=0,
+                    atol=MATCH_TOLERANCE,
+                )
+
+    def test_z_spread_reprices_bonds_over_the_curve(self):
+        curve = Curve.from_dict(self.curve)
+        valuation = get_vanilla_bonds_cashflows(
+            self.adate, self.maturities, self.coupons, self.freqs
+        )
+        spreads = np.array([0.0, 0.35, -0.2, 1.5, 0.05, 3.0])
+        dirty_prices, _ = calc_pv_and_derivative_from_rate(
+            spreads,
+            valuation["cashflows"],
+            valuation["times_to_cf"],
+            curve.rates_at(valuation["times_to_cf"]),
+        )
+        result = calc_z_spread_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"], curve
+        )
+        self.assertTrue(result.converged.all())
+        np.testing.assert_allclose(result.rate, spreads, rtol=0, atol=1e-8)
+        # zero spread reprices bonds at their PV on the curve
+        self.assertAlmostEqual(
+            dirty_prices[0],
+            price_vanilla_bonds(
+                self.adate, self.maturities, self.coupons, curve, self.freqs
+            )["pv"][0],
+            delta=MATCH_TOLERANCE,
+        )
+
+    def test_z_spread_not_converged(self):
+        curve = Curve.from_dict(self.curve)
+        valuation = get_vanilla_bonds_cashflows(
+            self.adate, self.maturities, self.coupons, self.freqs
+        )
+        dirty_prices = np.array([97.0, np.nan, 0.0, 105.0, 110.0, 0.5])
+        result = calc_z_spread_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"], curve
+        )
+        np.testing.assert_array_equal(result.failed_indices, [1, 2, 5])
+        self.assertTrue(np.isnan(result.rate[[1, 2, 5]]).all())
+        self.assertFalse(np.isnan(result.rate[[0, 3, 4]]).any())
+
+        result = calc_z_spread_of_vanilla_bonds(
+            dirty_prices,
+            valuation["cashflows"],
+            valuation["times_to_cf"],
+            curve,
+            max_iterations=1,
+        )
+        self.assertFalse(result.converged.any())
+        self.assertTrue(np.isnan(result.rate).all())
+
+
+class CouponDateTests(SimpleTestCase):
+    """Closed-form coupon dates match stepping back from maturity one period at a time"""
+
+    maturities = np.array(
+        ["2035-08-31", "2030-03-01", "2031-05-30", "2029-01-31", "2032-02-29"],
+        dtype="datetime64[D]",
+    )
+    freqs = np.array([2, 4, 2, 12, 1])
+
+    @staticmethod
+    def stepped_coupon_dates(adate, maturity, freq):
+        """Step back from maturity until the coupon date is on or before adate"""
+        periods_back = 0
+        while maturity - relativedelta(months=periods_back * 12 // freq) > adate:
+            periods_back += 1
+        prev_coupon_date = maturity - relativedelta(months=periods_back * 12 // freq)
+        if prev_coupon_date == adate:
+            return adate, adate
+        next_coupon_date = maturity - relativedelta(
+            months=(periods_back - 1) * 12 // freq
+        )
+        return next_coupon_date, prev_coupon_date
+
+    def test_coupon_dates_at_month_ends_and_firsts(self):
+        adates = [
+            datetime.date(2028, 2, 29),
+            datetime.date(2028, 3, 1),
+            datetime.date(2026, 1, 31),
+            datetime.date(2026, 2, 28),
+            datetime.date(2026, 3, 1),
+            datetime.date(2026, 4, 30),
+            datetime.date(2026, 11, 30),
+            datetime.date(2026, 12, 1),
+        ]
+        for adate in adates:
+            next_dates, prev_dates = next_and_prev_coupon_dates(
+                adate, self.maturities, self.freqs
+            )
+            for i, maturity in enumerate(self.maturities.tolist()):
+                with self.subTest(adate=adate, maturity=maturity):
+                    self.assertEqual(
+                        (next_dates[i].item(), prev_dates[i].item()),
+                        self.stepped_coupon_dates(adate, maturity, self.freqs[i]),
+                    )
+
+    def test_clamped_coupon_dates_return_to_maturity_day(self):
+        next_dates, prev_dates = next_and_prev_coupon_dates(
+            datetime.date(2026, 3, 15), self.maturities, self.freqs
+        )
+        np.testing.assert_array_equal(
+            next_dates,
+            np.array(
+                ["2026-08-31", "2026-06-01", "2026-05-30", "2026-03-31", "2027-02-28"],
+                dtype="datetime64[D]",
+            ),
+        )
+        np.testing.assert_array_equal(
+            prev_dates,
+            np.array(
+                ["2026-02-28", "2026-03-01", "2025-11-30", "2026-02-28", "2026-02-28"],
+                dtype="datetime64[D]",
+            ),
+        )
+
+    def test_schedules_run_from_previous_coupon_to_maturity(self):
+        coupon_dates, counts = generate_coupon_schedules(
+            self.maturities[:2], self.freqs[:2], datetime.date(2029, 9, 15)
+        )
+        np.testing.assert_array_equal(counts, [13, 3])
+        schedule = coupon_dates[counts[0] :]
+        np.testing.assert_array_equal(
+            schedule,
+            np.array(["2029-09-01", "2029-12-01", "2030-03-01"], dtype="datetime64[D]"),
+        )
+        self.assertEqual(coupon_dates[0], np.datetime64("2029-08-31"))
+        self.assertEqual(coupon_dates[counts[0] - 1], self.maturities[0])
+
+
+class RiskMeasureTests(SimpleTestCase):
+    """Risk measures are consistent central differences of the repriced bonds"""
+
+    scenario_curves = ScenarioCurves(
+        [1, 2, 5, 10, 30],
+        np.array([[4.0, 4.1, 4.3, 4.6, 4.8], [2.0, 2.5, 3.5, 4.5, 5.0]]),
+    )
+
+    def setUp(self):
+        valuation = get_vanilla_bonds_cashflows(
+            datetime.date(2025, 4, 15),
+            [
+                datetime.date(2026, 1, 20),
+                datetime.date(2030, 6, 12),
+                datetime.date(2045, 3, 14),
+            ],
+            [0.0, 4.0, 6.0],
+            [2, 4, 2],
+        )
+        self.cashflows = valuation["cashflows"]
+        self.times_to_cf = valuation["times_to_cf"]
+
+    def test_key_rate_durations_add_up_to_duration(self):
+        risk = calc_risk_measures(
+            self.cashflows, self.times_to_cf, self.scenario_curves
+        )
+        self.assertEqual(risk["key_rate_durations"].shape, (2, 3, 5))
+        # the central differences agree up to terms of third order in the bump size
+        np.testing.assert_allclose(
+            risk["key_rate_durations"].sum(axis=2),
+            risk["modified_duration"],
+            rtol=1e-6,
+        )
+        np.testing.assert_allclose(
+            risk["pv"],
+            calc_pv_matrix(self.cashflows, self.times_to_cf, self.scenario_curves),
+        )
+
+    def test_dv01_is_positive_price_gain_for_falling_rates(self):
+        risk = calc_risk_measures(
+            self.cashflows, self.times_to_cf, self.scenario_curves.curve(0)
+        )
+        self.assertEqual(risk["dv01"].shape, (1, 3))
+        self.assertTrue((risk["dv01"] > 0).all())
+        np.testing.assert_allclose(
+            risk["dv01"], risk["modified_duration"] * risk["pv"] / 10000, rtol=1e-8
+        )
+        # longer bonds carry more duration and convexity
+        self.assertTrue((np.diff(risk["modified_duration"][0]) > 0).all())
+        self.assertTrue((np.diff(risk["convexity"][0]) > 0).all())
+
+    def test_portfolio_risk_weights_by_discounted_value(self):
+        portfolio = aggregate_portfolio_risk(
+            [
+                (200.0, 300.0, 0.05, 2.0, 10.0, {"1": 0.5, "2": 1.5}),
+                (100.0, 100.0, 0.09, 6.0, 50.0, {"2": 2.0, "10": 4.0}),
+                (100.0, 50.0, None, None, None, None),
+            ]
+        )
+        self.assertEqual(portfolio["market_value"], 450.0)
+        self.assertAlmostEqual(portfolio["dv01"], 0.19)
+        self.assertAlmostEqual(portfolio["modified_duration"], 3.0)
+        self.assertAlmostEqual(portfolio["convexity"], 20.0)
+        self.assertEqual(list(portfolio["key_rate_durations"]), ["1", "2", "10"])
+        self.assertAlmostEqual(portfolio["key_rate_durations"]["2"], 1.625)
+        self.assertEqual(portfolio["positions_without_risk"], 1)
+
+
+class PortfolioRiskViewTests(TestCase):
+    """Portfolio risk aggregates the stored risk of the positions and scenario summaries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_rows("RISK", 3)
+        for i, (dv01, duration, convexity, key_rate_durations) in enumerate(
+            [
+                (0.04, 4.0, 20.0, {"1": 1.0, "2": 3.0}),
+                (0.09, 9.0, 90.0, {"2": 4.0, "3": 5.0}),
+            ]
+        ):
+            RiskCore.objects.filter(security__identifier_client=f"RISK_{i}").update(
+                dv01=dv01,
+                modified_duration=duration,
+                convexity=convexity,
+                key_rate_durations=key_rate_durations,
+            )
+        # RISK_2 has no risk measures
+        for i, discounted_value in enumerate([100.0, 300.0, 50.0]):
+            Position.objects.filter(security__identifier_client=f"RISK_{i}").update(
+                discounted_value=discounted_value
+            )
+        ScenarioPortfolioSummary.objects.filter(portfolio__name="RISK").update(
+            modified_duration=5.0, convexity=30.0, key_rate_durations={"2": 5.0}
+        )
+
+    def post(self, **data):
+        return self.client.post(
+            reverse("portfolio-risk"),
+            {"portfolio": "RISK", "position_date": POSITION_DATE.isoformat(), **data},
+            content_type="application/json",
+        )
+
+    def test_aggregates_stored_position_risk(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200, response.data)
+        expected = aggregate_portfolio_risk(
+            Position.objects.filter(portfolio__name="RISK").values_list(
+                "quantity",
+                "discounted_value",
+                "risk_core__dv01",
+                "risk_core__modified_duration",
+                "risk_core__convexity",
+                "risk_core__key_rate_durations",
+            )
+        )
+        for key, value in expected.items():
+            self.assertEqual(response.data[key], value, key)
+        self.assertEqual(response.data["market_value"], 450.0)
+        self.assertAlmostEqual(response.data["dv01"], 0.04 + 0.09)
+        self.assertAlmostEqual(response.data["modified_duration"], 7.75)
+        self.assertEqual(
+            {
+                key: round(value, 10)
+                for key, value in response.data["key_rate_durations"].items()
+            },
+            {"1": 0.25, "2": 3.75, "3": 3.75},
+        )
+        self.assertEqual(response.data["positions_without_risk"], 1)
+        self.assertNotIn("scenarios", response.data)
+
+    def test_scenario_summaries(self):
+        response = self.post(scenario_name="SCENARIO_RISK")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [
+                (row["period_number"], row["simulation_number"])
+                for row in response.data["scenarios"]
+            ],
+            [(0, 0), (1, 0), (2, 0)],
+        )
+        for row in response.data["scenarios"]:
+            self.assertEqual(row["date"], POSITION_DATE.isoformat())
+            self.assertEqual(row["market_value"], 100.0)
+            self.assertEqual(row["dv01"], 0.1)
+            self.assertEqual(row["modified_duration"], 5.0)
+            self.assertEqual(row["key_rate_durations"], {"2": 5.0})
+
+    def test_not_found_and_bad_requests(self):
+        Portfolio.objects.create(name="EMPTY")
+        for data, status_code in [
+            ({"portfolio": "UNKNOWN"}, 404),
+            ({"portfolio": "EMPTY"}, 404),
+            ({"position_date": "2025-05-01"}, 404),
+            ({"scenario_name": "UNKNOWN"}, 404),
+            ({"position_date": "2025-02-30"}, 400),
+            ({"position_date": "30/04/2025"}, 400),
+            ({"portfolio": ""}, 400),
+        ]:
+            with self.subTest(data=data):
+                response = self.post(**data)
+                self.assertEqual(response.status_code, status_code, response.data)
+                self.assertIn("error", response.data)
@@ -6,12 +6,15 @@ from .views import (
     RiskCoreViewSet,
     RiskCoreUploadCSV,
     RiskScenarioViewSet,
+    PortfolioViewSet,
     PositionViewSet,
     ScenarioPositionViewSet,
+    ScenarioPortfolioSummaryViewSet,
     TransactionViewSet,
     CurveDescriptionViewSet,
     CurvePointViewSet,
     FilteredCurveView,
+    CurveCacheView,
     StressScenarioViewSet,
     AborPnLViewSet,
     PositionUploadCSV,
@@ -20,6 +23,8 @@ from .views import (
     StressScenarioUploadCSV,
     CurvePointShockViewSet,
     PortfolioStressTrendView,
+    PortfolioRiskView,
+    JobViewSet,
 )
 from .views import StressScenarioDescriptionViewSet
 
@@ -27,8 +32,14 @@ router = DefaultRouter()
 router.register(r"vanilla-bonds", VanillaBondSecMasterViewSet, "vanilla-bond")
 router.register(r"risk-cores", RiskCoreViewSet, "risk-core")
 router.register(r"risk-scenarios", RiskScenarioViewSet, "risk-scenario")
+router.register(r"portfolios", PortfolioViewSet, "portfolio")
 router.register(r"positions", PositionViewSet, "position")
 router.register(r"scenario-positions", ScenarioPositionViewSet, "scenario-position")
+router.register(
+    r"scenario-portfolio-summaries",
+    ScenarioPortfolioSummaryViewSet,
+    "scenario-portfolio-summary",
+)
 router.register(r"transactions", TransactionViewSet, "transaction")
 router.register(r"curve-descriptions", CurveDescriptionViewSet, "curve-description")
 router.register(r"curve-points", CurvePointViewSet, "curve-point")
@@ -41,6 +52,7 @@ router.register(
 )
 router.register(r"stress-scenarios", StressScenarioViewSet, "stress-scenario")
 router.register(r"aborpnls", AborPnLViewSet, "aborpnl")
+router.register(r"jobs", JobViewSet, "job")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -66,6 +78,7 @@ urlpatterns = [
         FilteredCurveView.as_view(),
         name="filtered-curve",
     ),
+    path("curve-cache/", CurveCacheView.as_view(), name="curve-cache"),
     path(
         "upload-stress-scenarios/",
         StressScenarioUploadCSV.as_view(),
@@ -76,4 +89,5 @@ urlpatterns = [
         PortfolioStressTrendView.as_view(),
         name="portfolio-stress-trend",
     ),
+    path("portfolio-risk/", PortfolioRiskView.as_view(), name="portfolio-risk"),
 ]
@@ -1,20 +1,51 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+import numpy as np
 import pandas as pd
+import contextlib
 import datetime
-from fi_utils.bond_valuation import (
-    calc_ytm_of_bond,
-    calc_accrued_interest,
-    calc_pv_of_vanilla_bond,
-)
-from django.db.models import Sum
-from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils.decorators import method_decorator
 from dateutil.relativedelta import relativedelta
 from fi_utils.abor_utils import compute_linear_amortization_schedule
 import logging
 
+from .portfolio_valuation import (
+    price_vanilla_bonds,
+    get_vanilla_bonds_cashflows,
+    calc_ytm_of_vanilla_bonds,
+    calc_z_spread_of_vanilla_bonds,
+)
+from .coupon_schedule import CouponScheduleIndex, create_coupon_schedules
+from .risk_measures import (
+    aggregate_portfolio_risk,
+    calc_risk_measures,
+    key_rate_durations_by_tenor,
+)
+from .scenario_runner import iter_scenario_risk_measures
+from .jobs import cancel_job, submit_job
+from .pagination import LargeTableCursorPagination
+from .portfolios import portfolio_id, portfolio_ids
+from .csv_ingestion import CSVValidationError, read_csv_chunks
+from .data_versions import bump_versions, conditional_on
+from .curve_cache import (
+    curve_cache_stats,
+    get_curve_snapshot,
+    get_curves,
+    invalidate_curves,
+)
+from .shock_vectors import pack_shock_vectors
+from .stress_testing import load_scenario_curves
+
 from .models import (
     VanillaBondSecMaster,
     SecurityIdentifier,
@@ -24,11 +55,15 @@ from .models import (
     CurvePoint,
     CurvePointShock,
     StressScenario,
+    Portfolio,
     Position,
     ScenarioPosition,
+    ScenarioPortfolioSummary,
     Transaction,
     AborPnL,
     StressScenarioDescription,
+    DataVersion,
+    Job,
 )
 
 from .serializers import (
@@ -40,13 +75,483 @@ from .serializers import (
     CurvePointSerializer,
     CurvePointShockSerializer,
     StressScenarioSerializer,
+    PortfolioSerializer,
     PositionSerializer,
     ScenarioPositionSerializer,
+    ScenarioPortfolioSummarySerializer,
     TransactionSerializer,
     AborPnLSerializer,
     StressScenarioDescriptionSerializer,
+    JobSerializer,
 )
 
+# rows per INSERT statement of bulk_create
+BULK_BATCH_SIZE = 1000
+# scenario positions written per transaction, rounded up to whole scenarios
+SCENARIO_WRITE_CHUNK_ROWS = 20000
+# handling of uploaded rows whose natural key already exists, the first mode is the default
+ON_CONFLICT_MODES = ("update", "skip", "error")
+
+
+def _prefetch_shocks(stress_scenario_path):
+    """
+    Prefetch of the curve point shocks that StressScenarioSerializer nests, with their curve points.
+    Every shock gets the prefetched stress scenario as its stress_scenario, so the scenario path
+    has to select_related its StressScenarioDescription
+    :param stress_scenario_path: lookup of the StressScenario from the listed model, None for StressScenario
+    """
+    return Prefetch(
+        (
+            f"{stress_scenario_path}__curve_point_shocks"
+            if stress_scenario_path
+            else "curve_point_shocks"
+        ),
+        queryset=CurvePointShock.objects.select_related(
+            "curve_point__curve_description"
+        ),
+    )
+
+
+def _conditional_gets(*names):
+    """
+    Class decorator of viewsets whose list and detail responses only change with the
+    data sets names, see data_versions.conditional_on
+    """
+
+    def decorate(viewset):
+        for method_name in ("list", "retrieve"):
+            viewset = method_decorator(conditional_on(*names), name=method_name)(
+                viewset
+            )
+        return viewset
+
+    return decorate
+
+
+def _solved_rate(solver_result, idx):
+    """Solved yield or spread of the bond at idx, None when the solver didn't converge"""
+    if not solver_result.converged[idx]:
+        return None
+    return float(solver_result.rate[idx])
+
+
+def _run_as_job(request):
+    """Whether the client asked to queue the run as a job instead of running it in the request"""
+    return str(request.data.get("async", "")).lower() in ("1", "true", "yes")
+
+
+def _submit_job(job_type, request, file_obj=None):
+    """Queue the run of the request as a job and return its id"""
+    parameters = {
+        key: request.data.get(key)
+        for key in request.data.keys()
+        if key not in ("file", "async")
+    }
+    job = submit_job(job_type, parameters, file_obj)
+    return Response(
+        {"job_id": job.id, "status": job.status}, status=status.HTTP_202_ACCEPTED
+    )
+
+
+def _on_conflict_mode(data):
+    """on_conflict option of an upload, one of ON_CONFLICT_MODES"""
+    return data.get("on_conflict") or ON_CONFLICT_MODES[0]
+
+
+def _invalid_on_conflict_response(data):
+    """400 response when the on_conflict option of an upload is unknown, None otherwise"""
+    if _on_conflict_mode(data) in ON_CONFLICT_MODES:
+        return None
+    return Response(
+        {"error": f"on_conflict must be one of {list(ON_CONFLICT_MODES)}."},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _existing_keys(model, key_fields, keys, value_field=None):
+    """
+    Find which natural keys already exist with one query
+    :param model:
+    :param key_fields: fields of the natural key, foreign keys match on ids
+    :param keys: iterable of key tuples in the order of key_fields
+    :param value_field: optional field returned for every existing key
+    :return: dictionary of existing keys to value_field, to None without value_field
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    fields = list(key_fields) + ([value_field] if value_field else [])
+    existing = {}
+    for row in model.objects.filter(
+        **{
+            f"{field}__in": {key[i] for key in keys}
+            for i, field in enumerate(key_fields)
+        }
+    ).values_list(*fields):
+        key = row[: len(key_fields)]
+        if key in keys:
+            existing[key] = row[-1] if value_field else None
+    return existing
+
+
+def _apply_on_conflict(
+    chunk, model, key_fields, key_columns, on_conflict, value_field=None, updates=True
+):
+    """
+    Select the rows of an upload chunk to write. Rows repeating a natural key within the chunk are
+    dropped, the last one is kept when updating and the first one when skipping. Skipping also drops
+    rows whose key already exists, the error mode leaves the chunk as it is and reports the keys
+    :param chunk: DataFrame of uploaded rows
+    :param model: model the rows are written to
+    :param key_fields: natural key fields of the model
+    :param key_columns: columns of chunk holding the natural key, in the order of key_fields
+    :param on_conflict: one of ON_CONFLICT_MODES
+    :param value_field: optional field of the existing rows returned for every updated key
+    :param updates: False skips looking up the keys the upsert updates
+    :return: (rows to write, sorted list of conflicting keys, only filled in the error mode,
+        dictionary of the keys the upsert updates to value_field, only filled when updating)
+    """
+    keys = list(zip(*(chunk[column].tolist() for column in key_columns)))
+    duplicated = chunk.duplicated(
+        key_columns, keep="first" if on_conflict == "skip" else "last"
+    ).to_numpy()
+    if on_conflict == "update":
+        # rows with existing keys are updated by the upsert
+        updated = (
+            _existing_keys(model, key_fields, keys, value_field) if updates else {}
+        )
+        return chunk[~duplicated], [], updated
+    existing = _existing_keys(model, key_fields, keys)
+    if on_conflict == "error":
+        conflicts = {key for key, dup in zip(keys, duplicated) if dup} | set(existing)
+        return chunk, sorted(conflicts), {}
+    keep = [not dup and key not in existing for key, dup in zip(keys, duplicated)]
+    return chunk[keep], [], {}
+
+
+def _conflict_response(conflicts, describe):
+    """
+    400 response of an upload rejected in the error mode
+    :param conflicts: sorted list of conflicting natural keys
+    :param describe: function that formats a key for the error message
+    """
+    return Response(
+        {
+            "error": "Rows already exist or are repeated in the file: "
+            + ", ".join(describe(key) for key in conflicts[:10])
+            + (f" and {len(conflicts) - 10} more" if len(conflicts) > 10 else "")
+            + "."
+        },
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _bulk_write(model, objs, key_fields, update_fields, on_conflict):
+    """
+    Insert rows selected by _apply_on_conflict, as one upsert on the natural key when updating
+    :return: list of saved objects
+    """
+    if on_conflict == "update":
+        return model.objects.bulk_create(
+            objs,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=key_fields,
+            update_fields=update_fields,
+        )
+    return model.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+
+
+def _period_end_date(position_date, period_number, period_length):
+    """
+    End date of a stress scenario period, periods are period_length years long.
+    Periods of whole months, e.g. 0.5 or 0.25 years, end on the same day of the month
+    (or the month end), other fractional periods are counted in 365 day years
+    """
+    years = (period_number + 1) * period_length
+    months = 12 * years
+    if abs(months - round(months)) < 1e-9:
+        return position_date + relativedelta(months=round(months))
+    return position_date + datetime.timedelta(days=round(years * 365))
+
+
+def _portfolio_summary(
+    portfolio, position_date, scenario, period_end_date, scenario_positions
+):
+    """
+    Unsaved ScenarioPortfolioSummary of the scenario positions of a portfolio in one scenario
+    :param portfolio: id of the portfolio
+    :param scenario_positions: list of (ScenarioPosition, RiskScenario) pairs
+    """
+    risk = aggregate_portfolio_risk(
+        (
+            scenario_position.quantity,
+            scenario_position.discounted_value,
+            risk_scenario.dv01,
+            risk_scenario.modified_duration,
+            risk_scenario.convexity,
+            risk_scenario.key_rate_durations,
+        )
+        for scenario_position, risk_scenario in scenario_positions
+    )
+    return ScenarioPortfolioSummary(
+        portfolio_id=portfolio,
+        position_date=position_date,
+        scenario=scenario,
+        period_end_date=period_end_date,
+        discounted_value=risk["market_value"],
+        book_value=sum(position.book_value for position, _ in scenario_positions),
+        par_value=sum(position.par_value for position, _ in scenario_positions),
+        accrued_interest=sum(
+            position.quantity * risk_scenario.accrued_interest / 100
+            for position, risk_scenario in scenario_positions
+        ),
+        positions=len(scenario_positions),
+        dv01=risk["dv01"],
+        modified_duration=risk["modified_duration"],
+        convexity=risk["convexity"],
+        key_rate_durations=risk["key_rate_durations"],
+        positions_without_risk=risk["positions_without_risk"],
+    )
+
+
+def _delete_previous_scenario_rows(summaries):
+    """
+    Delete the scenario positions and their risk scenarios that an earlier run wrote for the
+    portfolios, position dates and scenarios of summaries
+    :param summaries: unsaved ScenarioPortfolioSummary rows about to be written
+    """
+    scenario_ids_by_key = {}
+    for summary in summaries:
+        scenario_ids_by_key.setdefault(
+            (summary.portfolio_id, summary.position_date), []
+        ).append(summary.scenario_id)
+    for (portfolio, position_date), scenario_ids in scenario_ids_by_key.items():
+        for start in range(0, len(scenario_ids), BULK_BATCH_SIZE):
+            previous_positions = ScenarioPosition.objects.filter(
+                portfolio_id=portfolio,
+                position_date=position_date,
+                scenario_id__in=scenario_ids[start : start + BULK_BATCH_SIZE],
+            )
+            risk_scenario_ids = list(
+                previous_positions.exclude(risk_scenario=None).values_list(
+                    "risk_scenario_id", flat=True
+                )
+            )
+            previous_positions.delete()
+            for risk_start in range(0, len(risk_scenario_ids), BULK_BATCH_SIZE):
+                RiskScenario.objects.filter(
+                    id__in=risk_scenario_ids[risk_start : risk_start + BULK_BATCH_SIZE]
+                ).delete()
+
+
+def _write_scenario_rows(scenario_positions, risk_scenarios, summaries):
+    """
+    Insert scenario positions and their risk scenarios, pairwise in the same order, and
+    the portfolio summaries of their scenarios in one transaction. Rows of an earlier run
+    of the same portfolio, date and scenario are replaced
+    :return: number of scenario positions written
+    """
+    with transaction.atomic():
+        _delete_previous_scenario_rows(summaries)
+        RiskScenario.objects.bulk_create(risk_scenarios, batch_size=BULK_BATCH_SIZE)
+        for scenario_position, risk_scenario in zip(scenario_positions, risk_scenarios):
+            scenario_position.risk_scenario = risk_scenario
+        ScenarioPosition.objects.bulk_create(
+            scenario_positions, batch_size=BULK_BATCH_SIZE
+        )
+        ScenarioPortfolioSummary.objects.bulk_create(
+            summaries,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["portfolio", "position_date", "scenario"],
+            update_fields=[
+                field.name
+                for field in ScenarioPortfolioSummary._meta.concrete_fields
+                if field.name not in ("id", "portfolio", "position_date", "scenario")
+            ],
+        )
+    return len(scenario_positions)
+
+
+def _period_valuation(
+    period_end_date, scenario_indices, live_positions, schedule_index
+):
+    """
+    Cashflows, accrued interest, dirty prices and yields of the live positions of a stress
+    scenario period, yields depend only on the period end date, not on the shocked curve
+    :return: ((period_end_date, scenario_indices, live_positions, valuation, ytm_result),
+        cashflows, times_to_cf, scenario_indices) as taken by iter_scenario_risk_measures
+    """
+    next_coupon_dates, prev_coupon_dates = schedule_index.next_and_prev_coupon_dates(
+        [pos.security_id for pos in live_positions], period_end_date
+    )
+    valuation = get_vanilla_bonds_cashflows(
+        period_end_date,
+        [pos.security.maturity for pos in live_positions],
+        [pos.security.fixed_coupon for pos in live_positions],
+        [pos.security.frequency for pos in live_positions],
+        next_coupon_dates=next_coupon_dates,
+        prev_coupon_dates=prev_coupon_dates,
+    )
+    valuation["dirty_prices"] = (
+        np.array([pos.book_price for pos in live_positions])
+        + valuation["accrued_interest"]
+    )
+    ytm_result = calc_ytm_of_vanilla_bonds(
+        valuation["dirty_prices"], valuation["cashflows"], valuation["times_to_cf"]
+    )
+    return (
+        (period_end_date, scenario_indices, live_positions, valuation, ytm_result),
+        valuation["cashflows"],
+        valuation["times_to_cf"],
+        scenario_indices,
+    )
+
+
+def _resolve_securities(identifiers):
+    """
+    Map client identifiers to securities with one query
+    :param identifiers: iterable of identifier_client values
+    :return: dictionary of identifiers to VanillaBondSecMaster, identifiers without a security are left out
+    """
+    return VanillaBondSecMaster.objects.in_bulk(
+        set(identifiers), field_name="identifier_client"
+    )
+
+
+def _missing_curve_points_response(curve_keys):
+    """400 response for (curve_name, adate) keys without curve points"""
+    return Response(
+        {
+            "error": "No curve points for "
+            + ", ".join(f"{name} on {adate}" for name, adate in sorted(curve_keys))
+            + "."
+        },
+        status=400,
+    )
+
+
+def _price_risk_cores(risk_keys, securities_by_id, curve_descs, curves):
+    """
+    Price one RiskCore per row of risk_keys, securities sharing a curve and risk date in one batch
+    :param risk_keys: DataFrame with curve_name, risk_date, security_id and price columns
+    :param securities_by_id: dictionary of security ids to VanillaBondSecMaster
+    :param curve_descs: dictionary of curve names to CurveDescription
+    :param curves: dictionary of (curve_name, risk_date) to Curve
+    :return: list of unsaved RiskCore in the order of risk_keys
+    """
+    schedule_index = CouponScheduleIndex.from_db(risk_keys["security_id"].tolist())
+    risk_cores = [None] * len(risk_keys)
+    for (curve_name, risk_date), group in risk_keys.reset_index(drop=True).groupby(
+        ["curve_name", "risk_date"], sort=False
+    ):
+        curve = curves[(curve_name, risk_date)]
+        securities = [
+            securities_by_id[security_id] for security_id in group["security_id"]
+        ]
+        next_coupon_dates, prev_coupon_dates = (
+            schedule_index.next_and_prev_coupon_dates(
+                group["security_id"].tolist(), risk_date
+            )
+        )
+        valuation = price_vanilla_bonds(
+            risk_date,
+            [sec.maturity for sec in securities],
+            [sec.fixed_coupon for sec in securities],
+            curve,
+            [sec.frequency for sec in securities],
+            next_coupon_dates=next_coupon_dates,
+            prev_coupon_dates=prev_coupon_dates,
+        )
+        dirty_prices = group["price"].to_numpy() + valuation["accrued_interest"]
+        ytm_result = calc_ytm_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"]
+        )
+        spread_result = calc_z_spread_of_vanilla_bonds(
+            dirty_prices, valuation["cashflows"], valuation["times_to_cf"], curve
+        )
+        risk = calc_risk_measures(
+            valuation["cashflows"], valuation["times_to_cf"], curve
+        )
+        for pos, (idx, security, price) in enumerate(
+            zip(group.index, securities, group["price"])
+        ):
+            risk_cores[idx] = RiskCore(
+                security=security,
+                risk_date=risk_date,
+                curve_description=curve_descs[curve_name],
+                price=float(price),
+                accrued_interest=float(valuation["accrued_interest"][pos]),
+                yield_to_maturity=_solved_rate(ytm_result, pos),
+                discounted_pv=float(valuation["pv"][pos]),
+                oas=_solved_rate(spread_result, pos),
+                **_risk_fields(risk, 0, pos),
+            )
+    return risk_cores
+
+
+def _finite_or_none(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _risk_fields(risk, row, idx):
+    """Risk measures of the bond at idx under the curve at row, as RiskCore / RiskScenario fields"""
+    return {
+        "dv01": _finite_or_none(risk["dv01"][row, idx]),
+        "modified_duration": _finite_or_none(risk["modified_duration"][row, idx]),
+        "convexity": _finite_or_none(risk["convexity"][row, idx]),
+        "key_rate_durations": key_rate_durations_by_tenor(
+            risk["tenors"], risk["key_rate_durations"][row, idx]
+        ),
+    }
+
+
+class QueryParamFilterMixin:
+    """
+    Filters the queryset of a viewset on query parameters. filter_fields maps parameter names
+    to lookups, e.g. {"curve_name": "curve_description__name"}, parameters that are not given
+    don't filter. Unknown parameters and invalid values are rejected with a 400 rather than
+    answered with an unfiltered list
+    """
+
+    filter_fields = {}
+
+    def _non_filter_params(self):
+        """Query parameters of pagination and format suffixes, which aren't filters"""
+        params = {api_settings.URL_FORMAT_OVERRIDE}
+        paginator = self.paginator
+        for attr in ("cursor_query_param", "page_size_query_param"):
+            params.add(getattr(paginator, attr, None))
+        return params
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        unknown = (
+            set(self.request.query_params)
+            - set(self.filter_fields)
+            - self._non_filter_params()
+        )
+        if unknown:
+            raise ValidationError(
+                {
+                    "error": f"Unknown filters {sorted(unknown)}, "
+                    f"filters are {sorted(self.filter_fields)}."
+                }
+            )
+        filters = {
+            lookup: self.request.query_params[param]
+            for param, lookup in self.filter_fields.items()
+            if param in self.request.query_params
+        }
+        try:
+            return queryset.filter(**filters)
+        except DjangoValidationError as e:
+            raise ValidationError({"error": f"Invalid filter: {' '.join(e.messages)}"})
+        except ValueError as e:
+            raise ValidationError({"error": f"Invalid filter: {e}"})
+
 
 class VanillaBondSecMasterViewSet(viewsets.ModelViewSet):
     queryset = VanillaBondSecMaster.objects.all()
@@ -55,6 +560,9 @@ class VanillaBondSecMasterViewSet(viewsets.ModelViewSet):
 
 class UploadVanillaBondsCSV(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    job_type = Job.UPLOAD_VANILLA_BONDS
+    natural_key = ["identifier_client"]
+    update_fields = ["asset_name", "fixed_coupon", "frequency", "maturity", "currency"]
 
     def post(self, request, format=None):
         file_obj = request.FILES.get("file")
@@ -62,56 +570,99 @@ class UploadVanillaBondsCSV(APIView):
             return Response(
                 {"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST
             )
-
+        error_response = _invalid_on_conflict_response(request.data)
+        if error_response:
+            return error_response
+        if _run_as_job(request):
+            return _submit_job(self.job_type, request, file_obj)
+        return self.process(request.data, file_obj)
+
+    def process(self, data, file_obj, progress=None):
         try:
-            df = pd.read_csv(file_obj)
-
-            required_columns = [
-                "identifier_client",
-                "asset_name",
-                "fixed_coupon",
-                "maturity",
-            ]
-            missing = [col for col in required_columns if col not in df.columns]
-            if missing:
-                return Response(
-                    {"error": f"Missing columns: {missing}"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Optional column
-            if "frequency" not in df.columns:
-                df["frequency"] = 2
-            else:
-                df["frequency"] = df["frequency"].fillna(2)
-
-            # if no currency set it to USD
-            if "currency" not in df.columns:
-                df["currency"] = "USD"
-            else:
-                df["currency"] = df["currency"].fillna("USD")
-
-            df["maturity"] = pd.to_datetime(df["maturity"]).dt.date
-
-            bonds = [
-                VanillaBondSecMaster(
-                    identifier_client=row["identifier_client"],
-                    asset_name=row["asset_name"],
-                    fixed_coupon=float(row["fixed_coupon"]),
-                    frequency=int(row["frequency"]),
-                    maturity=row["maturity"],
-                    currency=row["currency"],
-                )
-                for _, row in df.iterrows()
-            ]
-
-            VanillaBondSecMaster.objects.bulk_create(bonds)
+            on_conflict = _on_conflict_mode(data)
+            rows = 0
+            records_written = 0
+            records_updated = 0
+            schedules_created = 0
+            with transaction.atomic():
+                for chunk in read_csv_chunks(
+                    file_obj,
+                    required_columns=[
+                        "identifier_client",
+                        "asset_name",
+                        "fixed_coupon",
+                        "maturity",
+                    ],
+                    dtypes={
+                        "identifier_client": str,
+                        "asset_name": str,
+                        "fixed_coupon": "float64",
+                        "frequency": "int64",
+                        "currency": str,
+                    },
+                    date_columns=["maturity"],
+                    # Optional columns, if no currency set it to USD
+                    defaults={"frequency": 2, "currency": "USD"},
+                ):
+                    rows += len(chunk)
+                    chunk, conflicts, updated = _apply_on_conflict(
+                        chunk,
+                        VanillaBondSecMaster,
+                        self.natural_key,
+                        ["identifier_client"],
+                        on_conflict,
+                    )
+                    if conflicts:
+                        # rows of earlier chunks are not kept
+                        transaction.set_rollback(True)
+                        return _conflict_response(conflicts, lambda key: key[0])
+                    bonds = [
+                        VanillaBondSecMaster(
+                            identifier_client=identifier_client,
+                            asset_name=asset_name,
+                            fixed_coupon=fixed_coupon,
+                            frequency=frequency,
+                            maturity=maturity,
+                            currency=currency,
+                        )
+                        for identifier_client, asset_name, fixed_coupon, frequency, maturity, currency in zip(
+                            chunk["identifier_client"],
+                            chunk["asset_name"],
+                            chunk["fixed_coupon"].tolist(),
+                            chunk["frequency"].tolist(),
+                            chunk["maturity"],
+                            chunk["currency"],
+                        )
+                    ]
+                    bonds = _bulk_write(
+                        VanillaBondSecMaster,
+                        bonds,
+                        self.natural_key,
+                        self.update_fields,
+                        on_conflict,
+                    )
+                    records_written += len(bonds)
+                    records_updated += len(updated)
+                    # schedules of updated securities are regenerated
+                    schedules_created += create_coupon_schedules(
+                        bonds, update_conflicts=on_conflict == "update"
+                    )
+                    if progress is not None:
+                        progress(rows_written=records_written)
 
             return Response(
-                {"status": "Upload successful", "records_created": len(bonds)},
+                {
+                    "status": "Upload successful",
+                    "records_created": records_written - records_updated,
+                    "records_updated": records_updated,
+                    "rows_skipped": rows - records_written,
+                    "coupon_schedules": schedules_created,
+                },
                 status=status.HTTP_201_CREATED,
             )
 
+        except CSVValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -123,95 +674,176 @@ class SecurityIdentifierViewSet(viewsets.ModelViewSet):
     serializer_class = SecurityIdentifierSerializer
 
 
-class RiskCoreViewSet(viewsets.ModelViewSet):
-    queryset = RiskCore.objects.all()
+class RiskCoreViewSet(QueryParamFilterMixin, viewsets.ModelViewSet):
+    queryset = RiskCore.objects.select_related("security", "curve_description")
     serializer_class = RiskCoreSerializer
+    pagination_class = LargeTableCursorPagination
+    filter_fields = {
+        "security": "security__identifier_client",
+        "risk_date": "risk_date",
+        "curve_name": "curve_description__name",
+    }
 
 
 class RiskCoreUploadCSV(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    job_type = Job.UPLOAD_RISK_CORES
 
     def post(self, request, format=None):
         file_obj = request.FILES.get("file")
         if not file_obj:
             return Response({"error": "No file uploaded"}, status=400)
+        if _run_as_job(request):
+            return _submit_job(self.job_type, request, file_obj)
+        return self.process(request.data, file_obj)
 
+    def process(self, data, file_obj, progress=None):
         try:
-            df = pd.read_csv(file_obj)
-            required_cols = ["identifier_client", "adate", "price", "curve_name"]
-            missing = [col for col in required_cols if col not in df.columns]
-            if missing:
-                return Response({"error": f"Missing columns: {missing}"}, status=400)
-
-            df["adate"] = pd.to_datetime(df["adate"]).dt.date
-            adate = df["adate"].iloc[0]
-
-            # Fetch curve points
-            curve_name = df["curve_name"].iloc[0]
-            try:
-                curve_desc = CurveDescription.objects.get(name=curve_name)
-            except CurveDescription.DoesNotExist:
-                return Response(
-                    {"error": f"CurveDescription '{curve_name}' not found."}, status=400
-                )
-
-            curve_points = CurvePoint.objects.filter(
-                curve_description=curve_desc, adate=adate
-            )
-            curve = {float(p.year): p.rate for p in curve_points}
-
+            curve_descs = {}
+            curves = {}
+            securities = {}
+            not_found = set()
+            priced_keys = set()
             records = []
-            for _, row in df.iterrows():
-                try:
-                    bond = VanillaBondSecMaster.objects.get(
-                        identifier_client=row["identifier_client"]
+            duplicate_rows = 0
+            with transaction.atomic():
+                for chunk in read_csv_chunks(
+                    file_obj,
+                    required_columns=[
+                        "identifier_client",
+                        "adate",
+                        "price",
+                        "curve_name",
+                    ],
+                    dtypes={
+                        "identifier_client": str,
+                        "price": "float64",
+                        "curve_name": str,
+                    },
+                    date_columns=["adate"],
+                ):
+                    new_names = set(chunk["curve_name"]) - set(curve_descs)
+                    curve_descs.update(
+                        CurveDescription.objects.in_bulk(new_names, field_name="name")
+                    )
+                    missing = sorted(new_names - set(curve_descs))
+                    if missing:
+                        # rows of earlier chunks are not kept
+                        transaction.set_rollback(True)
+                        return Response(
+                            {"error": f"CurveDescription {missing} not found."},
+                            status=400,
+                        )
+                    new_curve_keys = set(
+                        zip(chunk["curve_name"], chunk["adate"])
+                    ) - set(curves)
+                    curves.update(get_curves(new_curve_keys))
+                    missing = new_curve_keys - set(curves)
+                    if missing:
+                        transaction.set_rollback(True)
+                        return _missing_curve_points_response(missing)
+
+                    new_identifiers = (
+                        set(chunk["identifier_client"]) - set(securities) - not_found
+                    )
+                    new_securities = _resolve_securities(new_identifiers)
+                    securities.update(new_securities)
+                    not_found |= new_identifiers - set(new_securities)
+
+                    chunk = chunk[chunk["identifier_client"].isin(securities)]
+                    chunk = chunk.assign(
+                        security_id=chunk["identifier_client"].map(
+                            lambda identifier: securities[identifier].id
+                        )
+                    )
+                    # rows with the same security, price, curve and date are priced and stored once
+                    key_columns = ["curve_name", "adate", "security_id", "price"]
+                    risk_keys = chunk.drop_duplicates(key_columns)
+                    # a boolean array, an empty list would select columns
+                    is_new = np.array(
+                        [
+                            key not in priced_keys
+                            for key in risk_keys[key_columns].itertuples(index=False)
+                        ],
+                        dtype=bool,
+                    )
+                    risk_keys = risk_keys[is_new]
+                    duplicate_rows += len(chunk) - len(risk_keys)
+                    priced_keys.update(
+                        risk_keys[key_columns].itertuples(index=False, name=None)
                     )
-                except VanillaBondSecMaster.DoesNotExist:
-                    continue  # skip unknown bonds
-
-                maturity = bond.maturity
-                coupon = float(bond.fixed_coupon)
-                price = float(row["price"])
-
-                ai = calc_accrued_interest(adate, maturity, coupon)
-                dirty_price = price + ai
-                ytm = calc_ytm_of_bond(dirty_price, coupon, adate, maturity)
-                pv = calc_pv_of_vanilla_bond(adate, maturity, coupon, curve)
-
-                rc = RiskCore(
-                    security=bond,
-                    risk_date=adate,
-                    price=price,
-                    yield_to_maturity=ytm,
-                    oas=0.0,  # Placeholder unless provided
-                    discounted_pv=pv,
-                    accrued_interest=ai,
-                )
-                records.append(rc)
 
-            RiskCore.objects.bulk_create(records)
+                    chunk_records = _price_risk_cores(
+                        risk_keys.rename(columns={"adate": "risk_date"}),
+                        {security.id: security for security in securities.values()},
+                        curve_descs,
+                        curves,
+                    )
+                    # RiskCores have no natural key to upsert on, a security has one per
+                    # price, date and curve, so the upload takes no on_conflict and inserts
+                    RiskCore.objects.bulk_create(
+                        chunk_records, batch_size=BULK_BATCH_SIZE
+                    )
+                    records.extend(
+                        (
+                            record.security.identifier_client,
+                            record.yield_to_maturity is None,
+                            record.oas is None,
+                        )
+                        for record in chunk_records
+                    )
+                    if progress is not None:
+                        progress(rows_written=len(records))
 
             return Response(
-                {"status": "Upload successful", "records_created": len(records)},
+                {
+                    "status": "Upload successful",
+                    "records_created": len(records),
+                    "duplicate_rows": duplicate_rows,
+                    "skipped_identifiers": sorted(not_found),
+                    "ytm_not_converged": sorted(
+                        identifier
+                        for identifier, ytm_failed, _ in records
+                        if ytm_failed
+                    ),
+                    "spread_not_converged": sorted(
+                        identifier
+                        for identifier, _, spread_failed in records
+                        if spread_failed
+                    ),
+                },
                 status=201,
             )
 
+        except CSVValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
-class RiskScenarioViewSet(viewsets.ModelViewSet):
-    queryset = RiskScenario.objects.all()
+class RiskScenarioViewSet(QueryParamFilterMixin, viewsets.ModelViewSet):
+    queryset = RiskScenario.objects.select_related(
+        "security", "scenario__scenario"
+    ).prefetch_related(_prefetch_shocks("scenario"))
     serializer_class = RiskScenarioSerializer
+    pagination_class = LargeTableCursorPagination
+    filter_fields = {
+        "scenario_name": "scenario__scenario__name",
+        "period_number": "scenario__period_number",
+        "simulation_number": "scenario__simulation_number",
+        "security": "security__identifier_client",
+    }
 
 
+@_conditional_gets(DataVersion.CURVES)
 class CurveDescriptionViewSet(viewsets.ModelViewSet):
     queryset = CurveDescription.objects.all()
     serializer_class = CurveDescriptionSerializer
 
 
+@_conditional_gets(DataVersion.CURVES)
 class CurvePointViewSet(viewsets.ModelViewSet):
-    queryset = CurvePoint.objects.all()
+    queryset = CurvePoint.objects.select_related("curve_description")
     serializer_class = CurvePointSerializer
 
     def create(self, request, *args, **kwargs):
@@ -226,24 +858,56 @@ class CurvePointViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@_conditional_gets(DataVersion.STRESS_SCENARIOS)
 class StressScenarioDescriptionViewSet(viewsets.ModelViewSet):
     queryset = StressScenarioDescription.objects.all()
     serializer_class = StressScenarioDescriptionSerializer
 
 
-class CurvePointShockViewSet(viewsets.ModelViewSet):
-    queryset = CurvePointShock.objects.all()
+@_conditional_gets(DataVersion.STRESS_SCENARIOS, DataVersion.CURVES)
+class CurvePointShockViewSet(QueryParamFilterMixin, viewsets.ModelViewSet):
+    queryset = CurvePointShock.objects.select_related(
+        "curve_point__curve_description", "stress_scenario__scenario"
+    )
     serializer_class = CurvePointShockSerializer
+    pagination_class = LargeTableCursorPagination
+    filter_fields = {
+        "scenario_name": "stress_scenario__scenario__name",
+        "period_number": "stress_scenario__period_number",
+        "simulation_number": "stress_scenario__simulation_number",
+        "curve_name": "curve_point__curve_description__name",
+        "adate": "curve_point__adate",
+    }
 
 
+@_conditional_gets(DataVersion.STRESS_SCENARIOS, DataVersion.CURVES)
 class StressScenarioViewSet(viewsets.ModelViewSet):
-    queryset = StressScenario.objects.all()
+    queryset = StressScenario.objects.select_related("scenario").prefetch_related(
+        _prefetch_shocks(None)
+    )
     serializer_class = StressScenarioSerializer
 
 
-class PositionViewSet(viewsets.ModelViewSet):
-    queryset = Position.objects.all()
+class PortfolioViewSet(viewsets.ModelViewSet):
+    queryset = Portfolio.objects.all()
+    serializer_class = PortfolioSerializer
+
+
+class PositionViewSet(QueryParamFilterMixin, viewsets.ModelViewSet):
+    queryset = Position.objects.select_related(
+        "portfolio",
+        "security",
+        "risk_core__security",
+        "risk_core__curve_description",
+    )
     serializer_class = PositionSerializer
+    pagination_class = LargeTableCursorPagination
+    filter_fields = {
+        "portfolio_name": "portfolio__name",
+        "position_date": "position_date",
+        "security": "security__identifier_client",
+        "curve_name": "risk_core__curve_description__name",
+    }
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -255,9 +919,27 @@ class PositionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ScenarioPositionViewSet(viewsets.ModelViewSet):
-    queryset = ScenarioPosition.objects.all()
+class ScenarioPositionViewSet(QueryParamFilterMixin, viewsets.ModelViewSet):
+    queryset = ScenarioPosition.objects.select_related(
+        "portfolio",
+        "security",
+        "scenario__scenario",
+        "risk_scenario__security",
+        "risk_scenario__scenario__scenario",
+    ).prefetch_related(
+        _prefetch_shocks("scenario"), _prefetch_shocks("risk_scenario__scenario")
+    )
     serializer_class = ScenarioPositionSerializer
+    pagination_class = LargeTableCursorPagination
+    filter_fields = {
+        "portfolio_name": "portfolio__name",
+        "position_date": "position_date",
+        "scenario_name": "scenario__scenario__name",
+        "period_number": "scenario__period_number",
+        "simulation_number": "scenario__simulation_number",
+        "period_end_date": "period_end_date",
+        "security": "security__identifier_client",
+    }
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -269,18 +951,38 @@ class ScenarioPositionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class ScenarioPortfolioSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ScenarioPortfolioSummary.objects.select_related("portfolio", "scenario")
+    serializer_class = ScenarioPortfolioSummarySerializer
+
+
 class TransactionViewSet(viewsets.ModelViewSet):
-    queryset = Transaction.objects.all()
+    queryset = Transaction.objects.select_related(
+        "portfolio", "scenario__scenario"
+    ).prefetch_related(_prefetch_shocks("scenario"))
     serializer_class = TransactionSerializer
 
 
 class AborPnLViewSet(viewsets.ModelViewSet):
-    queryset = AborPnL.objects.all()
+    queryset = AborPnL.objects.select_related(
+        "portfolio", "scenario__scenario"
+    ).prefetch_related(_prefetch_shocks("scenario"))
     serializer_class = AborPnLSerializer
 
 
 class PositionUploadCSV(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    job_type = Job.UPLOAD_POSITIONS
+    natural_key = ["portfolio", "position_date", "security", "lot_id"]
+    update_fields = [
+        "risk_core",
+        "quantity",
+        "notional_amount",
+        "par_value",
+        "book_price",
+        "book_value",
+        "discounted_value",
+    ]
 
     def post(self, request, format=None):
         file_obj = request.FILES.get("file")
@@ -288,128 +990,285 @@ class PositionUploadCSV(APIView):
             return Response(
                 {"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST
             )
+        error_response = _invalid_on_conflict_response(request.data)
+        if error_response:
+            return error_response
+        if _run_as_job(request):
+            return _submit_job(self.job_type, request, file_obj)
+        return self.process(request.data, file_obj)
+
+    @staticmethod
+    def _describe_position(key, portfolios, securities):
+        portfolio, position_date, security_id, lot_id = key
+        portfolio_name = next(
+            name
+            for name, portfolio_id in portfolios.items()
+            if portfolio_id == portfolio
+        )
+        identifier = next(
+            identifier
+            for identifier, security in securities.items()
+            if security.id == security_id
+        )
+        return f"{portfolio_name} on {position_date} - {identifier} lot {lot_id}"
+
+    def _positions_to_write(self, chunk, portfolios, securities, on_conflict, **kwargs):
+        """Rows of a chunk to write as positions, see _apply_on_conflict"""
+        chunk = chunk.assign(
+            portfolio_id=[portfolios[name] for name in chunk["portfolio_name"]],
+            security_id=[
+                securities[identifier].id for identifier in chunk["identifier_client"]
+            ],
+        )
+        return _apply_on_conflict(
+            chunk,
+            Position,
+            self.natural_key,
+            ["portfolio_id", "position_date", "security_id", "lot_id"],
+            on_conflict,
+            **kwargs,
+        )
 
+    def process(self, data, file_obj, progress=None):
         try:
-            df = pd.read_csv(file_obj)
+            on_conflict = _on_conflict_mode(data)
+            csv_options = dict(
+                required_columns=[
+                    "portfolio_name",
+                    "position_date",
+                    "identifier_client",
+                    "quantity",
+                    "book_price",
+                    "curve_name",
+                ],
+                dtypes={
+                    "portfolio_name": str,
+                    "identifier_client": str,
+                    "quantity": "float64",
+                    "book_price": "float64",
+                    "curve_name": str,
+                    "lot_id": "int64",
+                },
+                date_columns=["position_date"],
+                # Optional column
+                defaults={"lot_id": 0},
+            )
 
-            required_columns = [
-                "portfolio_name",
-                "position_date",
-                "identifier_client",
-                "quantity",
-                "book_price",
-                "curve_name",
-            ]
-            missing = [col for col in required_columns if col not in df.columns]
-            if missing:
-                return Response(
-                    {"error": f"Missing required columns: {missing}"}, status=400
+            # first pass: resolve securities and sum quantities and weighted book prices
+            # of the positions to write per security, date and curve
+            key_columns = ["curve_name", "position_date", "security_id"]
+            portfolios = {}
+            securities = {}
+            not_found = set()
+            risk_keys = []
+            for chunk in read_csv_chunks(file_obj, **csv_options):
+                if progress is not None:
+                    progress()
+                new_identifiers = (
+                    set(chunk["identifier_client"]) - set(securities) - not_found
                 )
+                new_securities = _resolve_securities(new_identifiers)
+                securities.update(new_securities)
+                not_found |= new_identifiers - set(new_securities)
+                if not_found:
+                    # read on to report all unknown identifiers
+                    continue
 
-            df["position_date"] = pd.to_datetime(df["position_date"]).dt.date
-            position_records = []
-
-            for _, row in df.iterrows():
-                identifier = row["identifier_client"]
-                curve_name = row["curve_name"]
-                position_date = row["position_date"]
-
-                try:
-                    security = VanillaBondSecMaster.objects.get(
-                        identifier_client=identifier
+                new_portfolios = set(chunk["portfolio_name"]) - set(portfolios)
+                portfolios.update(portfolio_ids(new_portfolios))
+                # portfolios that don't exist yet get negative ids, which no position has,
+                # until the second pass creates them
+                for name in sorted(new_portfolios - set(portfolios)):
+                    portfolios[name] = -len(portfolios) - 1
+                # the first pass only looks for conflicts
+                chunk, conflicts, _ = self._positions_to_write(
+                    chunk, portfolios, securities, on_conflict, updates=False
+                )
+                if conflicts:
+                    return _conflict_response(
+                        conflicts,
+                        lambda key: self._describe_position(
+                            key, portfolios, securities
+                        ),
                     )
-                except VanillaBondSecMaster.DoesNotExist:
-                    return Response(
-                        {
-                            "error": f"Security with identifier '{identifier}' not found."
-                        },
-                        status=400,
+                risk_keys.append(
+                    chunk.assign(
+                        weighted_book_price=chunk["quantity"] * chunk["book_price"],
+                        lots=1,
                     )
-
-                try:
-                    curve_desc = CurveDescription.objects.get(name=curve_name)
-                except CurveDescription.DoesNotExist:
-                    return Response(
-                        {"error": f"Curve '{curve_name}' not found."}, status=400
+                    .groupby(key_columns, sort=False)
+                    .agg(
+                        quantity=("quantity", "sum"),
+                        weighted_book_price=("weighted_book_price", "sum"),
+                        book_price=("book_price", "sum"),
+                        lots=("lots", "sum"),
                     )
-
-                curve_points_qs = CurvePoint.objects.filter(
-                    curve_description=curve_desc, adate=position_date
                 )
-                if not curve_points_qs.exists():
-                    return Response(
-                        {
-                            "error": f"No curve points for {curve_name} on {position_date}."
-                        },
-                        status=400,
-                    )
-
-                curve_points = list(curve_points_qs.order_by("year"))
-                curve_dict = {float(cp.year): cp.rate for cp in curve_points}
 
-                quantity = float(row["quantity"])
-                book_price = float(row["book_price"])
+            if not_found:
+                return Response(
+                    {
+                        "error": f"Securities with identifiers {sorted(not_found)} not found."
+                    },
+                    status=400,
+                )
 
-                notional_amount = quantity * book_price / 100
-                par_value = quantity
-                book_value = notional_amount
+            risk_keys = (
+                pd.concat(risk_keys).groupby(level=key_columns, sort=False).sum()
+            )
+            risk_keys = risk_keys.reset_index()
 
-                ai = calc_accrued_interest(
-                    position_date, security.maturity, security.fixed_coupon
-                )
-                dirty_price = book_price + ai
-                ytm = calc_ytm_of_bond(
-                    dirty_price, security.fixed_coupon, position_date, security.maturity
-                )
-                pv = calc_pv_of_vanilla_bond(
-                    position_date,
-                    security.maturity,
-                    security.fixed_coupon,
-                    curve_dict,
-                    freq=security.frequency,
-                )
+            curve_descs = CurveDescription.objects.in_bulk(
+                risk_keys["curve_name"].unique().tolist(), field_name="name"
+            )
+            missing = sorted(set(risk_keys["curve_name"]) - set(curve_descs))
+            if missing:
+                return Response({"error": f"Curves {missing} not found."}, status=400)
 
-                risk_core = RiskCore.objects.create(
-                    security=security,
-                    risk_date=position_date,
-                    curve_description=curve_desc,
-                    price=book_price,
-                    accrued_interest=ai,
-                    yield_to_maturity=ytm,
-                    discounted_pv=pv,
-                    oas=0.0,
+            curve_keys = set(zip(risk_keys["curve_name"], risk_keys["position_date"]))
+            curves = get_curves(curve_keys)
+            missing = curve_keys - set(curves)
+            if missing:
+                return _missing_curve_points_response(missing)
+
+            # one RiskCore per security, date and curve, priced at the quantity weighted book price of its lots
+            risk_keys["price"] = np.where(
+                risk_keys["quantity"] != 0,
+                risk_keys["weighted_book_price"]
+                / risk_keys["quantity"].where(risk_keys["quantity"] != 0, 1),
+                risk_keys["book_price"] / risk_keys["lots"],
+            )
+            risk_keys["risk_core_idx"] = np.arange(len(risk_keys))
+
+            risk_cores = (
+                _price_risk_cores(
+                    risk_keys.rename(columns={"position_date": "risk_date"}),
+                    {security.id: security for security in securities.values()},
+                    curve_descs,
+                    curves,
                 )
+                if len(risk_keys)
+                else []
+            )
 
-                discounted_value = quantity * pv / 100
-
-                position = Position(
-                    security=security,
-                    portfolio_name=row["portfolio_name"],
-                    position_date=position_date,
-                    lot_id=0,  # <-- Set lot_id to 0
-                    quantity=quantity,
-                    notional_amount=notional_amount,
-                    par_value=par_value,
-                    book_price=book_price,
-                    book_value=book_value,
-                    discounted_value=discounted_value,
-                    risk_core=risk_core,
+            rows = 0
+            positions_written = 0
+            positions_updated = 0
+            replaced_risk_core_ids = set()
+            with transaction.atomic():
+                portfolios.update(
+                    portfolio_ids(
+                        [name for name, key in portfolios.items() if key < 0],
+                        create=True,
+                    )
                 )
+                RiskCore.objects.bulk_create(risk_cores, batch_size=BULK_BATCH_SIZE)
+
+                # second pass: write the positions of every chunk against their RiskCore
+                for chunk in read_csv_chunks(file_obj, **csv_options):
+                    rows += len(chunk)
+                    chunk, conflicts, updated = self._positions_to_write(
+                        chunk,
+                        portfolios,
+                        securities,
+                        on_conflict,
+                        value_field="risk_core",
+                    )
+                    if conflicts:
+                        # rows of earlier chunks are not kept
+                        transaction.set_rollback(True)
+                        return _conflict_response(
+                            conflicts,
+                            lambda key: self._describe_position(
+                                key, portfolios, securities
+                            ),
+                        )
+                    positions_updated += len(updated)
+                    replaced_risk_core_ids.update(updated.values())
 
-                position_records.append(position)
+                    chunk = chunk.merge(
+                        risk_keys[key_columns + ["risk_core_idx"]],
+                        on=key_columns,
+                        how="left",
+                    )
+                    position_records = []
+                    for row in chunk.itertuples(index=False):
+                        risk_core = risk_cores[row.risk_core_idx]
+                        notional_amount = row.quantity * row.book_price / 100
+                        position_records.append(
+                            Position(
+                                security=risk_core.security,
+                                portfolio_id=row.portfolio_id,
+                                position_date=row.position_date,
+                                lot_id=row.lot_id,
+                                quantity=row.quantity,
+                                notional_amount=notional_amount,
+                                par_value=row.quantity,
+                                book_price=row.book_price,
+                                book_value=notional_amount,
+                                discounted_value=row.quantity
+                                * risk_core.discounted_pv
+                                / 100,
+                                risk_core=risk_core,
+                            )
+                        )
+                    _bulk_write(
+                        Position,
+                        position_records,
+                        self.natural_key,
+                        self.update_fields,
+                        on_conflict,
+                    )
+                    positions_written += len(position_records)
+                    if progress is not None:
+                        progress(rows_written=positions_written)
+
+                # RiskCores of updated positions are replaced by the new ones
+                replaced_risk_core_ids.discard(None)
+                replaced_risk_core_ids = list(replaced_risk_core_ids)
+                for start in range(0, len(replaced_risk_core_ids), BULK_BATCH_SIZE):
+                    RiskCore.objects.filter(
+                        id__in=replaced_risk_core_ids[start : start + BULK_BATCH_SIZE],
+                        positions__isnull=True,
+                    ).delete()
 
-            Position.objects.bulk_create(position_records)
             return Response(
-                {"status": "Upload successful", "rows": len(position_records)},
+                {
+                    "status": "Upload successful",
+                    "rows": positions_written,
+                    "positions_created": positions_written - positions_updated,
+                    "positions_updated": positions_updated,
+                    "rows_skipped": rows - positions_written,
+                    "risk_cores": len(risk_cores),
+                    "ytm_not_converged": sorted(
+                        {
+                            risk_core.security.identifier_client
+                            for risk_core in risk_cores
+                            if risk_core.yield_to_maturity is None
+                        }
+                    ),
+                    "spread_not_converged": sorted(
+                        {
+                            risk_core.security.identifier_client
+                            for risk_core in risk_cores
+                            if risk_core.oas is None
+                        }
+                    ),
+                },
                 status=201,
             )
 
+        except CSVValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
 class CurveUploadCSV(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    job_type = Job.UPLOAD_CURVE
+    natural_key = ["curve_description", "adate", "year"]
+    update_fields = ["rate"]
 
     def post(self, request, format=None):
         file_obj = request.FILES.get("file")
@@ -417,80 +1276,144 @@ class CurveUploadCSV(APIView):
             return Response(
                 {"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST
             )
-
+        error_response = _invalid_on_conflict_response(request.data)
+        if error_response:
+            return error_response
+        if _run_as_job(request):
+            return _submit_job(self.job_type, request, file_obj)
+        return self.process(request.data, file_obj)
+
+    def process(self, data, file_obj, progress=None):
         try:
-            df = pd.read_csv(file_obj)
-
-            required_columns = ["adate", "curve_name", "year", "rate"]
-            missing = [col for col in required_columns if col not in df.columns]
-            if missing:
-                return Response({"error": f"Missing columns: {missing}"}, status=400)
-
-            # Optional column: curve_description
-            if "curve_description" not in df.columns:
-                df["curve_description"] = df["curve_name"]
-            else:
-                df["curve_description"] = df["curve_description"].fillna(
-                    df["curve_name"]
-                )
-
-            df["adate"] = pd.to_datetime(df["adate"]).dt.date
-
-            # Get unique (name, description) pairs
-            curve_info = df[["curve_name", "curve_description"]].drop_duplicates()
-            existing = {
-                c.name: c
-                for c in CurveDescription.objects.filter(
-                    name__in=curve_info["curve_name"].unique()
-                )
-            }
-
-            new = [
-                CurveDescription(name=row.curve_name, description=row.curve_description)
-                for row in curve_info.itertuples(index=False)
-                if row.curve_name not in existing
-            ]
-            CurveDescription.objects.bulk_create(new)
+            on_conflict = _on_conflict_mode(data)
+            all_curves = {}
+            rows = 0
+            points_written = 0
+            points_updated = 0
+            with transaction.atomic():
+                for chunk in read_csv_chunks(
+                    file_obj,
+                    required_columns=["adate", "curve_name", "year", "rate"],
+                    dtypes={
+                        "curve_name": str,
+                        "curve_description": str,
+                        "year": "int64",
+                        "rate": "float64",
+                    },
+                    date_columns=["adate"],
+                ):
+                    # Optional column: curve_description
+                    if "curve_description" not in chunk.columns:
+                        chunk["curve_description"] = chunk["curve_name"]
+                    else:
+                        chunk["curve_description"] = chunk["curve_description"].fillna(
+                            chunk["curve_name"]
+                        )
 
-            all_curves = {
-                c.name: c
-                for c in CurveDescription.objects.filter(
-                    name__in=curve_info["curve_name"].unique()
-                )
-            }
+                    # Get unique (name, description) pairs of curves not seen in earlier chunks
+                    curve_info = chunk[
+                        ~chunk["curve_name"].isin(all_curves)
+                    ].drop_duplicates("curve_name")
+                    if len(curve_info):
+                        names = curve_info["curve_name"].tolist()
+                        existing = CurveDescription.objects.in_bulk(
+                            names, field_name="name"
+                        )
+                        CurveDescription.objects.bulk_create(
+                            [
+                                CurveDescription(name=name, description=description)
+                                for name, description in zip(
+                                    curve_info["curve_name"],
+                                    curve_info["curve_description"],
+                                )
+                                if name not in existing
+                            ]
+                        )
+                        all_curves.update(
+                            CurveDescription.objects.in_bulk(names, field_name="name")
+                        )
 
-            points = []
-            for _, row in df.iterrows():
-                points.append(
-                    CurvePoint(
-                        curve_description=all_curves[row["curve_name"]],
-                        adate=row["adate"],
-                        year=int(row["year"]),
-                        rate=float(row["rate"]),
+                    rows += len(chunk)
+                    chunk = chunk.assign(
+                        curve_description_id=[
+                            all_curves[curve_name].id
+                            for curve_name in chunk["curve_name"]
+                        ]
                     )
-                )
+                    chunk, conflicts, updated = _apply_on_conflict(
+                        chunk,
+                        CurvePoint,
+                        self.natural_key,
+                        ["curve_description_id", "adate", "year"],
+                        on_conflict,
+                    )
+                    if conflicts:
+                        curve_names = {
+                            curve.id: name for name, curve in all_curves.items()
+                        }
+                        # rows of earlier chunks are not kept
+                        transaction.set_rollback(True)
+                        return _conflict_response(
+                            conflicts,
+                            lambda key: f"{curve_names[key[0]]} on {key[1]} - Year {key[2]}",
+                        )
 
-            CurvePoint.objects.bulk_create(points)
+                    points = [
+                        CurvePoint(
+                            curve_description_id=curve_description_id,
+                            adate=adate,
+                            year=year,
+                            rate=rate,
+                        )
+                        for curve_description_id, adate, year, rate in zip(
+                            chunk["curve_description_id"],
+                            chunk["adate"],
+                            chunk["year"].tolist(),
+                            chunk["rate"].tolist(),
+                        )
+                    ]
+                    _bulk_write(
+                        CurvePoint,
+                        points,
+                        self.natural_key,
+                        self.update_fields,
+                        on_conflict,
+                    )
+                    points_written += len(points)
+                    points_updated += len(updated)
+                    if progress is not None:
+                        progress(rows_written=points_written)
+                # bulk writes send no signals
+                if points_written:
+                    invalidate_curves()
+                    bump_versions(DataVersion.CURVES)
 
             return Response(
                 {
                     "status": "Upload successful",
                     "curves": len(all_curves),
-                    "points": len(points),
+                    "points": points_written,
+                    "points_created": points_written - points_updated,
+                    "points_updated": points_updated,
+                    "rows_skipped": rows - points_written,
                 },
                 status=201,
             )
 
+        except CSVValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
+@method_decorator(conditional_on(DataVersion.CURVES), name="get")
 class FilteredCurveView(APIView):
     def get(self, request, curve_name, adate):
         try:
-            points = CurvePoint.objects.filter(
-                curve_description__name=curve_name, adate=adate
-            ).order_by("year")
+            snapshot = get_curve_snapshot(
+                curve_name, datetime.date.fromisoformat(adate)
+            )
+            points = snapshot.curve_points() if snapshot else []
 
             serializer = CurvePointSerializer(points, many=True)
             return Response(serializer.data)
@@ -501,6 +1424,13 @@ class FilteredCurveView(APIView):
             )
 
 
+class CurveCacheView(APIView):
+    """Hits, misses and size of the in-process curve cache of this server process"""
+
+    def get(self, request):
+        return Response(curve_cache_stats())
+
+
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
@@ -517,6 +1447,9 @@ from .models import (
 
 class StressScenarioUploadCSV(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    job_type = Job.UPLOAD_STRESS_SCENARIOS
+    natural_key = ["stress_scenario", "curve_point"]
+    update_fields = ["shock_size"]
 
     def post(self, request, format=None):
         file_obj = request.FILES.get("file")
@@ -524,106 +1457,273 @@ class StressScenarioUploadCSV(APIView):
             return Response(
                 {"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST
             )
-
+        error_response = _invalid_on_conflict_response(request.data)
+        if error_response:
+            return error_response
+        if _run_as_job(request):
+            return _submit_job(self.job_type, request, file_obj)
+        return self.process(request.data, file_obj)
+
+    def process(self, data, file_obj, progress=None):
         try:
-            df = pd.read_csv(file_obj)
-
-            required_columns = [
-                "scenario_name",
-                "period_number",
-                "simulation_number",
-                "curve_name",
-                "curve_adate",
-                "curve_year",
-                "period_length",
-                "parallel_shock_size",
-            ]
-            missing = [col for col in required_columns if col not in df.columns]
-            if missing:
-                return Response(
-                    {"error": f"Missing required columns: {missing}"}, status=400
-                )
-
-            df["curve_adate"] = pd.to_datetime(df["curve_adate"]).dt.date
-
-            scenario_cache = {}
-            shock_records = []
-
-            for _, row in df.iterrows():
-                # Get or create StressScenarioDescription
-                scenario_desc, _ = StressScenarioDescription.objects.get_or_create(
-                    name=row["scenario_name"]
-                )
+            on_conflict = _on_conflict_mode(data)
+            curve_point_ids = {}
+            scenario_descs = {}
+            scenario_ids = {}
+            rows = 0
+            shocks_written = 0
+            shocks_updated = 0
+            scenarios_created = 0
+            written_scenario_ids = set()
+            with transaction.atomic():
+                for chunk in read_csv_chunks(
+                    file_obj,
+                    required_columns=[
+                        "scenario_name",
+                        "period_number",
+                        "simulation_number",
+                        "curve_name",
+                        "curve_adate",
+                        "curve_year",
+                        "period_length",
+                        "parallel_shock_size",
+                    ],
+                    dtypes={
+                        "scenario_name": str,
+                        "period_number": "int64",
+                        "simulation_number": "int64",
+                        "curve_name": str,
+                        "curve_year": "int64",
+                        "parallel_shock_size": "float64",
+                    },
+                    date_columns=["curve_adate"],
+                ):
+                    # resolve the (curve, adate, year) keys not seen in earlier chunks with one query
+                    curve_point_keys = list(
+                        zip(
+                            chunk["curve_name"],
+                            chunk["curve_adate"],
+                            chunk["curve_year"],
+                        )
+                    )
+                    new_keys = set(curve_point_keys) - set(curve_point_ids)
+                    if new_keys:
+                        curve_point_ids.update(
+                            {
+                                (name, adate, year): curve_point_id
+                                for name, adate, year, curve_point_id in CurvePoint.objects.filter(
+                                    curve_description__name__in={
+                                        name for name, _, _ in new_keys
+                                    },
+                                    adate__in={adate for _, adate, _ in new_keys},
+                                    year__in={year for _, _, year in new_keys},
+                                ).values_list(
+                                    "curve_description__name", "adate", "year", "id"
+                                )
+                            }
+                        )
+                    missing = sorted(new_keys - set(curve_point_ids))
+                    if missing:
+                        curve_name, curve_adate, curve_year = missing[0]
+                        # rows of earlier chunks are not kept
+                        transaction.set_rollback(True)
+                        return Response(
+                            {
+                                "error": f"CurvePoint not found: {curve_name} - {curve_adate} - Year {curve_year}"
+                                + (
+                                    f" and {len(missing) - 1} more"
+                                    if len(missing) > 1
+                                    else ""
+                                )
+                            },
+                            status=400,
+                        )
 
-                key = (scenario_desc.id, row["period_number"], row["simulation_number"])
+                    scenario_names = list(
+                        set(chunk["scenario_name"]) - set(scenario_descs)
+                    )
+                    if scenario_names:
+                        StressScenarioDescription.objects.bulk_create(
+                            [
+                                StressScenarioDescription(name=name)
+                                for name in set(scenario_names)
+                                - set(
+                                    StressScenarioDescription.objects.filter(
+                                        name__in=scenario_names
+                                    ).values_list("name", flat=True)
+                                )
+                            ]
+                        )
+                        new_descs = StressScenarioDescription.objects.in_bulk(
+                            scenario_names, field_name="name"
+                        )
+                        scenario_descs.update(new_descs)
+                        scenario_ids.update(
+                            {
+                                (
+                                    scenario_id,
+                                    period_number,
+                                    simulation_number,
+                                ): stress_scenario_id
+                                for scenario_id, period_number, simulation_number, stress_scenario_id in StressScenario.objects.filter(
+                                    scenario__in=new_descs.values()
+                                ).values_list(
+                                    "scenario_id",
+                                    "period_number",
+                                    "simulation_number",
+                                    "id",
+                                )
+                            }
+                        )
 
-                # Cache StressScenario to avoid redundant DB calls
-                if key not in scenario_cache:
-                    stress_scenario, _ = StressScenario.objects.get_or_create(
-                        scenario=scenario_desc,
-                        period_number=row["period_number"],
-                        simulation_number=row["simulation_number"],
-                        defaults={"period_length": row["period_length"]},
+                    # create the StressScenario rows that don't exist yet, the first
+                    # period_length of a scenario wins like with get_or_create
+                    scenario_keys = chunk.drop_duplicates(
+                        ["scenario_name", "period_number", "simulation_number"]
                     )
-                    scenario_cache[key] = stress_scenario
-                else:
-                    stress_scenario = scenario_cache[key]
-
-                # Get CurvePoint
-                try:
-                    curve_desc = CurveDescription.objects.get(name=row["curve_name"])
-                    curve_point = CurvePoint.objects.get(
-                        curve_description=curve_desc,
-                        adate=row["curve_adate"],
-                        year=int(row["curve_year"]),
+                    new_scenarios = []
+                    for row in scenario_keys.itertuples(index=False):
+                        key = (
+                            scenario_descs[row.scenario_name].id,
+                            row.period_number,
+                            row.simulation_number,
+                        )
+                        if key not in scenario_ids:
+                            new_scenarios.append(
+                                StressScenario(
+                                    scenario=scenario_descs[row.scenario_name],
+                                    period_number=row.period_number,
+                                    simulation_number=row.simulation_number,
+                                    period_length=row.period_length,
+                                )
+                            )
+                    StressScenario.objects.bulk_create(
+                        new_scenarios, batch_size=BULK_BATCH_SIZE
                     )
-                except CurvePoint.DoesNotExist:
-                    return Response(
-                        {
-                            "error": f"CurvePoint not found: {row['curve_name']} - {row['curve_adate']} - Year {row['curve_year']}"
-                        },
-                        status=400,
+                    for scenario in new_scenarios:
+                        scenario_ids[
+                            (
+                                scenario.scenario_id,
+                                scenario.period_number,
+                                scenario.simulation_number,
+                            )
+                        ] = scenario.id
+                    scenarios_created += len(new_scenarios)
+
+                    rows += len(chunk)
+                    chunk = chunk.assign(
+                        stress_scenario_id=[
+                            scenario_ids[(scenario_descs[name].id, period, simulation)]
+                            for name, period, simulation in zip(
+                                chunk["scenario_name"],
+                                chunk["period_number"],
+                                chunk["simulation_number"],
+                            )
+                        ],
+                        curve_point_id=[
+                            curve_point_ids[key] for key in curve_point_keys
+                        ],
                     )
+                    chunk, conflicts, updated = _apply_on_conflict(
+                        chunk,
+                        CurvePointShock,
+                        self.natural_key,
+                        ["stress_scenario_id", "curve_point_id"],
+                        on_conflict,
+                    )
+                    if conflicts:
+                        # rows of earlier chunks are not kept
+                        transaction.set_rollback(True)
+                        return _conflict_response(
+                            conflicts,
+                            lambda key: f"shock of scenario {key[0]} on curve point {key[1]}",
+                        )
+                    shocks = [
+                        CurvePointShock(
+                            stress_scenario_id=stress_scenario_id,
+                            curve_point_id=curve_point_id,
+                            shock_size=shock_size,
+                        )
+                        for stress_scenario_id, curve_point_id, shock_size in zip(
+                            chunk["stress_scenario_id"],
+                            chunk["curve_point_id"],
+                            chunk["parallel_shock_size"].tolist(),
+                        )
+                    ]
+                    _bulk_write(
+                        CurvePointShock,
+                        shocks,
+                        self.natural_key,
+                        self.update_fields,
+                        on_conflict,
+                    )
+                    shocks_written += len(shocks)
+                    shocks_updated += len(updated)
+                    written_scenario_ids.update(chunk["stress_scenario_id"])
+                    if progress is not None:
+                        progress(rows_written=shocks_written)
 
-                # Create CurvePointShock (no bulk_create because we might want unique_together constraints to raise)
-                shock = CurvePointShock(
-                    stress_scenario=stress_scenario,
-                    curve_point=curve_point,
-                    shock_size=row["parallel_shock_size"],
-                )
-                shock_records.append(shock)
-
-            CurvePointShock.objects.bulk_create(shock_records, ignore_conflicts=True)
+                pack_shock_vectors(written_scenario_ids)
+                # bulk writes send no signals
+                if shocks_written or scenarios_created:
+                    bump_versions(DataVersion.STRESS_SCENARIOS)
 
             return Response(
-                {"status": "Upload successful", "rows": len(shock_records)}, status=201
+                {
+                    "status": "Upload successful",
+                    "rows": rows,
+                    "shocks_written": shocks_written,
+                    "shocks_created": shocks_written - shocks_updated,
+                    "shocks_updated": shocks_updated,
+                    "rows_skipped": rows - shocks_written,
+                    "scenarios_created": scenarios_created,
+                },
+                status=201,
             )
 
+        except CSVValidationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
 class GenerateScenarioPositions(APIView):
     parser_classes = [JSONParser]
+    job_type = Job.GENERATE_SCENARIO_POSITIONS
 
     def post(self, request):
+        if not (
+            request.data.get("portfolio_name")
+            and request.data.get("position_date")
+            and request.data.get("scenario_name")
+        ):
+            return Response(
+                {
+                    "error": "portfolio_name, position_date, and scenario_name are required."
+                },
+                status=400,
+            )
+        if _run_as_job(request):
+            return _submit_job(self.job_type, request)
+        return self.process(request.data)
+
+    def process(self, data, file_obj=None, progress=None):
         try:
-            portfolio_name = request.data.get("portfolio_name")
-            position_date = request.data.get("position_date")
-            scenario_name = request.data.get("scenario_name")
+            portfolio_name = data.get("portfolio_name")
+            position_date = data.get("position_date")
+            scenario_name = data.get("scenario_name")
+            workers = data.get("workers", settings.STRESS_SCENARIO_WORKERS)
 
-            if not (portfolio_name and position_date and scenario_name):
-                return Response(
-                    {
-                        "error": "portfolio_name, position_date, and scenario_name are required."
-                    },
-                    status=400,
-                )
+            try:
+                workers = int(workers)
+            except (TypeError, ValueError):
+                return Response({"error": "workers must be an integer."}, status=400)
 
             position_date = pd.to_datetime(position_date).date()
+            portfolio = portfolio_id(portfolio_name)
             positions = Position.objects.filter(
-                portfolio_name=portfolio_name, position_date=position_date
-            )
+                portfolio_id=portfolio, position_date=position_date
+            ).select_related("security")
             if not positions.exists():
                 return Response(
                     {"error": "No positions found for given portfolio and date."},
@@ -660,91 +1760,189 @@ class GenerateScenarioPositions(APIView):
                     "change_per_period": change_per_period,
                 }
 
-            for scenario in scenarios:
-                shocks = CurvePointShock.objects.filter(stress_scenario=scenario)
-                if not shocks.exists():
-                    continue
+            schedule_index = CouponScheduleIndex.from_db(
+                {pos.security_id for pos in positions}
+            )
+            shocked_scenarios, scenario_curves = load_scenario_curves(
+                scenario_description
+            )
+            if progress is not None:
+                progress(total=len(shocked_scenarios))
+
+            # scenarios of the same period share cashflows, accrued interest and yields
+            scenarios_by_period_end_date = {}
+            for scenario_idx, scenario in enumerate(shocked_scenarios):
+                period_end_date = _period_end_date(
+                    position_date, scenario.period_number, scenario.period_length
+                )
+                scenarios_by_period_end_date.setdefault(period_end_date, []).append(
+                    scenario_idx
+                )
 
-                # Create curve dict
-                curve = {}
-                for shock in shocks:
-                    cp = shock.curve_point
-                    shocked_rate = cp.rate + shock.shock_size
-                    curve[float(cp.year)] = shocked_rate
+            ytm_not_converged = 0
+            spread_not_converged = 0
+            scenarios_done = 0
+            rows_written = 0
+            pending_scenarios = 0
+            pending_scenario_positions, pending_risk_scenarios = [], []
+            pending_summaries = []
+            live_periods = []
+            for (
+                period_end_date,
+                scenario_indices,
+            ) in scenarios_by_period_end_date.items():
+                live_positions = [
+                    pos for pos in positions if pos.security.maturity >= period_end_date
+                ]
+                if live_positions:
+                    live_periods.append(
+                        (period_end_date, scenario_indices, live_positions)
+                    )
+                    continue
+                # empty summaries, every position has matured
+                pending_summaries.extend(
+                    _portfolio_summary(
+                        portfolio,
+                        position_date,
+                        shocked_scenarios[scenario_idx],
+                        period_end_date,
+                        [],
+                    )
+                    for scenario_idx in scenario_indices
+                )
 
-                period_end_date = position_date + relativedelta(
-                    years=(scenario.period_number + 1) * scenario.period_length
+            # cashflows of a period are computed when the runner gets to it, and its rows are
+            # written before the results of the next period are taken
+            period_valuations = (
+                _period_valuation(
+                    period_end_date, scenario_indices, live_positions, schedule_index
                 )
-                for pos in positions:
-                    sec = pos.security
-
-                    if sec.maturity >= period_end_date:
-                        book_price = (
-                            pos.book_price
-                            + (scenario.period_number + 1)
-                            * security_amortization_schedules[sec]["change_per_period"]
-                        )
-                        notional_amount = book_price * pos.quantity / 100
-                        book_value = notional_amount
-                        par_value = pos.quantity
-
-                        scen_pos = ScenarioPosition(
-                            portfolio_name=pos.portfolio_name,
-                            scenario=scenario,
-                            position_date=position_date,
-                            period_end_date=period_end_date,
-                            lot_id=pos.lot_id,
-                            security=sec,
-                            quantity=pos.quantity,
-                            notional_amount=notional_amount,
-                            par_value=par_value,
-                            book_price=book_price,
-                            book_value=book_value,
+                for period_end_date, scenario_indices, live_positions in live_periods
+            )
+            with contextlib.closing(
+                iter_scenario_risk_measures(
+                    period_valuations, scenario_curves, workers=workers
+                )
+            ) as period_risks:
+                for (
+                    period_end_date,
+                    scenario_indices,
+                    live_positions,
+                    valuation,
+                    ytm_result,
+                ), risk in period_risks:
+                    ytm_not_converged += len(ytm_result.failed_indices)
+                    for idx in ytm_result.failed_indices:
+                        logging.warning(
+                            f"YTM did not converge for {live_positions[idx].security} on {period_end_date}"
                         )
-                        scen_pos.save()
-
-                        ai = calc_accrued_interest(
-                            period_end_date,
-                            sec.maturity,
-                            sec.fixed_coupon,
-                            sec.frequency,
+                    for row, scenario_idx in enumerate(scenario_indices):
+                        scenario = shocked_scenarios[scenario_idx]
+                        # spreads are over the shocked curve of the scenario
+                        spread_result = calc_z_spread_of_vanilla_bonds(
+                            valuation["dirty_prices"],
+                            valuation["cashflows"],
+                            valuation["times_to_cf"],
+                            scenario_curves.curve(scenario_idx),
                         )
-                        dirty_price = pos.book_price + ai
-                        try:
-                            ytm = calc_ytm_of_bond(
-                                dirty_price,
-                                sec.fixed_coupon,
+                        spread_not_converged += len(spread_result.failed_indices)
+                        for idx, pos in enumerate(live_positions):
+                            sec = pos.security
+
+                            book_price = (
+                                pos.book_price
+                                + (scenario.period_number + 1)
+                                * security_amortization_schedules[sec][
+                                    "change_per_period"
+                                ]
+                            )
+                            notional_amount = book_price * pos.quantity / 100
+                            book_value = notional_amount
+                            par_value = pos.quantity
+
+                            ai = float(valuation["accrued_interest"][idx])
+                            ytm = _solved_rate(ytm_result, idx)
+                            pv = float(risk["pv"][row, idx])
+                            oas = _solved_rate(spread_result, idx)
+
+                            pending_risk_scenarios.append(
+                                RiskScenario(
+                                    security=sec,
+                                    scenario=scenario,
+                                    price=pos.book_price,
+                                    yield_to_maturity=ytm,
+                                    discounted_pv=pv,
+                                    oas=oas,
+                                    accrued_interest=ai,
+                                    **_risk_fields(risk, row, idx),
+                                )
+                            )
+                            pending_scenario_positions.append(
+                                ScenarioPosition(
+                                    portfolio_id=pos.portfolio_id,
+                                    scenario=scenario,
+                                    position_date=position_date,
+                                    period_end_date=period_end_date,
+                                    lot_id=pos.lot_id,
+                                    security=sec,
+                                    quantity=pos.quantity,
+                                    notional_amount=notional_amount,
+                                    par_value=par_value,
+                                    book_price=book_price,
+                                    book_value=book_value,
+                                    discounted_value=pv * pos.quantity / 100,
+                                )
+                            )
+                        pending_summaries.append(
+                            _portfolio_summary(
+                                portfolio,
+                                position_date,
+                                scenario,
                                 period_end_date,
-                                sec.maturity,
-                                freq=sec.frequency,
+                                list(
+                                    zip(
+                                        pending_scenario_positions[
+                                            -len(live_positions) :
+                                        ],
+                                        pending_risk_scenarios[-len(live_positions) :],
+                                    )
+                                ),
                             )
-                        except ValueError as e:
-                            logging.info(f"Got Value error : {e}")
-                            ytm=1e-7
-                        pv = calc_pv_of_vanilla_bond(
-                            period_end_date,
-                            sec.maturity,
-                            sec.fixed_coupon,
-                            curve,
-                            freq=sec.frequency,
-                        )
-
-                        risk_scenario = RiskScenario.objects.create(
-                            security=sec,
-                            scenario=scenario,
-                            price=pos.book_price,
-                            yield_to_maturity=ytm,
-                            discounted_pv=pv,
-                            oas=0.0,
-                            accrued_interest=ai,
                         )
-
-                        scen_pos.risk_scenario = risk_scenario
-                        scen_pos.discounted_value = pv * pos.quantity / 100
-                        scen_pos.save()
+                        pending_scenarios += 1
+
+                        # chunks hold whole scenarios, so a failed run leaves no half-written
+                        # scenario, and every period ends a chunk, so its results are released
+                        if (
+                            len(pending_scenario_positions) >= SCENARIO_WRITE_CHUNK_ROWS
+                            or row == len(scenario_indices) - 1
+                        ):
+                            rows_written += _write_scenario_rows(
+                                pending_scenario_positions,
+                                pending_risk_scenarios,
+                                pending_summaries,
+                            )
+                            scenarios_done += pending_scenarios
+                            pending_scenario_positions, pending_risk_scenarios = [], []
+                            pending_summaries = []
+                            pending_scenarios = 0
+                            if progress is not None:
+                                progress(done=scenarios_done, rows_written=rows_written)
+
+            rows_written += _write_scenario_rows(
+                pending_scenario_positions, pending_risk_scenarios, pending_summaries
+            )
+            if progress is not None:
+                progress(done=len(shocked_scenarios), rows_written=rows_written)
 
             return Response(
-                {"status": "ScenarioPositions successfully created."}, status=201
+                {
+                    "status": "ScenarioPositions successfully created.",
+                    "rows_written": rows_written,
+                    "ytm_not_converged": ytm_not_converged,
+                    "spread_not_converged": spread_not_converged,
+                },
+                status=201,
             )
 
         except Exception as e:
@@ -752,12 +1950,20 @@ class GenerateScenarioPositions(APIView):
 
 
 class PortfolioStressTrendView(APIView):
+    """
+    Portfolio market value per stress scenario period and simulation, from one query
+    over the portfolio summaries written by GenerateScenarioPositions.
+    With percentiles, e.g. [5, 50, 95], the response also has percentile_bands of the
+    market value across simulations per period
+    """
+
     parser_classes = [JSONParser]
 
     def post(self, request):
         portfolio = request.data.get("portfolio")
         position_date = request.data.get("position_date")
         scenario_name = request.data.get("scenario_name")
+        percentiles = request.data.get("percentiles")
 
         if not (portfolio and position_date and scenario_name):
             return Response(
@@ -772,38 +1978,219 @@ class PortfolioStressTrendView(APIView):
                 {"error": "Invalid position_date format. Use YYYY-MM-DD."}, status=400
             )
 
-        try:
-            scenario_desc = StressScenarioDescription.objects.get(name=scenario_name)
-        except StressScenarioDescription.DoesNotExist:
+        if percentiles is not None:
+            try:
+                percentiles = [float(percentile) for percentile in percentiles]
+            except (TypeError, ValueError):
+                percentiles = None
+            if not percentiles or not all(0 <= p <= 100 for p in percentiles):
+                return Response(
+                    {"error": "percentiles must be a list of numbers from 0 to 100."},
+                    status=400,
+                )
+
+        # scenarios without a summary of the portfolio, and every scenario of
+        # an unknown portfolio (id None), have a market value of 0
+        portfolio_key = portfolio_id(portfolio)
+        scenarios = (
+            StressScenario.objects.filter(scenario__name=scenario_name)
+            .annotate(
+                market_value=Coalesce(
+                    Sum(
+                        "portfolio_summaries__discounted_value",
+                        filter=Q(
+                            portfolio_summaries__portfolio_id=portfolio_key,
+                            portfolio_summaries__position_date=base_date,
+                        ),
+                    ),
+                    0.0,
+                )
+            )
+            .order_by("period_number", "simulation_number")
+            .values_list(
+                "period_number", "simulation_number", "period_length", "market_value"
+            )
+        )
+
+        results = [
+            {
+                "date": _period_end_date(
+                    base_date, period_number, period_length
+                ).isoformat(),
+                "market_value": market_value,
+                "period_number": period_number,
+                "simulation_number": simulation_number,
+            }
+            for period_number, simulation_number, period_length, market_value in scenarios
+        ]
+        if (
+            not results
+            and not StressScenarioDescription.objects.filter(
+                name=scenario_name
+            ).exists()
+        ):
             return Response(
                 {"error": f"Scenario '{scenario_name}' not found."}, status=404
             )
 
-        scenarios = StressScenario.objects.filter(scenario=scenario_desc).order_by(
-            "period_number", "simulation_number"
-        )
+        if percentiles is None:
+            return Response(results, status=200)
 
-        results = []
-        for scenario in scenarios:
-            total_mv = (
-                ScenarioPosition.objects.filter(
-                    scenario=scenario,
-                    portfolio_name=portfolio,
-                    position_date=base_date,
-                ).aggregate(total=Sum("discounted_value"))["total"]
-                or 0
+        by_period = {}
+        for result in results:
+            by_period.setdefault((result["period_number"], result["date"]), []).append(
+                result["market_value"]
+            )
+        bands = []
+        for (period_number, date), market_values in by_period.items():
+            values = np.percentile(market_values, percentiles)
+            bands.append(
+                {
+                    "date": date,
+                    "period_number": period_number,
+                    "simulations": len(market_values),
+                    **{
+                        f"p{percentile:g}": float(value)
+                        for percentile, value in zip(percentiles, values)
+                    },
+                }
+            )
+        return Response({"trend": results, "percentile_bands": bands}, status=200)
+
+
+class PortfolioRiskView(APIView):
+    """
+    Portfolio DV01, duration, convexity and key rate durations as of position_date,
+    and per stress scenario and period when scenario_name is given. Not found when the
+    portfolio has no positions on position_date
+    """
+
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        portfolio = request.data.get("portfolio")
+        position_date = request.data.get("position_date")
+        scenario_name = request.data.get("scenario_name")
+
+        if not (portfolio and position_date):
+            return Response(
+                {"error": "portfolio and position_date are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            base_date = datetime.datetime.strptime(position_date, "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "Invalid position_date format. Use YYYY-MM-DD."}, status=400
             )
 
-            date_shift = timedelta(days=round(scenario.period_length * 365))
-            asof_date = base_date + date_shift
+        portfolio_key = portfolio_id(portfolio)
+        if portfolio_key is None:
+            return Response(
+                {"error": f"Portfolio '{portfolio}' not found."}, status=404
+            )
+        positions = list(
+            Position.objects.filter(
+                portfolio_id=portfolio_key, position_date=base_date
+            ).values_list(
+                "quantity",
+                "discounted_value",
+                "risk_core__dv01",
+                "risk_core__modified_duration",
+                "risk_core__convexity",
+                "risk_core__key_rate_durations",
+            )
+        )
+        if not positions:
+            return Response(
+                {"error": f"Portfolio '{portfolio}' has no positions on {base_date}."},
+                status=404,
+            )
+        result = {
+            "portfolio": portfolio,
+            "position_date": base_date.isoformat(),
+            **aggregate_portfolio_risk(positions),
+        }
 
-            results.append(
+        if scenario_name:
+            try:
+                scenario_desc = StressScenarioDescription.objects.get(
+                    name=scenario_name
+                )
+            except StressScenarioDescription.DoesNotExist:
+                return Response(
+                    {"error": f"Scenario '{scenario_name}' not found."}, status=404
+                )
+
+            summaries = (
+                ScenarioPortfolioSummary.objects.filter(
+                    scenario__scenario=scenario_desc,
+                    portfolio_id=portfolio_key,
+                    position_date=base_date,
+                    positions__gt=0,
+                )
+                .order_by("scenario__period_number", "scenario__simulation_number")
+                .values(
+                    "period_end_date",
+                    "scenario__period_number",
+                    "scenario__simulation_number",
+                    "discounted_value",
+                    "dv01",
+                    "modified_duration",
+                    "convexity",
+                    "key_rate_durations",
+                    "positions_without_risk",
+                )
+            )
+            result["scenarios"] = [
                 {
-                    "date": asof_date.isoformat(),
-                    "market_value": total_mv,
-                    "period_number": scenario.period_number,
-                    "simulation_number": scenario.simulation_number,
+                    "date": summary["period_end_date"].isoformat(),
+                    "period_number": summary["scenario__period_number"],
+                    "simulation_number": summary["scenario__simulation_number"],
+                    "market_value": summary["discounted_value"],
+                    "dv01": summary["dv01"],
+                    "modified_duration": summary["modified_duration"],
+                    "convexity": summary["convexity"],
+                    "key_rate_durations": summary["key_rate_durations"] or {},
+                    "positions_without_risk": summary["positions_without_risk"],
                 }
-            )
+                for summary in summaries
+            ]
+
+        return Response(result, status=200)
+
 
-        return Response(results, status=200)
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status, progress and final summary of queued runs. Runs are queued by posting to
+    an upload or generate-scenario-positions endpoint with async=true
+    """
+
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not cancel_job(job):
+            return Response(
+                {"error": f"Job {job.id} already finished with status {job.status}."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=200)
+
+
+# views that run queued jobs, by job type
+JOB_VIEWS = {
+    view.job_type: view
+    for view in (
+        UploadVanillaBondsCSV,
+        RiskCoreUploadCSV,
+        PositionUploadCSV,
+        CurveUploadCSV,
+        StressScenarioUploadCSV,
+        GenerateScenarioPositions,
+    )
+}